@@ -5,8 +5,27 @@ Allure Handle - 轻量级 Allure 报告处理工具
 一个简单易用的 Allure 报告工具，用于 pytest 测试框架。
 最小依赖，只需要 allure-pytest。
 """
+from allure_handle.aio import AsyncAllureHandle
 from allure_handle.allure_handle import AllureHandle, allure_handle
+from allure_handle.batch import BatchRecorder
+from allure_handle.budget import AttachmentBudget
+from allure_handle.capture import FailureCapture
+from allure_handle.dedup import AttachmentDeduplicator
+from allure_handle.encoder import JsonEncoder
+from allure_handle.jsondiff import JsonDiff
+from allure_handle.latency import LatencyStore
+from allure_handle.logs import AllureLogHandler
+from allure_handle.memo import SerializationCache, frozen
+from allure_handle.overhead import OverheadStats, StatsdSink
+from allure_handle.policy import PayloadPolicy
+from allure_handle.redact import Redactor
+from allure_handle.templates import HtmlTemplate
+from allure_handle.writer import AttachmentWriter
 
 __version__ = '1.0.1'
-__all__ = ['AllureHandle', 'allure_handle']
+__all__ = ['AllureHandle', 'allure_handle', 'AttachmentWriter', 'JsonEncoder', 'FailureCapture',
+           'AttachmentDeduplicator', 'HtmlTemplate',
+           'BatchRecorder', 'LatencyStore', 'AllureLogHandler',
+           'PayloadPolicy', 'OverheadStats', 'StatsdSink', 'AsyncAllureHandle',
+           'SerializationCache', 'frozen', 'JsonDiff', 'AttachmentBudget', 'Redactor']
 
@@ -0,0 +1,187 @@
+# -*- coding:UTF-8 -*-
+"""
+Allure 生命周期辅助函数
+封装对 allure-pytest 内部对象（监听器、文件日志器）的访问，供各模块复用
+"""
+from pathlib import Path
+from typing import Iterable, Optional
+
+from allure_commons import plugin_manager
+from allure_commons.model2 import ATTACHMENT_PATTERN, Attachment
+from allure_commons.types import AttachmentType
+from allure_commons.utils import uuid4
+
+
+def get_reporter():
+    """
+    获取当前注册的 AllureReporter
+
+    Returns:
+        AllureReporter 实例；未启用 Allure（未指定 --alluredir）时返回 None
+    """
+    for plugin in plugin_manager.get_plugins():
+        reporter = getattr(plugin, 'allure_logger', None)
+        if reporter is not None:
+            return reporter
+    return None
+
+
+def get_results_dir() -> Optional[Path]:
+    """
+    获取 Allure 结果目录
+
+    Returns:
+        AllureFileLogger 的输出目录；未注册文件日志器时返回 None
+    """
+    for plugin in plugin_manager.get_plugins():
+        report_dir = getattr(plugin, '_report_dir', None)
+        if report_dir is not None:
+            return Path(report_dir)
+    return None
+
+
+def set_results_dir(path) -> bool:
+    """
+    把 AllureFileLogger 的输出目录重定向到 path（目录不存在时自动创建）
+
+    Returns:
+        是否找到并重定向了文件日志器
+    """
+    for plugin in plugin_manager.get_plugins():
+        if getattr(plugin, '_report_dir', None) is not None:
+            path = Path(path).absolute()
+            path.mkdir(parents=True, exist_ok=True)
+            plugin._report_dir = path
+            return True
+    return False
+
+
+def reserve_attachment_entry(name: str, attachment_type=None, extension: str = None):
+    """
+    在当前步骤（或用例）下登记一个附件，只写入元数据，不写文件
+
+    附件在报告中的顺序由登记顺序决定，文件内容可以稍后由任意线程写入。
+
+    Args:
+        name: 附件名称
+        attachment_type: allure.attachment_type 枚举
+        extension: 自定义扩展名（attachment_type 为枚举时忽略）
+
+    Returns:
+        (附件文件名, 所属步骤/用例对象, Attachment 对象)；没有可用的用例上下文时返回 None
+    """
+    reporter = get_reporter()
+    if reporter is None:
+        return None
+    parent_uuid = reporter._last_executable()
+    if parent_uuid is None:
+        return None
+    file_name = reporter._attach(uuid4(), name=name, attachment_type=attachment_type,
+                                 extension=extension, parent_uuid=parent_uuid)
+    parent = reporter.get_item(parent_uuid)
+    return file_name, parent, parent.attachments[-1]
+
+
+def current_executable():
+    """
+    当前线程上最近的步骤或用例对象
+
+    Returns:
+        TestStepResult / TestResult 等；没有可用的用例上下文时返回 None
+    """
+    reporter = get_reporter()
+    if reporter is None:
+        return None
+    parent_uuid = reporter._last_executable()
+    return reporter.get_item(parent_uuid) if parent_uuid is not None else None
+
+
+def reserve_attachment_on(parent, name: str, attachment_type=None, extension: str = None):
+    """
+    在指定的步骤/用例对象下登记附件，不依赖线程上的步骤栈（供 asyncio API 使用）
+
+    Args:
+        parent: 所属步骤或用例对象
+        name: 附件名称
+        attachment_type: allure.attachment_type 枚举或 MIME 类型字符串
+        extension: 自定义扩展名（attachment_type 为枚举时忽略）
+
+    Returns:
+        (附件文件名, 所属对象, Attachment 对象)
+    """
+    if isinstance(attachment_type, AttachmentType):
+        extension, mime_type = attachment_type.extension, attachment_type.mime_type
+    else:
+        mime_type = attachment_type
+    file_name = ATTACHMENT_PATTERN.format(prefix=uuid4(), ext=extension or 'attach')
+    attachment = Attachment(source=file_name, name=name, type=mime_type)
+    parent.attachments.append(attachment)
+    return file_name, parent, attachment
+
+
+def reserve_attachment(name: str, attachment_type=None, extension: str = None) -> Optional[str]:
+    """
+    登记附件元数据，参数同 reserve_attachment_entry
+
+    Returns:
+        附件文件名；没有可用的用例上下文时返回 None
+    """
+    entry = reserve_attachment_entry(name, attachment_type, extension)
+    return entry[0] if entry else None
+
+
+def write_attachment(body, file_name: str):
+    """
+    把附件内容交给已注册的日志器写出
+
+    Args:
+        body: 附件内容（str 或 bytes）
+        file_name: reserve_attachment 返回的文件名
+    """
+    plugin_manager.hook.report_attached_data(body=body, file_name=file_name)
+
+
+def write_attachment_file(source: str, file_name: str):
+    """
+    把源文件交给已注册的日志器复制到结果目录
+
+    Args:
+        source: 源文件路径
+        file_name: reserve_attachment 返回的文件名
+    """
+    plugin_manager.hook.report_attached_file(source=source, file_name=file_name)
+
+
+def write_entry(body, entry):
+    """
+    写出已登记附件的内容（AttachmentWriter / FailureCapture 的默认写出方式）
+
+    Args:
+        body: 附件内容（str 或 bytes）
+        entry: reserve_attachment_entry 返回的 (文件名, 所属对象, Attachment)
+    """
+    write_attachment(body, entry[0])
+
+
+def write_entry_stream(chunks: Iterable, entry) -> int:
+    """
+    以流的方式写出已登记附件的内容，不在内存中拼接完整内容
+
+    Args:
+        chunks: 逐块产生 str 或 bytes 的可迭代对象
+        entry: reserve_attachment_entry 返回的 (文件名, 所属对象, Attachment)
+
+    Returns:
+        写出的字节数
+    """
+    results_dir = get_results_dir()
+    if results_dir is None:
+        # 没有文件日志器时只能交给 hook 一次性写出
+        body = b''.join(c.encode('utf-8') if isinstance(c, str) else c for c in chunks)
+        write_entry(body, entry)
+        return len(body)
+    size = 0
+    with open(results_dir / entry[0], 'wb') as f:
+        for chunk in chunks:
+            size += f.write(chunk.encode('utf-8') if isinstance(chunk, str) else chunk)
+    return size
@@ -0,0 +1,318 @@
+# -*- coding:UTF-8 -*-
+"""
+asyncio API
+在 asyncio.gather 等并发协程中使用：序列化和写文件交给线程池执行，不阻塞事件循环；
+每个协程的步骤嵌套通过 contextvars 跟踪，步骤和附件直接登记到所属的步骤对象下，
+不依赖线程上的 allure.step 栈，因此并发协程之间不会互相串位
+"""
+import asyncio
+import contextvars
+import functools
+import time
+from concurrent.futures import Executor, ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+import allure
+from allure_commons.model2 import Status, StatusDetails, TestStepResult
+from allure_commons.utils import format_exception, format_traceback, now
+
+from allure_handle._lifecycle import current_executable, reserve_attachment_on
+from allure_handle.allure_handle import _LAZY_TYPES, AllureHandle
+from allure_handle.memo import unfreeze
+from allure_handle.policy import _size_of
+
+# 当前协程所在的步骤对象，None 表示使用当前线程上最近的步骤或用例
+_parent_step: contextvars.ContextVar = contextvars.ContextVar('allure_handle_parent_step', default=None)
+# 当前协程最近一次 add_request_to_report 的 (method, url)，供响应延迟统计使用
+_last_request: contextvars.ContextVar = contextvars.ContextVar('allure_handle_last_request',
+                                                              default=(None, None))
+# 当前协程中正在统计开销的方法调用（OverheadStats 的上下文按线程保存，协程需要各自持有）
+_overhead_context: contextvars.ContextVar = contextvars.ContextVar('allure_handle_overhead_context',
+                                                                  default=None)
+
+
+def _when_active(func):
+    """_when_active 的协程版本：Allure 未启用时直接返回 None；开启开销统计时按协程计入方法调用"""
+    @functools.wraps(func)
+    async def wrapper(*args, **kwargs):
+        active = AllureHandle._active
+        if active is None:
+            active = AllureHandle.refresh_active()
+        if not active:
+            return None
+        overhead = AllureHandle._overhead
+        if overhead is None or _overhead_context.get() is not None:
+            return await _call(func, args, kwargs)
+        context = overhead.call_context(func.__name__)
+        token = _overhead_context.set(context)
+        started = time.perf_counter()
+        try:
+            return await _call(func, args, kwargs)
+        finally:
+            overhead.add_call(context, time.perf_counter() - started)
+            _overhead_context.reset(token)
+    return wrapper
+
+
+async def _call(func, args, kwargs):
+    """对惰性参数求值后调用协程方法"""
+    args = [arg() if isinstance(arg, _LAZY_TYPES) else arg for arg in args]
+    for key, value in kwargs.items():
+        if isinstance(value, _LAZY_TYPES):
+            kwargs[key] = value()
+    return await func(*args, **kwargs)
+
+
+def _current_parent():
+    parent = _parent_step.get()
+    return parent if parent is not None else current_executable()
+
+
+def _start_step(parent, title: str) -> TestStepResult:
+    step = TestStepResult(name=title, start=now())
+    parent.steps.append(step)
+    return step
+
+
+def _stop_step(step: TestStepResult, exc_type=None, exc_val=None, exc_tb=None):
+    step.stop = now()
+    if exc_val is None:
+        step.status = Status.PASSED
+        return
+    step.status = Status.FAILED if isinstance(exc_val, AssertionError) else Status.BROKEN
+    step.statusDetails = StatusDetails(message=format_exception(exc_type, exc_val),
+                                       trace=format_traceback(exc_tb))
+
+
+def _reserve(parent, payload, name: str, attachment_type, encode, jobs: List[Tuple]):
+    """登记附件；失败时捕获模式下交给捕获缓冲区，否则加入待写出列表"""
+    entry = reserve_attachment_on(parent, name, attachment_type)
+    capture = AllureHandle._capture
+    if capture is not None and capture.hold_entry(payload, entry, encode):
+        return
+    jobs.append((payload, encode, entry))
+
+
+def _store_all(jobs: List[Tuple]):
+    """在线程池中按登记顺序序列化并写出附件"""
+    for payload, encode, entry in jobs:
+        AllureHandle._store(encode(payload) if encode else payload, entry)
+
+
+class _AsyncStep:
+    """async with 步骤：进入时登记到当前协程的父步骤下，退出时记录状态"""
+
+    def __init__(self, title: str):
+        self.title = title
+        self.step: Optional[TestStepResult] = None
+        self._token = None
+
+    async def __aenter__(self) -> '_AsyncStep':
+        active = AllureHandle._active
+        if active is None:
+            active = AllureHandle.refresh_active()
+        parent = _current_parent() if active else None
+        if parent is not None:
+            self.step = _start_step(parent, self.title)
+            self._token = _parent_step.set(self.step)
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        if self._token is None:
+            return
+        _parent_step.reset(self._token)
+        _stop_step(self.step, exc_type, exc_val, exc_tb)
+
+
+class AsyncAllureHandle:
+    """
+    AllureHandle 的 asyncio 版本
+
+    - 步骤和附件在调用时（协程内同步地）按顺序登记到所属步骤下，报告结构与调度顺序无关
+    - 序列化和写文件在线程池中执行，事件循环只等待结果
+    - 在 async with AsyncAllureHandle.step(...) 中请使用本类的方法，同步方法仍按线程上的步骤栈归属
+
+    Example:
+        async def call(client, order_id):
+            async with AsyncAllureHandle.step(f"查询订单 {order_id}"):
+                await AsyncAllureHandle.add_request_to_report('GET', f'/orders/{order_id}')
+                resp = await client.get(f'/orders/{order_id}')
+                await AsyncAllureHandle.add_response_to_report(resp.status_code, response_json=resp.json(),
+                                                               response_time=resp.elapsed.total_seconds())
+
+        await asyncio.gather(*(call(client, i) for i in range(100)))
+    """
+
+    # 用户指定的线程池，None 表示使用内置线程池
+    _executor: Optional[Executor] = None
+    # 内置线程池，首次使用时创建
+    _default_executor: Optional[ThreadPoolExecutor] = None
+    # 内置线程池的线程数
+    max_workers: int = 4
+
+    @staticmethod
+    def set_executor(executor: Optional[Executor]):
+        """
+        指定执行序列化和写文件的线程池
+
+        Args:
+            executor: concurrent.futures.Executor 实例，None 表示恢复为内置线程池
+        """
+        AsyncAllureHandle._executor = executor
+
+    @staticmethod
+    def shutdown():
+        """关闭内置线程池（pytest 插件在会话结束时调用）"""
+        executor, AsyncAllureHandle._default_executor = AsyncAllureHandle._default_executor, None
+        if executor is not None:
+            executor.shutdown(wait=True)
+
+    @staticmethod
+    def _get_executor() -> Executor:
+        if AsyncAllureHandle._executor is not None:
+            return AsyncAllureHandle._executor
+        executor = AsyncAllureHandle._default_executor
+        if executor is None:
+            executor = AsyncAllureHandle._default_executor = ThreadPoolExecutor(
+                max_workers=AsyncAllureHandle.max_workers, thread_name_prefix='allure-handle-aio')
+        return executor
+
+    @staticmethod
+    def step(title: str) -> _AsyncStep:
+        """
+        协程步骤（async with），嵌套关系按协程（contextvars）跟踪
+
+        Args:
+            title: 步骤标题
+        """
+        return _AsyncStep(title)
+
+    @staticmethod
+    async def _attach_parts(parent, parts: List[Tuple], method: str = None):
+        """
+        登记并写出附件：与 AllureHandle._attach 相同，先经过附件预算和开销统计，再登记附件
+
+        Args:
+            parent: 所属步骤或用例对象
+            parts: [(内容, 名称, 附件类型, 序列化函数), ...]
+            method: 开销统计中的方法名（不经过 add_* 方法调用时使用，如 AllureAsyncTransport）
+        """
+        budget, overhead = AllureHandle._budget, AllureHandle._overhead
+        context = None
+        if overhead is not None:
+            context = _overhead_context.get() or overhead.call_context(method or '_attach_parts')
+        jobs = []
+        for payload, name, attachment_type, encode in parts:
+            if budget is not None:
+                admitted = budget.admit(payload, name, attachment_type, encode)
+                if admitted is None:
+                    continue
+                payload, name, attachment_type, encode = admitted
+            if context is None:
+                _reserve(parent, payload, name, attachment_type, encode, jobs)
+                continue
+            if encode is not None:
+                encode = overhead.timed_encode(encode, context)
+            with overhead.attaching(context, 0 if encode is not None else _size_of(payload)):
+                _reserve(parent, payload, name, attachment_type, encode, jobs)
+        if jobs:
+            loop = asyncio.get_running_loop()
+            await loop.run_in_executor(AsyncAllureHandle._get_executor(), _store_all, jobs)
+
+    @staticmethod
+    async def _step_with_parts(title: str, parts: List[Tuple], method: str = None):
+        parent = _current_parent()
+        if parent is None:
+            return
+        step = _start_step(parent, title)
+        try:
+            await AsyncAllureHandle._attach_parts(step, parts, method)
+        finally:
+            _stop_step(step)
+
+    @staticmethod
+    async def _step_with_consolidated(consolidated, title: str, info: Dict):
+        """合并步骤模式：在线程池中序列化字段并写为步骤参数，超长字段再单独附加"""
+        parent = _current_parent()
+        if parent is None:
+            return
+        step = _start_step(parent, title)
+        try:
+            loop = asyncio.get_running_loop()
+            parts = await loop.run_in_executor(AsyncAllureHandle._get_executor(), AllureHandle._consolidated_parts,
+                                               consolidated, step, title, info)
+            await AsyncAllureHandle._attach_parts(step, parts)
+        finally:
+            _stop_step(step)
+
+    @staticmethod
+    @_when_active
+    async def add_request_to_report(method: str, url: str, headers: Dict = None,
+                                    params: Dict = None, data: Dict = None,
+                                    json_data: Dict = None):
+        """
+        添加请求信息到 Allure 报告（参数同 AllureHandle.add_request_to_report）
+        """
+        _last_request.set((method, url))
+        title = f"请求信息: {method} {AllureHandle._redact_text(url)}"
+        request_info = AllureHandle._request_info(method, url, headers, params, data, json_data)
+        consolidated = AllureHandle._consolidated
+        if consolidated is not None:
+            await AsyncAllureHandle._step_with_consolidated(consolidated, title, request_info)
+            return
+        await AsyncAllureHandle._step_with_parts(title, [
+            (request_info, "请求信息", allure.attachment_type.JSON, AllureHandle._json_encode()),
+        ])
+
+    @staticmethod
+    @_when_active
+    async def add_response_to_report(status_code: int, response_json: Dict = None,
+                                     response_text: str = None, response_time: float = None,
+                                     method: str = None, url: str = None):
+        """
+        添加响应信息到 Allure 报告（参数同 AllureHandle.add_response_to_report，
+        method/url 默认取当前协程最近一次 add_request_to_report 的值）
+        """
+        if method is None or url is None:
+            last_method, last_url = _last_request.get()
+            method, url = method or last_method, url or last_url
+        AllureHandle._record_latency(method, url, response_time)
+        title = f"响应信息: {status_code}"
+        consolidated = AllureHandle._consolidated
+        if consolidated is not None:
+            await AsyncAllureHandle._step_with_consolidated(consolidated, title, AllureHandle._response_info(
+                status_code, response_json, response_text, response_time))
+            return
+        await AsyncAllureHandle._step_with_parts(
+            title, AllureHandle._response_parts(status_code, response_json, response_text, response_time)
+        )
+
+    @staticmethod
+    @_when_active
+    async def add_testdata_to_report(testdata: Dict, name: str = "测试数据"):
+        """
+        添加测试数据到 Allure 报告
+        """
+        parent = _current_parent()
+        if parent is None:
+            return
+        memo = AllureHandle._memo
+        if memo is None:
+            testdata, encode = unfreeze(testdata), AllureHandle._json_encode()
+        else:
+            encode = AllureHandle._memo_json_encode(memo)
+        await AsyncAllureHandle._attach_parts(parent, [(testdata, name, allure.attachment_type.JSON, encode)])
+
+    @staticmethod
+    @_when_active
+    async def add_step_with_attachment(title: str, content: str, attachment_type: str = "TEXT"):
+        """
+        添加步骤并附加内容到 Allure 报告（参数同 AllureHandle.add_step_with_attachment）
+        """
+        attach_type = getattr(allure.attachment_type, attachment_type.upper(), allure.attachment_type.TEXT)
+        if attach_type not in (allure.attachment_type.JSON, allure.attachment_type.HTML):
+            attach_type = allure.attachment_type.TEXT
+        redactor = AllureHandle._redactor
+        await AsyncAllureHandle._step_with_parts(title, [
+            (content, title, attach_type, redactor.redact_text if redactor is not None else None),
+        ])
@@ -3,16 +3,548 @@
 Allure 报告处理工具类
 轻量级 Allure 报告工具，最小依赖
 """
-import json
+import functools
+import logging
 import os
+import threading
+import types
 import allure
-from typing import Dict, Optional
+from typing import IO, Callable, Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+from allure_handle._lifecycle import (current_executable, get_reporter, get_results_dir, reserve_attachment_entry,
+                                      write_entry, write_entry_stream)
+from allure_handle.batch import BatchRecorder
+from allure_handle.budget import DROPPED, FULL, SUMMARY, TRUNCATED, TRUNCATED_LABEL, AttachmentBudget, BudgetStream
+from allure_handle.capture import FailureCapture
+from allure_handle.consolidate import BUNDLE_NAME, ConsolidatedSteps
+from allure_handle.dedup import AttachmentDeduplicator
+from allure_handle.encoder import JsonEncoder, JsonStream
+from allure_handle.files import copy_file, tail_range
+from allure_handle.jsondiff import DEFAULT_ARRAY_KEYS, JsonDiff, render_html
+from allure_handle.latency import LatencyStore, url_template
+from allure_handle.logs import AllureLogHandler
+from allure_handle.memo import SerializationCache, unfreeze
+from allure_handle.overhead import OverheadStats
+from allure_handle.policy import PayloadPolicy, _size_of
+from allure_handle.redact import DEFAULT_KEYS, DEFAULT_PATTERNS, Redactor
+from allure_handle.templates import HtmlTemplate, get_template, register_template
+from allure_handle.writer import AttachmentWriter
+
+# 可作为惰性参数的类型：只有 Allure 处于启用状态时才会被调用求值
+_LAZY_TYPES = (types.FunctionType, types.MethodType, functools.partial)
+# 流式读取文件对象时每次读取的大小
+_STREAM_CHUNK_SIZE = 64 * 1024
+
+
+def _when_active(func):
+    """
+    Allure 未启用时直接返回 None；启用时先对惰性参数求值再调用原方法
+    """
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        active = AllureHandle._active
+        if active is None:
+            active = AllureHandle.refresh_active()
+        if not active:
+            return None
+        overhead = AllureHandle._overhead
+        started = overhead.enter(func.__name__) if overhead is not None else None
+        try:
+            args = [arg() if isinstance(arg, _LAZY_TYPES) else arg for arg in args]
+            for key, value in kwargs.items():
+                if isinstance(value, _LAZY_TYPES):
+                    kwargs[key] = value()
+            return func(*args, **kwargs)
+        finally:
+            if started is not None:
+                overhead.leave(started)
+    return wrapper
 
 
 class AllureHandle:
     """Allure 报告处理工具类"""
     
+    # 后台写入器，None 表示同步写入
+    _writer: Optional[AttachmentWriter] = None
+    # 所有 JSON 附件共用的编码器
+    _encoder: JsonEncoder = JsonEncoder()
+    # 与 _encoder 同一后端的紧凑编码器（步骤参数、NDJSON 等单行场景）
+    _compact_encoder: JsonEncoder = JsonEncoder(compact=True)
+    # 失败时捕获缓冲区，None 表示直接写入
+    _capture: Optional[FailureCapture] = None
+    # 会话级附件去重索引，None 表示不去重
+    _dedup: Optional[AttachmentDeduplicator] = None
+    # 附件大小策略（字节上限 / 头尾截取 / JSON 数组截断 / gzip），None 表示不限制
+    _policy: Optional[PayloadPolicy] = None
+    # 敏感信息脱敏规则（序列化时执行），None 表示不脱敏
+    _redactor: Optional[Redactor] = None
+    # 测试数据 / 用例描述的序列化结果缓存，None 表示不缓存
+    _memo: Optional[SerializationCache] = None
+    # 按用例/会话的附件字节数和数量预算，None 表示不限制
+    _budget: Optional[AttachmentBudget] = None
+    # 合并步骤模式（请求/响应摘要写为步骤参数），None 表示每个字段组写一个附件
+    _consolidated: Optional[ConsolidatedSteps] = None
+    # 超过该字节数的文件走大文件写入路径（硬链接 / reflink / 内核复制）
+    large_file_threshold: int = 8 * 1024 * 1024
+    # 估算大小超过该字节数的 JSON 附件逐块序列化并直接写入结果目录，None 表示总是一次性序列化
+    stream_json_threshold: Optional[int] = 8 * 1024 * 1024
+    # 用例描述HTML引用的共享样式表地址，None 表示内联默认 CSS
+    description_stylesheet: Optional[str] = None
+    # 会话级接口延迟统计，None 表示不统计
+    _latency: Optional[LatencyStore] = None
+    # 每个线程最近一次 add_request_to_report 的 (method, url)，供响应延迟统计使用
+    _last_request = threading.local()
+    # 报告自身开销统计，None 表示不统计
+    _overhead: Optional[OverheadStats] = None
+    # 挂在根 logger 上的用例日志捕获器，None 表示不捕获
+    _log_handler: Optional[AllureLogHandler] = None
+    # Allure 是否处于启用状态（注册了监听器），None 表示尚未检测
+    _active: Optional[bool] = None
+    
+    @staticmethod
+    def refresh_active() -> bool:
+        """
+        重新检测 Allure 是否处于启用状态（pytest 插件在每个会话开始时调用一次）
+        
+        未指定 --alluredir 时没有注册 Allure 监听器，所有 add_* 方法都会直接返回，
+        不构造字典、不序列化、不进入 allure.step。
+        
+        Returns:
+            是否启用
+        """
+        AllureHandle._active = get_reporter() is not None
+        return AllureHandle._active
+    
+    @staticmethod
+    def set_json_encoder(backend: str = 'auto', compact: bool = False) -> JsonEncoder:
+        """
+        设置 JSON 编码器
+        
+        Args:
+            backend: 编码后端，auto（优先 orjson，未安装时使用标准库）/ orjson / stdlib
+            compact: 是否输出紧凑 JSON（无缩进）
+        
+        Returns:
+            JsonEncoder 实例
+        """
+        AllureHandle._encoder = JsonEncoder(backend=backend, compact=compact)
+        AllureHandle._compact_encoder = JsonEncoder(backend=backend, compact=True)
+        AllureHandle._clear_memo()
+        return AllureHandle._encoder
+    
+    @staticmethod
+    def enable_async_writer(workers: int = 2, max_queue: int = 256) -> AttachmentWriter:
+        """
+        开启后台写入模式，附件的序列化和落盘由工作线程完成
+        
+        Args:
+            workers: 工作线程数
+            max_queue: 队列最大长度，队列满时调用方阻塞等待
+        
+        Returns:
+            AttachmentWriter 实例
+        """
+        AllureHandle.disable_async_writer()
+        AllureHandle._writer = AttachmentWriter(workers=workers, max_queue=max_queue, store=AllureHandle._store)
+        return AllureHandle._writer
+    
+    @staticmethod
+    def disable_async_writer():
+        """写完剩余附件并恢复同步写入模式，写入失败的附件以 RuntimeWarning 报告"""
+        writer, AllureHandle._writer = AllureHandle._writer, None
+        if writer is not None:
+            writer.close()
+    
+    @staticmethod
+    def flush():
+        """等待后台写入器中的附件全部落盘（同步模式下无操作），写入失败的附件以 RuntimeWarning 报告"""
+        if AllureHandle._writer is not None:
+            AllureHandle._writer.flush()
+    
+    @staticmethod
+    def enable_failure_capture() -> FailureCapture:
+        """
+        开启失败时捕获模式：附件暂存在内存中，只有失败/出错的用例才写入结果目录
+        
+        需配合 pytest 插件使用（--allure-capture-on-failure），由插件在每个用例开始和结束时驱动缓冲区。
+        
+        Returns:
+            FailureCapture 实例
+        """
+        AllureHandle._capture = FailureCapture()
+        return AllureHandle._capture
+    
+    @staticmethod
+    def disable_failure_capture():
+        """关闭失败时捕获模式"""
+        AllureHandle._capture = None
+    
+    @staticmethod
+    def enable_dedup(mode: str = 'reference', max_entries: int = 100000,
+                     min_size: int = 512) -> AttachmentDeduplicator:
+        """
+        开启会话级附件去重：内容相同的附件只写一次
+        
+        Args:
+            mode: reference（引用已有文件）/ hardlink（硬链接到已有文件）
+            max_entries: 索引最大条目数（LRU 淘汰）
+            min_size: 小于该字节数的附件不参与去重
+        
+        Returns:
+            AttachmentDeduplicator 实例，可通过 summary() 查看节省的字节数
+        """
+        AllureHandle._dedup = AttachmentDeduplicator(mode=mode, max_entries=max_entries, min_size=min_size)
+        return AllureHandle._dedup
+    
+    @staticmethod
+    def disable_dedup():
+        """关闭附件去重"""
+        AllureHandle._dedup = None
+    
+    @staticmethod
+    def enable_payload_policy(max_bytes: Union[int, Dict[str, int]] = None, head_ratio: float = 0.5,
+                              json_array_keep: int = None, gzip_threshold: int = None) -> PayloadPolicy:
+        """
+        开启附件大小策略，对所有 add_* 方法产生的附件生效
+        
+        Args:
+            max_bytes: 字节上限，整数或 {类型名: 字节数}（如 {'JSON': 1048576, 'TEXT': 262144, 'default': ...}）；
+                       超出时保留头尾、中间插入省略标记（只对文本类附件生效）
+            head_ratio: 截取时头部所占比例
+            json_array_keep: JSON 数组超过 2N+1 个元素时只保留首尾各 N 个（序列化之前完成）
+            gzip_threshold: 不小于该字节数的附件 gzip 压缩存储
+        
+        Returns:
+            PayloadPolicy 实例，可通过 summary() 查看截断/压缩统计
+        
+        Example:
+            AllureHandle.enable_payload_policy(max_bytes={'JSON': 2 * 1024 * 1024, 'default': 512 * 1024},
+                                               json_array_keep=20, gzip_threshold=256 * 1024)
+        """
+        AllureHandle._policy = PayloadPolicy(max_bytes=max_bytes, head_ratio=head_ratio,
+                                             json_array_keep=json_array_keep, gzip_threshold=gzip_threshold)
+        AllureHandle._clear_memo()
+        return AllureHandle._policy
+    
+    @staticmethod
+    def disable_payload_policy():
+        """关闭附件大小策略"""
+        AllureHandle._policy = None
+        AllureHandle._clear_memo()
+    
+    @staticmethod
+    def enable_redaction(keys: Iterable[str] = DEFAULT_KEYS, paths: Iterable[str] = (),
+                         patterns: Iterable[str] = DEFAULT_PATTERNS, mask: str = '***') -> Redactor:
+        """
+        开启敏感信息脱敏：请求/响应/测试数据在序列化的同时脱敏，调用方无需先深拷贝再清洗
+        
+        Args:
+            keys: 字段名规则（忽略大小写、'-' 和 '_'，支持通配符），默认覆盖 Authorization、Cookie、各类 token/secret/password
+            paths: JSON 路径规则，如 '$.data[*].user.phone'
+            patterns: 值规则：allure_handle.redact.PRESET_PATTERNS 中的名称或正则，默认覆盖 Bearer/Basic 凭据、JWT、
+                      URL 中的账号密码和 token 参数、邮箱
+            mask: 替换敏感内容的掩码
+        
+        Returns:
+            Redactor 实例，可通过 summary() 查看脱敏次数
+        
+        Example:
+            AllureHandle.enable_redaction(keys=DEFAULT_KEYS + ('phone',), patterns=DEFAULT_PATTERNS + ('cn_id_card',))
+        """
+        AllureHandle._redactor = Redactor(keys=keys, paths=paths, patterns=patterns, mask=mask)
+        AllureHandle._clear_memo()
+        return AllureHandle._redactor
+    
+    @staticmethod
+    def disable_redaction():
+        """关闭敏感信息脱敏"""
+        AllureHandle._redactor = None
+        AllureHandle._clear_memo()
+    
+    @staticmethod
+    def _redact_text(text):
+        """对文本应用脱敏值规则（步骤标题、文本正文等），未开启脱敏时原样返回"""
+        redactor = AllureHandle._redactor
+        return text if redactor is None else redactor.redact_text(text)
+    
+    @staticmethod
+    def enable_serialization_cache(max_entries: int = 1024,
+                                   max_bytes: int = 64 * 1024 * 1024) -> SerializationCache:
+        """
+        开启序列化结果缓存：add_testdata_to_report / add_case_description_html 传入内容相同的数据时
+        复用之前的序列化结果（参数化用例的公共数据只序列化一次）
+        
+        用 allure_handle.memo.frozen() 包装的数据按对象身份命中，不计算结构指纹。
+        使用 orjson 编码器时计算指纹比序列化更慢，测试数据只有 frozen() 包装的才缓存。
+        
+        Args:
+            max_entries: 最大条目数（LRU 淘汰）
+            max_bytes: 缓存结果的最大总字节数
+        
+        Returns:
+            SerializationCache 实例，可通过 summary() 查看命中/未命中/淘汰次数
+        """
+        AllureHandle._memo = SerializationCache(max_entries=max_entries, max_bytes=max_bytes)
+        return AllureHandle._memo
+    
+    @staticmethod
+    def disable_serialization_cache():
+        """关闭序列化结果缓存"""
+        AllureHandle._memo = None
+    
+    @staticmethod
+    def enable_budget(test_bytes=None, test_count: int = None, session_bytes=None, session_count: int = None,
+                      truncate_at: float = 0.5, summary_at: float = 0.8, truncate_bytes=4096) -> AttachmentBudget:
+        """
+        开启附件预算：所有 add_* 方法写出的附件计入用例和会话的字节数/数量预算，
+        用量越接近上限写得越少（完整 → 截断 → 摘要 → 只计数）
+        
+        需配合 pytest 插件使用（--allure-budget），由插件在每个用例开始和结束时切换统计对象。
+        
+        Args:
+            test_bytes: 每个用例的附件字节预算（整数或 '50MB' 形式）
+            test_count: 每个用例的附件数量预算
+            session_bytes: 整个会话的附件字节预算
+            session_count: 整个会话的附件数量预算
+            truncate_at: 用量达到预算的该比例后开始截断
+            summary_at: 用量达到预算的该比例后只写摘要
+            truncate_bytes: 截断时保留的字节数
+        
+        Returns:
+            AttachmentBudget 实例，可通过 to_dict() 查看各用例被省略的附件
+        """
+        AllureHandle._budget = AttachmentBudget(test_bytes=test_bytes, test_count=test_count,
+                                                session_bytes=session_bytes, session_count=session_count,
+                                                truncate_at=truncate_at, summary_at=summary_at,
+                                                truncate_bytes=truncate_bytes)
+        return AllureHandle._budget
+    
+    @staticmethod
+    def disable_budget():
+        """关闭附件预算"""
+        AllureHandle._budget = None
+    
+    @staticmethod
+    def enable_consolidated_steps(body_threshold: int = 64 * 1024, inline_limit: int = 256) -> ConsolidatedSteps:
+        """
+        开启合并步骤模式：add_request_to_report / add_response_to_report 的字段作为步骤参数显示，
+        不再为每次调用生成 1～2 个附件文件
+        
+        较长的字段（如请求体、响应体）打包进每个用例一个的「请求/响应包」附件，
+        超过 body_threshold 的才单独写成附件文件。需配合 pytest 插件使用（--allure-consolidate）。
+        
+        Args:
+            body_threshold: 超过该长度的字段单独写成附件文件
+            inline_limit: 不超过该长度的字段直接作为步骤参数
+        
+        Returns:
+            ConsolidatedSteps 实例，可通过 summary() 查看平均每个用例的附件文件数
+        """
+        AllureHandle._consolidated = ConsolidatedSteps(body_threshold=body_threshold, inline_limit=inline_limit)
+        return AllureHandle._consolidated
+    
+    @staticmethod
+    def disable_consolidated_steps():
+        """关闭合并步骤模式"""
+        AllureHandle._consolidated = None
+    
+    @staticmethod
+    def _clear_memo():
+        """编码器或大小策略变化后，已缓存的序列化结果不再有效"""
+        memo = AllureHandle._memo
+        if memo is not None:
+            memo.clear()
+    
+    @staticmethod
+    def enable_latency_stats(max_endpoints: int = 1000) -> LatencyStore:
+        """
+        开启接口延迟统计：add_response_to_report 的响应时间按 (Method, URL 模板) 汇总到固定内存的直方图
+        
+        Args:
+            max_endpoints: 最多统计的接口数，超出后归入 (other)
+        
+        Returns:
+            LatencyStore 实例
+        """
+        AllureHandle._latency = LatencyStore(max_endpoints=max_endpoints)
+        return AllureHandle._latency
+    
+    @staticmethod
+    def disable_latency_stats():
+        """关闭接口延迟统计"""
+        AllureHandle._latency = None
+    
+    @staticmethod
+    def enable_overhead_stats() -> OverheadStats:
+        """
+        开启报告开销统计：按 (用例, 方法) 记录方法耗时、序列化耗时、附件交付耗时、附件数和字节数
+        
+        Returns:
+            OverheadStats 实例，可通过 add_sink 添加自定义输出（如 StatsdSink）
+        """
+        AllureHandle._overhead = OverheadStats()
+        return AllureHandle._overhead
+    
+    @staticmethod
+    def disable_overhead_stats():
+        """关闭报告开销统计"""
+        AllureHandle._overhead = None
+    
+    @staticmethod
+    def enable_log_capture(level: Union[int, str] = logging.INFO, max_bytes: int = 4 * 1024 * 1024,
+                           max_records: int = None, mode: str = 'always') -> AllureLogHandler:
+        """
+        开启用例日志捕获：每个用例的 logging 记录保存在有界环形缓冲区中，用例结束时流式写入附件
+        
+        需配合 pytest 插件使用（--allure-log-capture），由插件在每个用例开始和结束时驱动缓冲区。
+        
+        Args:
+            level: 捕获的最低日志级别，设置在 handler 上（根 logger 级别更高时只在用例执行期间临时调低）
+            max_bytes: 每个用例最多保留的日志字节数，超出后丢弃最早的记录
+            max_records: 每个用例最多保留的日志条数，None 表示不限制
+            mode: always（每个用例都附加）/ failure（只为失败/出错的用例附加）
+        
+        Returns:
+            AllureLogHandler 实例
+        """
+        AllureHandle.disable_log_capture()
+        handler = AllureLogHandler(level=level, max_bytes=max_bytes, max_records=max_records, mode=mode)
+        logging.getLogger().addHandler(handler)
+        AllureHandle._log_handler = handler
+        return handler
+    
+    @staticmethod
+    def disable_log_capture():
+        """关闭用例日志捕获（用例执行中关闭时同时恢复根 logger 的级别）"""
+        handler, AllureHandle._log_handler = AllureHandle._log_handler, None
+        if handler is None:
+            return
+        logging.getLogger().removeHandler(handler)
+        handler.take()
+    
+    @staticmethod
+    def _store(body, entry):
+        """
+        写出已登记附件的内容：先应用大小策略，开启去重时复用内容相同的已有文件
+        
+        流式序列化的 JSON（JsonStream）逐块写入结果目录，不参与去重；开启大小策略时只保留有上限的头尾部分
+        """
+        policy = AllureHandle._policy
+        source = body
+        if isinstance(body, JsonStream):
+            if policy is not None:
+                body, entry = policy.apply_stream(body, entry)
+            if not isinstance(body, bytes):
+                write_entry_stream(body, entry)
+                AllureHandle._finish_truncated(source, entry, rewrite=body is source)
+                return
+        elif policy is not None:
+            body, entry = policy.apply(body, entry)
+        dedup = AllureHandle._dedup
+        if dedup is not None:
+            dedup.store(body, entry)
+        else:
+            write_entry(body, entry)
+        AllureHandle._finish_truncated(source, entry, rewrite=False)
+    
+    @staticmethod
+    def _finish_truncated(body, entry, rewrite: bool = True):
+        """
+        附件预算截断过的内容（TruncatedBytes / BudgetStream）写出后在附件名称后追加标记；
+        流式内容超出剩余预算时重写附件文件，只保留前 keep 字节（经过大小策略处理的内容不重写）
+        """
+        if not getattr(body, 'truncated', False):
+            return
+        entry[2].name += TRUNCATED_LABEL
+        if rewrite and isinstance(body, BudgetStream):
+            clipped = body.clipped()
+            if clipped is not None:
+                write_entry(clipped, entry)
+    
+    @staticmethod
+    def _attach(body, name: str, attachment_type, encode: Callable = None):
+        """
+        所有附件的统一出口
+        
+        Args:
+            body: 附件内容；指定 encode 时为待序列化对象
+            name: 附件名称
+            attachment_type: allure.attachment_type 枚举
+            encode: 序列化函数，后台写入模式下在工作线程中调用
+        """
+        budget = AllureHandle._budget
+        if budget is not None:
+            admitted = budget.admit(body, name, attachment_type, encode)
+            if admitted is None:
+                return
+            body, name, attachment_type, encode = admitted
+        overhead = AllureHandle._overhead
+        if overhead is None:
+            AllureHandle._deliver(body, name, attachment_type, encode)
+            return
+        context = overhead.context()
+        if encode is not None:
+            encode = overhead.timed_encode(encode, context)
+        with overhead.attaching(context, 0 if encode is not None else _size_of(body)):
+            AllureHandle._deliver(body, name, attachment_type, encode)
+    
+    @staticmethod
+    def _deliver(body, name: str, attachment_type, encode: Callable = None):
+        """按当前模式交付附件：失败时捕获 → 后台写入 → 去重/大小策略 → allure.attach"""
+        capture = AllureHandle._capture
+        if capture is not None and capture.hold(body, name, attachment_type, encode=encode):
+            return
+        writer = AllureHandle._writer
+        if writer is not None:
+            writer.submit(body, name, attachment_type, encode=encode)
+            return
+        if encode is not None:
+            body = encode(body)
+        if AllureHandle._dedup is not None or AllureHandle._policy is not None or isinstance(body, JsonStream):
+            entry = reserve_attachment_entry(name, attachment_type)
+            if entry is not None:
+                AllureHandle._store(body, entry)
+            return
+        if getattr(body, 'truncated', False):
+            name += TRUNCATED_LABEL
+        allure.attach(body, name=name, attachment_type=attachment_type)
+    
     @staticmethod
+    def _attach_json(obj, name: str):
+        """序列化对象并作为 JSON 附件添加（每个对象只序列化一次）"""
+        AllureHandle._attach(
+            obj,
+            name=name,
+            attachment_type=allure.attachment_type.JSON,
+            encode=AllureHandle._json_encode()
+        )
+    
+    @staticmethod
+    def _json_encode(stream: bool = True, compact: bool = False) -> Callable:
+        """
+        当前的 JSON 序列化函数（开启大小策略时先截断大数组，开启脱敏时在同一次遍历中脱敏）
+        
+        Args:
+            stream: 估算大小超过 stream_json_threshold 时是否返回 JsonStream（写出附件时逐块序列化）；
+                    需要完整序列化结果的调用方传 False
+            compact: 是否输出紧凑 JSON（脱敏和大小策略与附件相同）
+        """
+        encoder = AllureHandle._compact_encoder if compact else AllureHandle._encoder
+        threshold = AllureHandle.stream_json_threshold
+        if stream and threshold is not None:
+            encode = functools.partial(encoder.encode_large, threshold=threshold)
+        else:
+            encode = encoder.encode
+        redactor = AllureHandle._redactor
+        if redactor is not None:
+            encode = redactor.wrap_encode(encode)
+        policy = AllureHandle._policy
+        if policy is not None:
+            encode = policy.wrap_encode(encode)
+        return encode
+    
+    @staticmethod
+    @_when_active
     def add_request_to_report(method: str, url: str, headers: Dict = None, 
                              params: Dict = None, data: Dict = None, 
                              json_data: Dict = None):
@@ -27,30 +559,40 @@ class AllureHandle:
             data: 表单数据
             json_data: JSON数据
         """
-        with allure.step(f"请求信息: {method} {url}"):
-            request_info = {
-                "Method": method,
-                "URL": url
-            }
-            
-            if headers:
-                request_info["Headers"] = headers
-            if params:
-                request_info["Params"] = params
-            if data:
-                request_info["Data"] = data
-            if json_data:
-                request_info["JSON"] = json_data
-            
-            allure.attach(
-                json.dumps(request_info, indent=2, ensure_ascii=False),
-                name="请求信息",
-                attachment_type=allure.attachment_type.JSON
-            )
+        AllureHandle._last_request.value = (method, url)
+        title = f"请求信息: {method} {AllureHandle._redact_text(url)}"
+        with allure.step(title):
+            request_info = AllureHandle._request_info(method, url, headers, params, data, json_data)
+            consolidated = AllureHandle._consolidated
+            if consolidated is not None:
+                AllureHandle._record_consolidated(consolidated, title, request_info)
+            else:
+                AllureHandle._attach_json(request_info, name="请求信息")
     
     @staticmethod
+    def _request_info(method: str, url: str, headers: Dict = None, params: Dict = None,
+                      data: Dict = None, json_data: Dict = None) -> Dict:
+        """构造请求信息字典（同步和 asyncio API 共用）"""
+        request_info = {
+            "Method": method,
+            "URL": url
+        }
+        
+        if headers:
+            request_info["Headers"] = headers
+        if params:
+            request_info["Params"] = params
+        if data:
+            request_info["Data"] = data
+        if json_data:
+            request_info["JSON"] = json_data
+        return request_info
+    
+    @staticmethod
+    @_when_active
     def add_response_to_report(status_code: int, response_json: Dict = None, 
-                               response_text: str = None, response_time: float = None):
+                               response_text: str = None, response_time: float = None,
+                               method: str = None, url: str = None):
         """
         添加响应信息到 Allure 报告
         
@@ -59,52 +601,254 @@ class AllureHandle:
             response_json: JSON响应
             response_text: 文本响应
             response_time: 响应时间（秒）
+            method: HTTP 方法（延迟统计用，默认取当前线程最近一次 add_request_to_report 的值）
+            url: 请求URL（同上）
         """
-        with allure.step(f"响应信息: {status_code}"):
-            response_info = {
-                "Status Code": status_code,
-            }
-            
-            if response_time:
-                response_info["Response Time"] = f"{response_time:.3f}s"
-            
-            if response_json:
-                response_info["Response Body"] = response_json
-                allure.attach(
-                    json.dumps(response_json, indent=2, ensure_ascii=False),
-                    name="响应内容 (JSON)",
-                    attachment_type=allure.attachment_type.JSON
-                )
-            elif response_text:
-                response_info["Response Body"] = response_text[:500]  # 限制长度
-                allure.attach(
-                    response_text,
-                    name="响应内容 (Text)",
-                    attachment_type=allure.attachment_type.TEXT
-                )
-            
-            allure.attach(
-                json.dumps(response_info, indent=2, ensure_ascii=False),
-                name="响应信息",
-                attachment_type=allure.attachment_type.JSON
-            )
+        if method is None or url is None:
+            last_method, last_url = getattr(AllureHandle._last_request, 'value', (None, None))
+            method, url = method or last_method, url or last_url
+        AllureHandle._record_latency(method, url, response_time)
+        
+        title = f"响应信息: {status_code}"
+        with allure.step(title):
+            consolidated = AllureHandle._consolidated
+            if consolidated is not None:
+                AllureHandle._record_consolidated(consolidated, title, AllureHandle._response_info(
+                    status_code, response_json, response_text, response_time))
+                return
+            for payload, name, attachment_type, encode in AllureHandle._response_parts(
+                    status_code, response_json, response_text, response_time):
+                AllureHandle._attach(payload, name=name, attachment_type=attachment_type, encode=encode)
     
     @staticmethod
+    def _response_info(status_code: int, response_json: Dict = None, response_text: str = None,
+                       response_time: float = None) -> Dict:
+        """构造合并步骤模式下的响应信息字典（同步和 asyncio API 共用）"""
+        response_info = {"Status Code": status_code}
+        if response_time:
+            response_info["Response Time"] = f"{response_time:.3f}s"
+        if response_json:
+            response_info["Response Body"] = response_json
+        elif response_text:
+            response_info["Response Length"] = len(response_text)
+            response_info["Response Body"] = response_text
+        return response_info
+    
+    @staticmethod
+    def _record_consolidated(consolidated: ConsolidatedSteps, title: str, info: Dict):
+        """合并步骤模式：把字段写为当前步骤的参数，超长字段交给 ConsolidatedSteps 打包或单独附加"""
+        step = current_executable()
+        if step is None:
+            return
+        for payload, name, attachment_type, encode in AllureHandle._consolidated_parts(consolidated, step,
+                                                                                      title, info):
+            AllureHandle._attach(payload, name=name, attachment_type=attachment_type, encode=encode)
+    
+    @staticmethod
+    def _consolidated_parts(consolidated: ConsolidatedSteps, step, title: str, info: Dict) -> List[Tuple]:
+        """
+        把字段写为 step 的参数，返回需要单独附加的字段 [(内容, 名称, 附件类型, None), ...]（同步和 asyncio API 共用）
+        
+        对象字段先按附件格式（带缩进）序列化一次，足够短时再改用紧凑格式作为参数值；
+        估算大小超过 stream_json_threshold 的对象与 _attach_json 相同，得到 JsonStream，单独写成附件时才逐块序列化。
+        """
+        encode, compact = AllureHandle._json_encode(), None
+        fields, attachment_types = [], {}
+        for name, value in info.items():
+            if isinstance(value, (dict, list, tuple)):
+                text = encode(value)
+                if not isinstance(text, JsonStream) and len(text) <= consolidated.inline_limit:
+                    compact = compact or AllureHandle._json_encode(stream=False, compact=True)
+                    text = compact(value)
+                attachment_types[name] = allure.attachment_type.JSON
+            elif isinstance(value, (str, bytes)):
+                text = AllureHandle._redact_text(value)
+            else:
+                text = str(value)
+            fields.append((name, text))
+        return [(text, name, attachment_types.get(name, allure.attachment_type.TEXT), None)
+                for name, text in consolidated.record(step, title, fields)]
+    
+    @staticmethod
+    @_when_active
+    def add_consolidated_bundle():
+        """
+        把当前用例的请求/响应包写为一个附件（合并步骤模式下由 pytest 插件在 teardown 时、失败时捕获决定之前调用）
+        """
+        consolidated = AllureHandle._consolidated
+        if consolidated is None:
+            return
+        packed = consolidated.finish()
+        if packed is not None:
+            AllureHandle._attach(packed, name=f"{BUNDLE_NAME} ({len(packed)})",
+                                 attachment_type=allure.attachment_type.TEXT, encode=ConsolidatedSteps.render)
+    
+    @staticmethod
+    @_when_active
+    def count_consolidated_files():
+        """
+        统计当前用例的附件文件数（合并步骤模式下由 pytest 插件在失败时捕获丢弃/写出暂存附件之后调用）
+        """
+        consolidated = AllureHandle._consolidated
+        test_result = current_executable()
+        if consolidated is not None and test_result is not None:
+            consolidated.count_files(test_result)
+    
+    @staticmethod
+    def _record_latency(method: Optional[str], url: Optional[str], response_time: Optional[float]):
+        """开启延迟统计时记录一次响应时间"""
+        latency = AllureHandle._latency
+        if latency is not None and response_time is not None and method and url:
+            latency.record(method, url, response_time)
+    
+    @staticmethod
+    def _response_parts(status_code: int, response_json: Dict = None, response_text: str = None,
+                        response_time: float = None) -> List[Tuple]:
+        """
+        构造响应步骤下的附件（同步和 asyncio API 共用）
+        
+        Returns:
+            [(内容, 名称, 附件类型, 序列化函数), ...]，按报告中的顺序排列
+        """
+        parts = []
+        response_info = {
+            "Status Code": status_code,
+        }
+        
+        if response_time:
+            response_info["Response Time"] = f"{response_time:.3f}s"
+        
+        # 响应体只序列化一次，响应信息中引用附件而不重复内嵌
+        if response_json:
+            response_info["Response Body"] = "见附件: 响应内容 (JSON)"
+            parts.append((response_json, "响应内容 (JSON)", allure.attachment_type.JSON, AllureHandle._json_encode()))
+        elif response_text:
+            response_info["Response Body"] = "见附件: 响应内容 (Text)"
+            response_info["Response Length"] = len(response_text)
+            parts.append((response_text, "响应内容 (Text)", allure.attachment_type.TEXT,
+                          AllureHandle._redactor.redact_text if AllureHandle._redactor is not None else None))
+        
+        parts.append((response_info, "响应信息", allure.attachment_type.JSON, AllureHandle._json_encode()))
+        return parts
+    
+    @staticmethod
+    def batch_recorder(name: str = "批量请求", fmt: str = 'ndjson',
+                       group_by: Optional[Callable[[str], str]] = url_template) -> BatchRecorder:
+        """
+        创建批量请求记录器，适合单个用例中有成百上千次调用的场景
+        
+        记录时只追加到列存缓冲区，退出上下文时整批写入报告：一个步骤、一个明细附件（NDJSON/CSV）
+        和一个 HTML 汇总表，附件数量与调用次数无关。
+        
+        Args:
+            name: 批次名称
+            fmt: 明细附件格式，ndjson / csv
+            group_by: 汇总表把 URL 归一化为接口的函数，默认去掉主机和查询参数、数字/UUID 路径段替换为 {id}；
+                      None 表示按原始 URL 汇总
+        
+        Returns:
+            BatchRecorder 上下文管理器
+        
+        Example:
+            with AllureHandle.batch_recorder("订单接口压测") as batch:
+                for ...:
+                    batch.record('GET', resp.url, 200, response_time=0.012, response_body=resp.content)
+        """
+        return BatchRecorder(name, fmt, on_close=AllureHandle.add_batch_to_report, group_by=group_by)
+    
+    @staticmethod
+    @_when_active
+    def add_batch_to_report(recorder: BatchRecorder):
+        """
+        把批量请求记录器中的数据写入报告（batch_recorder 退出时自动调用）
+        
+        Args:
+            recorder: BatchRecorder 实例
+        """
+        redactor = AllureHandle._redactor
+        redact = redactor.redact_text if redactor is not None else None
+        with allure.step(f"{recorder.name}: {len(recorder)} 次调用"):
+            if recorder.fmt == 'csv':
+                AllureHandle._attach(recorder, name=f"{recorder.name} (CSV)",
+                                     attachment_type=allure.attachment_type.CSV,
+                                     encode=lambda r: r.to_csv(redact))
+            else:
+                encoder = AllureHandle._compact_encoder
+                AllureHandle._attach(recorder, name=f"{recorder.name} (NDJSON)",
+                                     attachment_type=allure.attachment_type.TEXT,
+                                     encode=lambda r: r.to_ndjson(encoder, redact))
+            stylesheet = AllureHandle.description_stylesheet
+            AllureHandle._attach(recorder, name=f"{recorder.name} 汇总",
+                                 attachment_type=allure.attachment_type.HTML,
+                                 encode=lambda r: get_template('batch_summary').render(r.summary(redact), stylesheet))
+    
+    @staticmethod
+    @_when_active
     def add_testdata_to_report(testdata: Dict, name: str = "测试数据"):
         """
         添加测试数据到 Allure 报告
         
         Args:
-            testdata: 测试数据字典
+            testdata: 测试数据字典（可用 allure_handle.memo.frozen() 包装，开启序列化缓存时按对象身份命中）
             name: 附件名称
         """
-        allure.attach(
-            json.dumps(testdata, indent=2, ensure_ascii=False),
-            name=name,
-            attachment_type=allure.attachment_type.JSON
-        )
+        memo = AllureHandle._memo
+        if memo is None:
+            AllureHandle._attach_json(unfreeze(testdata), name=name)
+            return
+        AllureHandle._attach(testdata, name=name, attachment_type=allure.attachment_type.JSON,
+                             encode=AllureHandle._memo_json_encode(memo))
+    
+    @staticmethod
+    def _memo_json_encode(memo: SerializationCache) -> Callable:
+        """带缓存的 JSON 序列化函数；orjson 编码比计算结构指纹更快，此时只缓存 frozen() 数据"""
+        return memo.wrap(AllureHandle._json_encode(), by_content=AllureHandle._encoder.backend != 'orjson')
+    
+    @staticmethod
+    def add_json_diff_to_report(expected, actual, name: str = "JSON 差异",
+                                array_keys: Sequence[str] = DEFAULT_ARRAY_KEYS,
+                                max_changes: int = 500) -> Dict:
+        """
+        比较预期和实际的 JSON 类对象，只把差异写入报告（一个 JSON 附件和一个 HTML 表格），
+        代替用 add_testdata_to_report 附加两份完整数据
+        
+        Allure 未启用时同样比较并返回差异，只是不写入报告，断言不受影响。
+        
+        Args:
+            expected: 预期对象
+            actual: 实际对象
+            name: 步骤和附件名称
+            array_keys: 数组元素（字典）按这些字段匹配，按顺序尝试
+            max_changes: 最多记录的差异数量
+        
+        Returns:
+            差异字典（格式见 allure_handle.jsondiff.JsonDiff.diff）
+        
+        Example:
+            diff = AllureHandle.add_json_diff_to_report(expected, resp.json())
+            assert diff['equal'], f"响应与预期不一致: {diff['counts']}"
+        """
+        diff = JsonDiff(array_keys=array_keys, max_changes=max_changes).diff(expected, actual)
+        active = AllureHandle._active
+        if active is None:
+            active = AllureHandle.refresh_active()
+        if not active:
+            return diff
+        if diff['equal']:
+            with allure.step(f"{name}: 无差异"):
+                pass
+            return diff
+        counts = diff['counts']
+        more = "+" if diff['truncated'] else ""
+        with allure.step(f"{name}: 不同 {counts['changed']}, 多出 {counts['added']}, 缺少 {counts['removed']}, 移动 {counts['moved']}{more}"):
+            AllureHandle._attach_json(diff, name=f"{name} (JSON)")
+            stylesheet = AllureHandle.description_stylesheet
+            AllureHandle._attach(diff, name=name, attachment_type=allure.attachment_type.HTML,
+                                 encode=lambda d: render_html(d, stylesheet))
+        return diff
     
     @staticmethod
+    @_when_active
     def add_case_result_to_report(call, report):
         """
         添加用例结果信息到 Allure 报告
@@ -126,19 +870,17 @@ class AllureHandle:
             if call.excinfo:
                 result_info["异常信息"] = str(call.excinfo)
             
-            allure.attach(
-                json.dumps(result_info, indent=2, ensure_ascii=False),
-                name="用例执行信息",
-                attachment_type=allure.attachment_type.JSON
-            )
+            AllureHandle._attach_json(result_info, name="用例执行信息")
     
     @staticmethod
-    def add_case_description_html(case_data: Dict):
+    @_when_active
+    def add_case_description_html(case_data: Union[Dict, List[Dict]], template: str = 'case'):
         """
         添加用例描述HTML到 Allure 报告
         
         Args:
-            case_data: 用例数据字典，包含以下字段：
+            case_data: 用例数据字典（数据驱动用例可传入字典列表，渲染为多行表格），不会被修改。
+                默认模板包含以下字段：
                 - case_id: 用例ID
                 - case_module: 模块
                 - case_name: 用例名称
@@ -147,78 +889,40 @@ class AllureHandle:
                 - case_step: 测试步骤
                 - case_expect_result: 预期结果
                 - case_result: 测试结果
+            template: 模板名称，默认 'case'，可通过 register_html_template 注册自定义模板
         """
-        # 处理优先级显示
-        priority_map = {1: '低', 2: '中', 3: '高'}
-        case_data['case_priority'] = priority_map.get(
-            case_data.get('case_priority'), 
-            case_data.get('case_priority', '未知')
-        )
+        html_template, stylesheet = get_template(template), AllureHandle.description_stylesheet
+        memo = AllureHandle._memo
+        if memo is None:
+            html = html_template.render(unfreeze(case_data), stylesheet=stylesheet)
+        else:
+            html = memo.encode(case_data, functools.partial(html_template.render, stylesheet=stylesheet),
+                               namespace=('html', html_template, stylesheet))
+        allure.dynamic.description_html(html)
+    
+    @staticmethod
+    def register_html_template(name: str, columns: List[Tuple[str, str]], title: str = "用例详情",
+                               value_maps: Dict[str, Dict] = None,
+                               defaults: Dict[str, str] = None) -> HtmlTemplate:
+        """
+        注册自定义 HTML 描述模板（注册时编译一次，之后按名称复用）
+        
+        Args:
+            name: 模板名称
+            columns: 列定义 [(字段名, 表头), ...]
+            title: 页面标题
+            value_maps: 字段值映射，如 {'case_priority': {1: '低', 2: '中', 3: '高'}}
+            defaults: 字段缺失时的显示值
         
-        desc_html = '''<!doctype html>
-<html lang="zh-CN">
-<head>
-    <meta charset="utf-8">
-    <title>用例详情</title>
-    <style>
-        table {{
-            font-size: 12px;
-            color: #333;
-            width: 100%;
-            border-width: 1px;
-            border-color: #000;
-            border-collapse: collapse;
-        }}
-        th {{
-            font-size: 12px;
-            border-width: 1px;
-            padding: 8px;
-            border-style: solid;
-            border-color: #000;
-            text-align: left;
-            background-color: #b1cfea;
-        }}
-        td {{
-            font-size: 12px;
-            border-width: 1px;
-            padding: 8px;
-            border-style: solid;
-            border-color: #000;
-        }}
-        tr:nth-child(even) {{
-            background-color: #f2f2f2;
-        }}
-    </style>
-</head>
-<body>
-    <table>
-        <tr>
-            <th>ID</th>
-            <th>模块</th>
-            <th>用例名称</th>
-            <th>优先级</th>
-            <th>前置条件</th>
-            <th>测试步骤</th>
-            <th>预期结果</th>
-            <th>测试结果</th>
-        </tr>
-        <tr>
-            <td>{case_id}</td>
-            <td>{case_module}</td>
-            <td>{case_name}</td>
-            <td>{case_priority}</td>
-            <td>{case_setup}</td>
-            <td>{case_step}</td>
-            <td>{case_expect_result}</td>
-            <td>{case_result}</td>
-        </tr>
-    </table>
-</body>
-</html>'''
-        
-        allure.dynamic.description_html(desc_html.format(**case_data))
+        Returns:
+            HtmlTemplate 实例
+        """
+        html_template = HtmlTemplate(columns, title=title, value_maps=value_maps, defaults=defaults)
+        register_template(name, html_template)
+        return html_template
     
     @staticmethod
+    @_when_active
     def add_step_with_attachment(title: str, content: str, attachment_type: str = "TEXT"):
         """
         添加步骤并附加内容到 Allure 报告
@@ -235,21 +939,54 @@ class AllureHandle:
                 "HTML": allure.attachment_type.HTML,
             }
             attach_type = attach_type_map.get(attachment_type.upper(), allure.attachment_type.TEXT)
+            redactor = AllureHandle._redactor
             
-            allure.attach(content, name=title, attachment_type=attach_type)
+            AllureHandle._attach(content, name=title, attachment_type=attach_type,
+                                 encode=redactor.redact_text if redactor is not None else None)
     
     @staticmethod
-    def add_file_to_report(file_path: str, name: str = None):
+    @_when_active
+    def add_file_to_report(file_path: str, name: str = None, strategy: str = 'auto',
+                           tail_bytes: int = None, byte_range: Tuple[int, int] = None) -> Optional[str]:
         """
         添加文件到 Allure 报告
         
+        超过 large_file_threshold 的文件、以及指定了 tail_bytes / byte_range 的文件，
+        直接写入结果目录，不经过 allure.attach.file 的整文件复制。
+        开启失败时捕获时文件照常写出（不参与去重），用例通过时再从报告和结果目录中移除。
+        
         Args:
             file_path: 文件路径
             name: 附件名称（可选）
+            strategy: 大文件写入方式，auto（reflink → copy_file_range → sendfile → 普通复制）/
+                      hardlink（优先硬链接；注意之后对源文件的修改会反映到报告中）
+            tail_bytes: 只附加文件末尾的字节数（起点对齐到行首）
+            byte_range: 只附加 [start, end) 字节范围
+        
+        Returns:
+            实际使用的写入方式：allure / policy / dedup / hardlink / reflink / copy_file_range / sendfile / copy，
+            超出附件预算只写摘要或不写出时为 budget；文件不存在或没有用例上下文时返回 None
         """
         if not os.path.exists(file_path):
-            return
-        
+            return None
+        overhead = AllureHandle._overhead
+        if overhead is None:
+            return AllureHandle._add_file(file_path, name, strategy, tail_bytes, byte_range)
+        with overhead.attaching(overhead.context()) as timer:
+            result = AllureHandle._add_file(file_path, name, strategy, tail_bytes, byte_range)
+            if result is None:
+                timer.context = None
+            else:
+                file_size = os.path.getsize(file_path)
+                timer.size = (min(tail_bytes, file_size) if tail_bytes is not None else
+                              max(0, min(byte_range[1], file_size) - byte_range[0]) if byte_range is not None else
+                              file_size)
+        return result
+    
+    @staticmethod
+    def _add_file(file_path: str, name: Optional[str], strategy: str, tail_bytes: Optional[int],
+                  byte_range: Optional[Tuple[int, int]]) -> Optional[str]:
+        """add_file_to_report 的实现，参数和返回值相同"""
         file_name = name or os.path.basename(file_path)
         
         # 根据文件扩展名确定附件类型
@@ -266,22 +1003,154 @@ class AllureHandle:
         }
         attach_type = attach_type_map.get(ext, allure.attachment_type.TEXT)
         
-        allure.attach.file(file_path, name=file_name, attachment_type=attach_type)
+        offset, length = 0, None
+        if tail_bytes is not None:
+            offset, length = tail_range(file_path, tail_bytes)
+        elif byte_range is not None:
+            offset, length = byte_range[0], byte_range[1] - byte_range[0]
+        partial = length is not None
+        
+        # 预算在文件写出后才计入（暂存的文件在用例失败提交时计入）
+        settle = None
+        budget = AllureHandle._budget
+        if budget is not None:
+            size = length if partial else os.path.getsize(file_path)
+            level, usage, limit = budget.admit_size(attach_type.mime_type, size)
+            if level == DROPPED or level == SUMMARY:
+                budget.note(usage, level, file_name, size)
+                if level == DROPPED:
+                    return 'budget'
+                summary = budget.summary_line(file_name, attach_type.mime_type, size)
+                AllureHandle._deliver(summary, f"{file_name} [预算: 已省略]", allure.attachment_type.TEXT,
+                                      encode=budget.charging(usage))
+                return 'budget'
+            if level == TRUNCATED:
+                settle = functools.partial(budget.settle, usage, TRUNCATED, file_name, limit, size - limit)
+                file_name, length, partial = file_name + TRUNCATED_LABEL, limit, True
+            else:
+                settle = functools.partial(budget.settle, usage, FULL, file_name, size)
+        
+        results_dir = get_results_dir()
+        capture = AllureHandle._capture
+        held = capture is not None and capture.holding and results_dir is not None
+        # 暂存的文件在用例通过时会被删除，不能成为去重的引用目标
+        dedup = None if held else AllureHandle._dedup
+        
+        policy = AllureHandle._policy
+        if policy is not None and not partial:
+            size = os.path.getsize(file_path)
+            if policy.exceeds(attach_type.mime_type, size):
+                # 只读取头尾部分，不复制整个文件
+                entry = reserve_attachment_entry(file_name, attach_type)
+                if entry is None:
+                    return None
+                body, entry = policy.apply_file(file_path, size, entry)
+                if dedup is not None:
+                    dedup.store(body, entry)
+                else:
+                    write_entry(body, entry)
+                AllureHandle._written(results_dir, entry, held, settle)
+                return 'policy'
+        
+        if dedup is not None and not partial:
+            entry = reserve_attachment_entry(file_name, attach_type)
+            if entry is None:
+                return None
+            dedup.store_file(file_path, entry)
+            AllureHandle._written(results_dir, entry, False, settle)
+            return 'dedup'
+        
+        large = os.path.getsize(file_path) >= AllureHandle.large_file_threshold
+        if results_dir is None and partial:
+            # 无法直接写入结果目录时只读取需要的片段，不能退回到整文件附加
+            with open(file_path, 'rb') as f:
+                f.seek(offset)
+                body = f.read(length)
+            allure.attach(body, name=file_name, attachment_type=attach_type)
+            AllureHandle._written(results_dir, None, False, settle)
+            return 'allure'
+        if results_dir is None or not (partial or large or held or strategy != 'auto'):
+            allure.attach.file(file_path, name=file_name, attachment_type=attach_type)
+            AllureHandle._written(results_dir, None, False, settle)
+            return 'allure'
+        
+        entry = reserve_attachment_entry(file_name, attach_type)
+        if entry is None:
+            return None
+        method = copy_file(file_path, str(results_dir / entry[0]), strategy=strategy,
+                           offset=offset, length=length)
+        AllureHandle._written(results_dir, entry, held, settle)
+        return method
+    
+    @staticmethod
+    def _written(results_dir, entry, held: bool, settle: Optional[Callable]):
+        """
+        内容已直接写出：暂存中的附件登记到失败时捕获，预算在用例失败提交时才计入（通过时删除，不占预算）；
+        其他情况立即计入预算
+        """
+        if held and AllureHandle._capture.hold_written(results_dir / entry[0], entry, on_commit=settle):
+            return
+        if settle is not None:
+            settle()
     
     @staticmethod
-    def add_log_to_report(log_content: str, name: str = "日志信息"):
+    @_when_active
+    def add_log_to_report(log_content: Union[str, bytes, Iterable, IO], name: str = "日志信息"):
         """
         添加日志内容到 Allure 报告
         
+        传入迭代器（逐行/逐块产生 str 或 bytes）或已打开的文件对象时，内容边读边写入附件文件，
+        不会在内存中拼接完整字符串；流式内容不经过后台写入器和去重。
+        开启失败时捕获时流式内容照常写出，用例通过时再从报告和结果目录中移除。
+        开启脱敏时按值规则脱敏（流式内容按行处理）。
+        
         Args:
-            log_content: 日志内容
+            log_content: 日志内容，str / bytes / 可迭代对象 / 文件对象
             name: 附件名称
         """
-        allure.attach(
-            log_content,
-            name=name,
-            attachment_type=allure.attachment_type.TEXT
-        )
+        redactor = AllureHandle._redactor
+        if isinstance(log_content, (str, bytes)):
+            AllureHandle._attach(
+                log_content,
+                name=name,
+                attachment_type=allure.attachment_type.TEXT,
+                encode=redactor.redact_text if redactor is not None else None
+            )
+            return
+        budget = AllureHandle._budget
+        if budget is not None:
+            level, usage, limit = budget.admit_size(allure.attachment_type.TEXT.mime_type, None)
+            if level == DROPPED or level == SUMMARY:
+                budget.note(usage, level, name)
+                if level == SUMMARY:
+                    summary = budget.summary_line(name, allure.attachment_type.TEXT.mime_type, None)
+                    AllureHandle._deliver(summary, f"{name} [预算: 已省略]", allure.attachment_type.TEXT,
+                                          encode=budget.charging(usage))
+                return
+        entry = reserve_attachment_entry(name, allure.attachment_type.TEXT)
+        if entry is None:
+            return
+        if hasattr(log_content, 'read'):
+            log_content = iter(functools.partial(log_content.read, _STREAM_CHUNK_SIZE), log_content.read(0))
+        if redactor is not None:
+            log_content = redactor.redact_chunks(log_content)
+        if budget is not None:
+            log_content = budget.clip(log_content, usage, limit)
+        overhead = AllureHandle._overhead
+        if overhead is None:
+            write_entry_stream(log_content, entry)
+        else:
+            with overhead.attaching(overhead.context()) as timer:
+                write_entry_stream(log_content, entry)
+                timer.size = log_content.size if budget is not None else 0
+        settle = None
+        if budget is not None:
+            AllureHandle._finish_truncated(log_content, entry)
+            settle = functools.partial(budget.settle, usage, TRUNCATED if log_content.truncated else FULL, name,
+                                       log_content.written)
+        capture, results_dir = AllureHandle._capture, get_results_dir()
+        held = capture is not None and capture.holding and results_dir is not None
+        AllureHandle._written(results_dir, entry, held, settle)
 
 
 # 创建全局实例，方便使用
@@ -0,0 +1,693 @@
+# -*- coding:UTF-8 -*-
+"""
+结果目录归档
+把 allure-results 流式打包成一个压缩文件，上传 CI 制品时不再受几十万个小文件的单文件开销拖累。
+文件按后缀和名称排序后拼成约 4 MB 的块，每块独立压缩（多线程并行，zlib / lzma 压缩时释放 GIL）；
+块头自带块内文件清单，可以不依赖索引边读边解压（如 curl ... | allure-handle-archive unpack - out/）；
+末尾的索引记录每个文件所在的块和偏移，随机读取单个文件只需解压一个块
+
+文件格式（整数均为小端）：
+    'AHPK' 版本(1B) 压缩算法(1B)
+    块 * N:   'AHBK' 压缩长度(4B) 原始长度(4B) 清单长度(4B) CRC32(4B) 压缩数据
+              原始数据 = 清单 JSON [[名称, 文件内偏移, 长度, 文件大小, mtime_ms], ...] + 各文件片段依次拼接
+    索引:     'AHIX' 压缩长度(4B) 原始长度(4B) 压缩的索引 JSON
+    结尾:     索引偏移(8B) 版本(4B) 'AHND'
+"""
+import argparse
+import fnmatch
+import json
+import lzma
+import os
+import struct
+import sys
+import threading
+import time
+import zlib
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path, PurePosixPath
+from typing import BinaryIO, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from allure_handle.budget import parse_size
+
+VERSION = 1
+MAGIC = b'AHPK'
+BLOCK_MAGIC = b'AHBK'
+INDEX_MAGIC = b'AHIX'
+END_MAGIC = b'AHND'
+DEFAULT_BLOCK_SIZE = 4 * 1024 * 1024
+DEFAULT_LEVEL = 6
+
+_HEADER = struct.Struct('<4sBB')
+_BLOCK = struct.Struct('<4sIIII')
+_INDEX = struct.Struct('<4sII')
+_FOOTER = struct.Struct('<QI4s')
+
+# 压缩算法：名称 -> (编号, 压缩对象工厂(level), 解压函数)
+CODECS = {
+    'zlib': (1, lambda level: zlib.compressobj(level), zlib.decompress),
+    'lzma': (2, lambda level: lzma.LZMACompressor(preset=level), lzma.decompress),
+    'none': (0, None, None),
+}
+_CODEC_NAMES = {number: name for name, (number, _, _) in CODECS.items()}
+
+
+class ArchiveError(ValueError):
+    """归档文件格式错误或已损坏"""
+
+
+# ---------------------------------------------------------------- 打包
+
+
+def _scan(results_dir: Path) -> List[Tuple[str, str, int, int]]:
+    """
+    递归列出结果目录中的文件：[(归档内名称, 路径, 大小, mtime_ms), ...]
+    按类型（allure 文件名中最后一个 '-' 之后的部分，如 result.json、attachment.png）和名称排序：
+    同类内容相邻，压缩比更高，只解出 *-result.json 时涉及的块也最少
+    """
+    files, pending = [], [(results_dir, '')]
+    while pending:
+        directory, prefix = pending.pop()
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    pending.append((entry.path, prefix + entry.name + '/'))
+                elif entry.is_file():
+                    stat = entry.stat()
+                    files.append((prefix + entry.name, entry.path, stat.st_size, stat.st_mtime_ns // 1000000))
+    files.sort(key=lambda item: (item[0].rpartition('/')[2].rpartition('-')[2], item[0]))
+    return files
+
+
+def _plan(files: Sequence[Tuple[str, str, int, int]], block_size: int) -> Iterator[List[Tuple]]:
+    """把文件分组为块：小文件拼在一起，超过 block_size 的文件切成多个片段，每个片段独占一块"""
+    block, used = [], 0
+    for name, path, size, mtime in files:
+        if size > block_size:
+            if block:
+                yield block
+                block, used = [], 0
+            for start in range(0, size, block_size):
+                yield [(name, path, start, min(block_size, size - start), size, mtime)]
+            continue
+        if block and used + size > block_size:
+            yield block
+            block, used = [], 0
+        block.append((name, path, 0, size, size, mtime))
+        used += size
+    if block:
+        yield block
+
+
+def _compress_block(segments: List[Tuple], codec: str, level: int) -> Tuple[List[bytes], List[List], int]:
+    """
+    读取一个块的各文件片段并压缩（在线程池中执行）
+
+    Returns:
+        (块帧的各部分, 块内清单, 文件数据字节数)；扫描后被删除的文件不计入清单
+    """
+    chunks, manifest = [], []
+    for name, path, start, length, size, mtime in segments:
+        try:
+            with open(path, 'rb') as file:
+                if start:
+                    file.seek(start)
+                data = file.read(length)
+        except FileNotFoundError:
+            continue
+        chunks.append(data)
+        manifest.append([name, start, len(data), size, mtime])
+    meta = json.dumps(manifest, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+    raw_len = len(meta) + sum(len(data) for data in chunks)
+    crc = zlib.crc32(meta)
+    for data in chunks:
+        crc = zlib.crc32(data, crc)
+    factory = CODECS[codec][1]
+    if factory is None:
+        payload = [meta] + chunks
+    else:
+        compressor = factory(level)
+        payload = [compressor.compress(meta)] + [compressor.compress(data) for data in chunks] + [compressor.flush()]
+    comp_len = sum(len(part) for part in payload)
+    return [_BLOCK.pack(BLOCK_MAGIC, comp_len, raw_len, len(meta), crc)] + payload, manifest, raw_len - len(meta)
+
+
+def pack_results(results_dir, archive, workers: int = None, level: int = DEFAULT_LEVEL,
+                 block_size: int = DEFAULT_BLOCK_SIZE, codec: str = 'zlib',
+                 progress: Callable[[Dict], None] = None) -> Dict:
+    """
+    把结果目录打包成一个归档文件
+
+    Args:
+        results_dir: allure-results 目录
+        archive: 归档文件路径、'-'（标准输出）或可写的二进制文件对象；写入是纯顺序的，可以直接写入管道
+        workers: 压缩线程数，默认 CPU 数
+        level: 压缩级别（zlib 0-9，lzma 0-9）
+        block_size: 块大小（字节数或 '4MB' 形式），越大压缩比越高、随机读取单个文件越慢
+        codec: 压缩算法 zlib / lzma / none
+        progress: 进度回调，每写出一块调用一次，参数为当前统计
+
+    Returns:
+        统计信息 {files, blocks, bytes_in, bytes_out, ratio, seconds, throughput_mb_s, ...}
+    """
+    if codec not in CODECS:
+        raise ValueError(f"未知的压缩算法: {codec}，可选值: {', '.join(CODECS)}")
+    block_size = parse_size(block_size)
+    if not 0 < block_size <= 1024 ** 3:
+        raise ValueError("block_size 必须在 1B 到 1GB 之间")
+    started = time.perf_counter()
+    files = _scan(Path(results_dir))
+    stats = {"files": 0, "missing": 0, "blocks": 0, "bytes_in": 0, "bytes_out": 0,
+             "scan_seconds": time.perf_counter() - started}
+    workers = workers or os.cpu_count() or 1
+
+    output, close = _open_output(archive)
+    try:
+        output.write(_HEADER.pack(MAGIC, VERSION, CODECS[codec][0]))
+        offset = _HEADER.size
+        blocks, entries = [], {}
+        # 按顺序写出，同时最多有 workers * 2 个块在压缩，内存占用与文件总数无关
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            pending = deque()
+            plan = _plan(files, block_size)
+            for segments in plan:
+                pending.append(pool.submit(_compress_block, segments, codec, level))
+                if len(pending) >= workers * 2:
+                    offset = _write_block(output, pending.popleft().result(), offset, blocks, entries, stats)
+                    if progress is not None:
+                        progress(dict(stats))
+            while pending:
+                offset = _write_block(output, pending.popleft().result(), offset, blocks, entries, stats)
+                if progress is not None:
+                    progress(dict(stats))
+
+        stats["files"] = len(entries)
+        stats["missing"] = len({name for name, _, _, _ in files} - set(entries))
+        index = {
+            "version": VERSION,
+            "codec": codec,
+            "block_size": block_size,
+            "created": time.time(),
+            "blocks": blocks,
+            "files": [[name] + entry for name, entry in entries.items()],
+        }
+        raw = json.dumps(index, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+        packed = zlib.compress(raw, 6)
+        output.write(_INDEX.pack(INDEX_MAGIC, len(packed), len(raw)))
+        output.write(packed)
+        output.write(_FOOTER.pack(offset, VERSION, END_MAGIC))
+        offset += _INDEX.size + len(packed) + _FOOTER.size
+        output.flush()
+    finally:
+        if close:
+            output.close()
+
+    stats["bytes_out"] = offset
+    return _finish_stats(stats, started)
+
+
+def _write_block(output: BinaryIO, result, offset: int, blocks: List, entries: Dict, stats: Dict) -> int:
+    parts, manifest, data_len = result
+    header = _BLOCK.unpack(parts[0])
+    for part in parts:
+        output.write(part)
+    number = len(blocks)
+    blocks.append([offset, header[1], header[2], header[3]])
+    position = 0
+    for name, start, length, size, mtime in manifest:
+        entry = entries.get(name)
+        if entry is None:
+            entry = entries[name] = [size, mtime, []]
+        entry[2].append([number, position, length, start])
+        position += length
+    stats["blocks"] += 1
+    stats["bytes_in"] += data_len
+    return offset + _BLOCK.size + header[1]
+
+
+def _finish_stats(stats: Dict, started: float) -> Dict:
+    stats["seconds"] = time.perf_counter() - started
+    stats["ratio"] = stats["bytes_in"] / stats["bytes_out"] if stats["bytes_out"] else 0.0
+    stats["throughput_mb_s"] = stats["bytes_in"] / 1024 / 1024 / stats["seconds"] if stats["seconds"] else 0.0
+    return stats
+
+
+def _open_output(archive) -> Tuple[BinaryIO, bool]:
+    if archive == '-':
+        return sys.stdout.buffer, False
+    if hasattr(archive, 'write'):
+        return archive, False
+    return open(archive, 'wb', buffering=1024 * 1024), True
+
+
+def _open_input(archive) -> Tuple[BinaryIO, bool]:
+    if archive == '-':
+        return sys.stdin.buffer, False
+    if hasattr(archive, 'read'):
+        return archive, False
+    return open(archive, 'rb', buffering=1024 * 1024), True
+
+
+# ---------------------------------------------------------------- 解包
+
+
+def _decompress(codec: str, header: Tuple, payload: bytes) -> memoryview:
+    """解压一个块并校验，返回原始数据（清单 + 文件片段）"""
+    _, comp_len, raw_len, _, crc = header
+    decompress = CODECS[codec][2]
+    raw = payload if decompress is None else decompress(payload)
+    if len(raw) != raw_len or zlib.crc32(raw) != crc:
+        raise ArchiveError("块数据校验失败，归档文件可能已损坏")
+    return memoryview(raw)
+
+
+def _safe_path(dest: Path, name: str) -> Path:
+    """归档内名称对应的目标路径，拒绝绝对路径和 .. （防止写到目标目录之外）"""
+    path = PurePosixPath(name)
+    if path.is_absolute() or '..' in path.parts or '\\' in name or not path.parts:
+        raise ArchiveError(f"不安全的文件名: {name}")
+    return dest.joinpath(*path.parts)
+
+
+class _Extractor:
+    """把块中的文件片段写入目标目录（多线程调用）"""
+
+    def __init__(self, dest: Path, patterns: Optional[Sequence[str]]):
+        self.dest = dest
+        self.patterns = list(patterns) if patterns else None
+        self.dirs = {dest}
+        self.split: Dict[str, int] = {}  # 分多个片段写入的文件 -> mtime_ms，全部写完后再设置 mtime
+        self.files = 0
+        self.bytes = 0
+        self._lock = threading.Lock()
+
+    def wanted(self, name: str) -> bool:
+        return self.patterns is None or any(fnmatch.fnmatchcase(name, pattern) for pattern in self.patterns)
+
+    def write(self, name: str, data: memoryview, start: int, size: int, mtime: int):
+        path = _safe_path(self.dest, name)
+        parent = path.parent
+        if parent not in self.dirs:
+            parent.mkdir(parents=True, exist_ok=True)
+            with self._lock:
+                self.dirs.add(parent)
+        length = len(data)
+        if start == 0 and length == size:
+            with open(path, 'wb') as file:
+                file.write(data)
+            os.utime(path, ns=(mtime * 1000000, mtime * 1000000))
+            written = 1
+        else:
+            # 片段可能乱序到达：各自按偏移写入，截断到文件大小是幂等的
+            fd = os.open(path, os.O_WRONLY | os.O_CREAT | getattr(os, 'O_BINARY', 0), 0o644)
+            try:
+                os.ftruncate(fd, size)
+                os.lseek(fd, start, os.SEEK_SET)
+                while data:
+                    data = data[os.write(fd, data):]
+            finally:
+                os.close(fd)
+            with self._lock:
+                self.split[str(path)] = mtime
+            written = 1 if start == 0 else 0
+        with self._lock:
+            self.files += written
+            self.bytes += length
+
+    def write_block(self, raw: memoryview, meta_len: int, segments=None):
+        """
+        写出一个块中的文件
+
+        Args:
+            segments: [(名称, 块内偏移, 长度, 文件内偏移, 文件大小, mtime_ms), ...]，None 表示按块内清单写出全部匹配的文件
+        """
+        if segments is None:
+            segments, position = [], meta_len
+            for name, start, length, size, mtime in json.loads(bytes(raw[:meta_len]).decode('utf-8')):
+                segments.append((name, position - meta_len, length, start, size, mtime))
+                position += length
+        for name, position, length, start, size, mtime in segments:
+            if self.wanted(name):
+                offset = meta_len + position
+                self.write(name, raw[offset:offset + length], start, size, mtime)
+
+    def finish(self):
+        for path, mtime in self.split.items():
+            os.utime(path, ns=(mtime * 1000000, mtime * 1000000))
+
+
+def unpack_archive(archive, dest, workers: int = None, patterns: Sequence[str] = None,
+                   progress: Callable[[Dict], None] = None) -> Dict:
+    """
+    流式解包：顺序读取归档（可以是管道或标准输入），边读边并行解压写出，不需要末尾索引
+
+    Args:
+        archive: 归档文件路径、'-'（标准输入）或可读的二进制文件对象
+        dest: 目标目录
+        workers: 解压线程数，默认 CPU 数
+        patterns: 只解出名称匹配这些通配符的文件（如 '*-result.json'），默认全部
+        progress: 进度回调，每读入一块调用一次
+
+    Returns:
+        统计信息 {files, blocks, bytes_in, bytes_out, ratio, seconds, throughput_mb_s}；
+        bytes_in 为读取的归档字节数，bytes_out 为写出的文件字节数，ratio 为 bytes_out / bytes_in
+    """
+    started = time.perf_counter()
+    dest = Path(dest)
+    dest.mkdir(parents=True, exist_ok=True)
+    extractor = _Extractor(dest, patterns)
+    workers = workers or os.cpu_count() or 1
+    stats = {"blocks": 0, "bytes_in": 0}
+
+    source, close = _open_input(archive)
+    try:
+        codec = _read_header(source)
+        stats["bytes_in"] += _HEADER.size
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            pending = deque()
+            while True:
+                magic = _read_exact(source, 4)
+                if magic == INDEX_MAGIC:
+                    break
+                if magic != BLOCK_MAGIC:
+                    raise ArchiveError("无法识别的块，归档文件可能已损坏")
+                header = _BLOCK.unpack(magic + _read_exact(source, _BLOCK.size - 4))
+                payload = _read_exact(source, header[1])
+                pending.append(pool.submit(_unpack_block, extractor, codec, header, payload))
+                stats["blocks"] += 1
+                stats["bytes_in"] += _BLOCK.size + header[1]
+                if len(pending) >= workers * 2:
+                    pending.popleft().result()
+                if progress is not None:
+                    progress(dict(stats))
+            while pending:
+                pending.popleft().result()
+        # 读完剩余的索引和结尾，管道的写端不会因为提前关闭而报错
+        while True:
+            rest = source.read(1024 * 1024)
+            if not rest:
+                break
+            stats["bytes_in"] += len(rest)
+        stats["bytes_in"] += 4
+    finally:
+        if close:
+            source.close()
+    extractor.finish()
+    return _extract_stats(extractor, stats, started)
+
+
+def _unpack_block(extractor: _Extractor, codec: str, header: Tuple, payload: bytes):
+    extractor.write_block(_decompress(codec, header, payload), header[3])
+
+
+def _extract_stats(extractor: _Extractor, stats: Dict, started: float) -> Dict:
+    stats["files"] = extractor.files
+    stats["bytes_out"] = extractor.bytes
+    stats["seconds"] = time.perf_counter() - started
+    stats["ratio"] = stats["bytes_out"] / stats["bytes_in"] if stats["bytes_in"] else 0.0
+    stats["throughput_mb_s"] = stats["bytes_out"] / 1024 / 1024 / stats["seconds"] if stats["seconds"] else 0.0
+    return stats
+
+
+def _read_exact(source: BinaryIO, size: int) -> bytes:
+    data = source.read(size)
+    while len(data) < size:
+        more = source.read(size - len(data))
+        if not more:
+            raise ArchiveError("归档文件不完整")
+        data += more
+    return data
+
+
+def _read_header(source: BinaryIO) -> str:
+    return _parse_header(_read_exact(source, _HEADER.size))
+
+
+def _parse_header(data: bytes) -> str:
+    magic, version, codec = _HEADER.unpack(data)
+    if magic != MAGIC:
+        raise ArchiveError("不是 allure_handle 归档文件")
+    if version > VERSION:
+        raise ArchiveError(f"不支持的归档版本: {version}")
+    if codec not in _CODEC_NAMES:
+        raise ArchiveError(f"不支持的压缩算法编号: {codec}")
+    return _CODEC_NAMES[codec]
+
+
+# ---------------------------------------------------------------- 随机读取
+
+
+class ResultsArchive:
+    """
+    随机读取归档：只读取末尾索引，单个文件只解压它所在的块
+
+    Example:
+        with ResultsArchive("allure-results.ahpk") as archive:
+            names = archive.names("*-result.json")
+            data = archive.read(names[0])
+            archive.extract("out/", patterns=["*-attachment.png"])
+    """
+
+    def __init__(self, path):
+        """
+        Args:
+            path: 归档文件路径（需要可随机读取，管道请使用 unpack_archive）
+        """
+        self.path = Path(path)
+        self._file = open(self.path, 'rb')
+        self._cache: Tuple[int, Optional[memoryview]] = (-1, None)
+        self._lock = threading.Lock()
+        try:
+            self._load_index()
+        except Exception:
+            self._file.close()
+            raise
+
+    def _pread(self, size: int, offset: int) -> bytes:
+        """按偏移读取（多线程共用一个文件对象，os.pread 在 Windows 上不可用）"""
+        with self._lock:
+            self._file.seek(offset)
+            return _read_exact(self._file, size)
+
+    def _load_index(self):
+        size = os.fstat(self._file.fileno()).st_size
+        if size < _HEADER.size + _INDEX.size + _FOOTER.size:
+            raise ArchiveError("归档文件不完整")
+        self.codec = _parse_header(self._pread(_HEADER.size, 0))
+        offset, version, magic = _FOOTER.unpack(self._pread(_FOOTER.size, size - _FOOTER.size))
+        if magic != END_MAGIC:
+            raise ArchiveError("缺少末尾索引，归档文件不完整（可以用 unpack_archive 流式解出已写入的块）")
+        magic, comp_len, raw_len = _INDEX.unpack(self._pread(_INDEX.size, offset))
+        if magic != INDEX_MAGIC:
+            raise ArchiveError("索引位置错误，归档文件可能已损坏")
+        raw = zlib.decompress(self._pread(comp_len, offset + _INDEX.size))
+        if len(raw) != raw_len:
+            raise ArchiveError("索引校验失败，归档文件可能已损坏")
+        index = json.loads(raw.decode('utf-8'))
+        self.version = version
+        self.block_size = index["block_size"]
+        self.created = index.get("created")
+        self._blocks = index["blocks"]
+        self._files = {entry[0]: entry[1:] for entry in index["files"]}
+        self.size = size
+
+    def close(self):
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __len__(self) -> int:
+        return len(self._files)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._files
+
+    def names(self, pattern: str = None) -> List[str]:
+        """归档中的文件名（按打包顺序），可按通配符过滤"""
+        if pattern is None:
+            return list(self._files)
+        return [name for name in self._files if fnmatch.fnmatchcase(name, pattern)]
+
+    def info(self, name: str) -> Dict:
+        """文件信息 {name, size, mtime_ms, blocks}"""
+        size, mtime, segments = self._entry(name)
+        return {"name": name, "size": size, "mtime_ms": mtime, "blocks": sorted({seg[0] for seg in segments})}
+
+    def summary(self) -> Dict:
+        """归档统计：文件数、块数、原始字节数、归档字节数、压缩比"""
+        bytes_in = sum(entry[0] for entry in self._files.values())
+        return {"files": len(self._files), "blocks": len(self._blocks), "codec": self.codec,
+                "block_size": self.block_size, "bytes_in": bytes_in, "bytes_out": self.size,
+                "ratio": bytes_in / self.size if self.size else 0.0}
+
+    def read(self, name: str) -> bytes:
+        """读取单个文件内容"""
+        size, _, segments = self._entry(name)
+        parts = []
+        for number, position, length, _ in sorted(segments, key=lambda segment: segment[3]):
+            raw = self._block(number)
+            offset = self._blocks[number][3] + position
+            parts.append(raw[offset:offset + length])
+        data = b''.join(parts)
+        if len(data) != size:
+            raise ArchiveError(f"文件不完整: {name}")
+        return data
+
+    def extract(self, dest, patterns: Sequence[str] = None, workers: int = None) -> Dict:
+        """
+        解出匹配的文件，只解压涉及的块（多线程并行）
+
+        Args:
+            dest: 目标目录
+            patterns: 文件名通配符列表，默认全部
+            workers: 解压线程数，默认 CPU 数
+
+        Returns:
+            统计信息，含义同 unpack_archive（bytes_in 为读取的压缩块字节数）
+        """
+        started = time.perf_counter()
+        dest = Path(dest)
+        dest.mkdir(parents=True, exist_ok=True)
+        extractor = _Extractor(dest, None)
+        by_block: Dict[int, List[Tuple]] = {}
+        for name, (size, mtime, segments) in self._files.items():
+            if patterns and not any(fnmatch.fnmatchcase(name, pattern) for pattern in patterns):
+                continue
+            for number, position, length, start in segments:
+                by_block.setdefault(number, []).append((name, position, length, start, size, mtime))
+
+        def job(number: int):
+            header = self._block_header(number)
+            payload = self._pread(header[1], self._blocks[number][0] + _BLOCK.size)
+            extractor.write_block(_decompress(self.codec, header, payload), header[3], by_block[number])
+
+        with ThreadPoolExecutor(max_workers=workers or os.cpu_count() or 1) as pool:
+            for _ in pool.map(job, sorted(by_block)):
+                pass
+        extractor.finish()
+        stats = {"blocks": len(by_block),
+                 "bytes_in": sum(_BLOCK.size + self._blocks[number][1] for number in by_block)}
+        return _extract_stats(extractor, stats, started)
+
+    def _entry(self, name: str):
+        entry = self._files.get(name)
+        if entry is None:
+            raise KeyError(name)
+        return entry
+
+    def _block_header(self, number: int) -> Tuple:
+        offset = self._blocks[number][0]
+        header = _BLOCK.unpack(self._pread(_BLOCK.size, offset))
+        if header[0] != BLOCK_MAGIC:
+            raise ArchiveError("块位置错误，归档文件可能已损坏")
+        return header
+
+    def _block(self, number: int) -> memoryview:
+        """解压一个块，缓存最近一块（同一块内的文件连续读取时只解压一次）"""
+        with self._lock:
+            cached_number, cached = self._cache
+            if cached_number == number:
+                return cached
+        header = self._block_header(number)
+        raw = _decompress(self.codec, header, self._pread(header[1], self._blocks[number][0] + _BLOCK.size))
+        with self._lock:
+            self._cache = (number, raw)
+        return raw
+
+
+# ---------------------------------------------------------------- 命令行
+
+
+def _format_stats(action: str, stats: Dict) -> str:
+    return (f"{action}: {stats['files']} 个文件, {stats['blocks']} 个块, "
+            f"{stats['bytes_in'] / 1024 / 1024:.2f} MB -> {stats['bytes_out'] / 1024 / 1024:.2f} MB"
+            f"（压缩比 {stats['ratio']:.2f}）, 用时 {stats['seconds']:.2f}s, "
+            f"吞吐 {stats['throughput_mb_s']:.1f} MB/s")
+
+
+def main(argv: List[str] = None):
+    """命令行入口：allure-handle-archive <command>"""
+    parser = argparse.ArgumentParser(
+        prog='allure-handle-archive',
+        description='把 allure-results 打包成一个带索引的压缩文件，或从中解出全部/部分文件'
+    )
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    pack = commands.add_parser('pack', help='打包结果目录')
+    pack.add_argument('results_dir', help='allure-results 目录')
+    pack.add_argument('archive', help="归档文件路径，'-' 表示写到标准输出")
+    pack.add_argument('--workers', type=int, default=None, help='压缩线程数（默认 CPU 数）')
+    pack.add_argument('--level', type=int, default=DEFAULT_LEVEL, help=f'压缩级别（默认 {DEFAULT_LEVEL}）')
+    pack.add_argument('--block-size', default='4MB', help='块大小（默认 4MB）')
+    pack.add_argument('--codec', choices=list(CODECS), default='zlib', help='压缩算法（默认 zlib）')
+
+    unpack = commands.add_parser('unpack', help='流式解包（可从管道读取）')
+    unpack.add_argument('archive', help="归档文件路径，'-' 表示从标准输入读取")
+    unpack.add_argument('dest', help='目标目录')
+    unpack.add_argument('--workers', type=int, default=None, help='解压线程数（默认 CPU 数）')
+    unpack.add_argument('--pattern', action='append', default=None, help='只解出匹配的文件（可重复）')
+
+    extract = commands.add_parser('extract', help='按索引随机读取，只解压涉及的块')
+    extract.add_argument('archive', help='归档文件路径')
+    extract.add_argument('dest', help='目标目录')
+    extract.add_argument('patterns', nargs='+', help="文件名或通配符，如 '*-result.json'")
+    extract.add_argument('--workers', type=int, default=None, help='解压线程数（默认 CPU 数）')
+
+    listing = commands.add_parser('list', help='列出归档内容')
+    listing.add_argument('archive', help='归档文件路径')
+    listing.add_argument('--pattern', default=None, help='只列出匹配的文件')
+
+    cat = commands.add_parser('cat', help='把单个文件内容写到标准输出')
+    cat.add_argument('archive', help='归档文件路径')
+    cat.add_argument('name', help='归档内的文件名')
+    args = parser.parse_args(argv)
+
+    try:
+        return _run(parser, args)
+    except ArchiveError as error:
+        print(f"错误: {error}", file=sys.stderr)
+        return 1
+
+
+def _run(parser: argparse.ArgumentParser, args: argparse.Namespace) -> int:
+    # 打包到标准输出时，统计信息写到标准错误
+    report = sys.stderr if args.archive == '-' or args.command == 'cat' else sys.stdout
+    if args.command == 'pack':
+        if not os.path.isdir(args.results_dir):
+            parser.error(f"结果目录不存在: {args.results_dir}")
+        stats = pack_results(args.results_dir, args.archive, workers=args.workers, level=args.level,
+                             block_size=args.block_size, codec=args.codec)
+        print(_format_stats("打包完成", stats), file=report)
+        if stats['missing']:
+            print(f"  {stats['missing']} 个文件在打包过程中被删除，已跳过", file=report)
+    elif args.command == 'unpack':
+        stats = unpack_archive(args.archive, args.dest, workers=args.workers, patterns=args.pattern)
+        print(_format_stats("解包完成", stats), file=report)
+    else:
+        with ResultsArchive(args.archive) as archive:
+            if args.command == 'extract':
+                stats = archive.extract(args.dest, patterns=args.patterns, workers=args.workers)
+                print(_format_stats("解出完成", stats), file=report)
+            elif args.command == 'list':
+                for name in archive.names(args.pattern):
+                    info = archive.info(name)
+                    print(f"{info['size']:>12}  {name}")
+                summary = archive.summary()
+                print(f"\n{summary['files']} 个文件, {summary['blocks']} 个块, "
+                      f"{summary['bytes_in'] / 1024 / 1024:.2f} MB -> {summary['bytes_out'] / 1024 / 1024:.2f} MB"
+                      f"（{summary['codec']}, 压缩比 {summary['ratio']:.2f}）")
+            else:
+                try:
+                    data = archive.read(args.name)
+                except KeyError:
+                    parser.error(f"归档中没有该文件: {args.name}")
+                sys.stdout.buffer.write(data)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,207 @@
+# -*- coding:UTF-8 -*-
+"""
+批量请求记录器
+把大量请求/响应记录到追加式列存缓冲区，退出时只生成一个 NDJSON/CSV 附件和一个 HTML 汇总表
+"""
+import csv
+import io
+import time
+from array import array
+from typing import Callable, Dict, List, Optional
+
+from allure_handle.encoder import JsonEncoder
+from allure_handle.latency import url_template
+from allure_handle.policy import _size_of
+from allure_handle.templates import HtmlTemplate, register_template
+
+FORMATS = ('ndjson', 'csv')
+
+COLUMNS = ('offset_ms', 'method', 'url', 'status_code', 'elapsed_ms', 'request_bytes', 'response_bytes', 'error')
+
+SUMMARY_TEMPLATE = HtmlTemplate(
+    columns=[
+        ('method', 'Method'),
+        ('url', '接口'),
+        ('status_code', '状态码'),
+        ('count', '调用次数'),
+        ('avg_ms', '平均耗时 (ms)'),
+        ('max_ms', '最大耗时 (ms)'),
+        ('request_bytes', '请求字节数'),
+        ('response_bytes', '响应字节数'),
+        ('errors', '错误数'),
+    ],
+    title="批量请求汇总",
+)
+register_template('batch_summary', SUMMARY_TEMPLATE)
+
+# 数值列中表示“未知”的值
+_MISSING = -1
+
+
+class BatchRecorder:
+    """
+    批量请求记录器（上下文管理器）
+
+    每次 record 只向各列追加一个值，不序列化、不创建步骤；
+    退出时调用 on_close 把整批数据写入报告，每个批次的附件数量固定为 2。
+    明细保留原始 URL，汇总表按 group_by 归一化后的接口分组。
+    """
+
+    def __init__(self, name: str = "批量请求", fmt: str = 'ndjson', on_close: Optional[Callable] = None,
+                 group_by: Optional[Callable[[str], str]] = url_template):
+        """
+        Args:
+            name: 批次名称
+            fmt: 明细附件格式，ndjson / csv
+            on_close: 退出时的回调 on_close(recorder)
+            group_by: 汇总时把 URL 归一化为接口的函数，默认 url_template（去掉主机和查询参数，
+                      数字/UUID 路径段替换为 {id}）；None 表示按原始 URL 汇总
+        """
+        if fmt not in FORMATS:
+            raise ValueError(f"不支持的格式: {fmt}，可选值: {', '.join(FORMATS)}")
+        self.name = name
+        self.fmt = fmt
+        self._on_close = on_close
+        self.group_by = group_by
+        self._start = time.perf_counter()
+        self._offset = array('d')
+        self._method = []
+        self._url = []
+        self._status = array('i')
+        self._elapsed = array('d')
+        self._request_bytes = array('q')
+        self._response_bytes = array('q')
+        self._error = []
+
+    def __enter__(self) -> 'BatchRecorder':
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        if self._on_close is not None:
+            self._on_close(self)
+
+    def __len__(self):
+        return len(self._method)
+
+    def record(self, method: str, url: str, status_code: int = None, response_time: float = None,
+               request_body=None, response_body=None, request_size: int = None,
+               response_size: int = None, error: str = None):
+        """
+        记录一次调用
+
+        Args:
+            method: HTTP 方法
+            url: 请求URL（汇总时按 group_by 归一化）
+            status_code: 状态码
+            response_time: 响应时间（秒）
+            request_body: 请求体，仅用于计算 str/bytes 的大小，不会被保存
+            response_body: 响应体，仅用于计算 str/bytes 的大小，不会被保存
+            request_size: 请求字节数（已知时优先使用）
+            response_size: 响应字节数（已知时优先使用）
+            error: 错误信息
+        """
+        self._offset.append((time.perf_counter() - self._start) * 1000)
+        self._method.append(method)
+        self._url.append(url)
+        self._status.append(status_code if status_code is not None else 0)
+        self._elapsed.append(response_time * 1000 if response_time is not None else _MISSING)
+        self._request_bytes.append(request_size if request_size is not None else _size_of(request_body, _MISSING))
+        self._response_bytes.append(response_size if response_size is not None else _size_of(response_body, _MISSING))
+        self._error.append(error)
+
+    def _urls(self, redact: Optional[Callable[[str], str]],
+              group_by: Optional[Callable[[str], str]] = None) -> List[str]:
+        """URL 列；指定 group_by 时先归一化，指定 redact 时再脱敏（相同 URL 只处理一次）"""
+        if redact is None and group_by is None:
+            return self._url
+        cache = {}
+        urls = []
+        for url in self._url:
+            mapped = cache.get(url)
+            if mapped is None:
+                mapped = url
+                if isinstance(url, str):
+                    if group_by is not None:
+                        mapped = group_by(url)
+                    if redact is not None:
+                        mapped = redact(mapped)
+                cache[url] = mapped
+            urls.append(mapped)
+        return urls
+
+    def rows(self, redact: Callable[[str], str] = None):
+        """
+        按行迭代已记录的调用，未知的数值为 None
+
+        Args:
+            redact: URL 脱敏函数（如 Redactor.redact_text），默认不处理
+        """
+        for values in zip(self._offset, self._method, self._urls(redact), self._status, self._elapsed,
+                          self._request_bytes, self._response_bytes, self._error):
+            offset, method, url, status, elapsed, req, resp, error = values
+            yield {
+                'offset_ms': round(offset, 3),
+                'method': method,
+                'url': url,
+                'status_code': status or None,
+                'elapsed_ms': round(elapsed, 3) if elapsed != _MISSING else None,
+                'request_bytes': req if req != _MISSING else None,
+                'response_bytes': resp if resp != _MISSING else None,
+                'error': error,
+            }
+
+    def to_ndjson(self, encoder: JsonEncoder = None, redact: Callable[[str], str] = None) -> bytes:
+        """
+        导出为 NDJSON（每行一次调用）
+
+        Args:
+            encoder: JSON 编码器，需为紧凑模式；默认使用 JsonEncoder(compact=True)
+            redact: URL 脱敏函数，默认不处理
+        """
+        encoder = encoder or JsonEncoder(compact=True)
+        lines = []
+        for row in self.rows(redact):
+            line = encoder.encode(row)
+            lines.append(line if isinstance(line, bytes) else line.encode('utf-8'))
+        return b'\n'.join(lines) + b'\n' if lines else b''
+
+    def to_csv(self, redact: Callable[[str], str] = None) -> str:
+        """导出为 CSV，redact 为 URL 脱敏函数"""
+        buffer = io.StringIO()
+        writer = csv.DictWriter(buffer, fieldnames=COLUMNS)
+        writer.writeheader()
+        writer.writerows(self.rows(redact))
+        return buffer.getvalue()
+
+    def summary(self, redact: Callable[[str], str] = None) -> List[Dict]:
+        """按 (method, group_by(url), status_code) 汇总调用次数、耗时和字节数，redact 为 URL 脱敏函数"""
+        groups = {}
+        for method, url, status, elapsed, req, resp, error in zip(
+                self._method, self._urls(redact, self.group_by), self._status, self._elapsed,
+                self._request_bytes, self._response_bytes, self._error):
+            key = (method, url, status)
+            group = groups.get(key)
+            if group is None:
+                group = groups[key] = [0, 0.0, 0, 0.0, 0, 0, 0]
+            group[0] += 1
+            if elapsed != _MISSING:
+                group[1] += elapsed
+                group[2] += 1
+                group[3] = max(group[3], elapsed)
+            group[4] += max(req, 0)
+            group[5] += max(resp, 0)
+            group[6] += 1 if error else 0
+        return [
+            {
+                'method': method,
+                'url': url,
+                'status_code': status or '',
+                'count': count,
+                'avg_ms': f"{total / timed:.3f}" if timed else '',
+                'max_ms': f"{max_ms:.3f}" if timed else '',
+                'request_bytes': req,
+                'response_bytes': resp,
+                'errors': errors,
+            }
+            for (method, url, status), (count, total, timed, max_ms, req, resp, errors) in groups.items()
+        ]
@@ -0,0 +1,403 @@
+# -*- coding:UTF-8 -*-
+"""
+AllureHandle 调用开销基准测试
+离线运行（不需要 pytest 会话），按 方法 × 载荷大小 × 模式 测量每次调用的耗时、内存分配和写入字节数，
+输出 JSON 结果，并可与保存的基线对比、按阈值判定性能回归
+"""
+import argparse
+import copy
+import json
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+from allure_commons import plugin_manager
+from allure_commons.logger import AllureFileLogger
+from allure_commons.model2 import TestResult
+from allure_commons.utils import now, uuid4
+from allure_pytest.listener import AllureListener
+
+from allure_handle.allure_handle import AllureHandle
+from allure_handle.memo import frozen
+from allure_handle.redact import Redactor
+
+# redacted：内置脱敏；scrubbed：对照组，每次调用前深拷贝载荷并原地清洗（调用方自行脱敏的常见写法）；
+# cached：开启序列化缓存，每轮重复附加同一载荷，与 enabled（每次都序列化）对比命中的收益
+MODES = ('enabled', 'disabled', 'buffered', 'redacted', 'scrubbed', 'cached')
+DEFAULT_MODES = ('enabled', 'disabled', 'buffered')
+DEFAULT_SIZES = '1KB,16KB,256KB,4MB,50MB'
+# 回归判定使用的指标
+METRICS = ('wall_us', 'peak_alloc_bytes')
+# 各指标判定回归所需的最小绝对增长，低于该值的变化视为测量噪声（空操作路径的耗时本身只有零点几微秒）
+MIN_DELTA = {'wall_us': 5.0, 'peak_alloc_bytes': 4096}
+
+_UNITS = {'B': 1, 'KB': 1024, 'MB': 1024 * 1024}
+# 每轮调用的总载荷上限，决定小载荷的调用次数
+_ROUND_BYTES = 4 * 1024 * 1024
+_MAX_CALLS = 200
+
+
+def parse_size(value: str) -> int:
+    """解析 1KB / 4MB / 512 这样的大小"""
+    value = value.strip().upper()
+    for unit in ('KB', 'MB', 'B'):
+        if value.endswith(unit):
+            return int(float(value[:-len(unit)]) * _UNITS[unit])
+    return int(value)
+
+
+def format_size(size: int) -> str:
+    for unit in ('MB', 'KB'):
+        if size >= _UNITS[unit] and size % _UNITS[unit] == 0:
+            return f"{size // _UNITS[unit]}{unit}"
+    return f"{size}B"
+
+
+def json_payload(size: int, depth: int = 3, secret: bool = False) -> Dict:
+    """构造序列化后约 size 字节、嵌套 depth 层的 JSON 对象；secret 为 True 时最后一条记录带 access_token 字段"""
+    record = {"id": 0, "name": "benchmark-record", "active": True, "score": 0.5, "tags": ["a", "b", "c"]}
+    count = max(1, size // 100)
+    payload = [dict(record, id=i) for i in range(count)]
+    if secret:
+        payload[-1]["access_token"] = "x" * 40
+    for level in range(max(0, depth - 1)):
+        payload = {"level": level, "data": payload}
+    return payload if isinstance(payload, dict) else {"data": payload}
+
+
+def text_payload(size: int) -> str:
+    """构造约 size 字节的多行文本"""
+    line = "2024-01-01 00:00:00,000 INFO benchmark: the quick brown fox jumps over the lazy dog\n"
+    return (line * (size // len(line) + 1))[:size]
+
+
+class _Payloads:
+    """同一大小的各类载荷只构造一次"""
+
+    def __init__(self, size: int, depth: int, workdir: Path):
+        self.size = size
+        self.json = json_payload(size, depth)
+        self.frozen_json = frozen(self.json)
+        self.secret_json = json_payload(size, depth, secret=True)
+        self.text = text_payload(size)
+        self.rows = [
+            {"case_id": f"TC{i:05d}", "case_module": "基准测试", "case_name": "调用开销", "case_priority": 2,
+             "case_setup": "无", "case_step": "调用方法", "case_expect_result": "成功", "case_result": "通过"}
+            for i in range(max(1, size // 200))
+        ]
+        self.headers = {'Content-Type': 'application/json', 'Authorization': 'Bearer ' + 'x' * 40}
+        self.file = workdir / f"payload-{size}.log"
+        self.file.write_text(self.text, encoding='utf-8')
+
+
+def scrub_in_place(obj, redactor: Redactor):
+    """按 redactor 的字段名和值规则原地清洗对象（scrubbed 对照组使用，需先深拷贝）"""
+    is_dict = isinstance(obj, dict)
+    for key, value in (obj.items() if is_dict else enumerate(obj)):
+        if is_dict and isinstance(key, str) and redactor._secret_key(key):
+            obj[key] = redactor.mask
+        elif isinstance(value, str):
+            obj[key] = redactor.redact_text(value)
+        elif isinstance(value, (dict, list)):
+            scrub_in_place(value, redactor)
+    return obj
+
+
+class _Scrubbed:
+    """scrubbed 模式的载荷：每次取用时深拷贝并清洗"""
+
+    def __init__(self, payloads: _Payloads, redactor: Redactor):
+        self._payloads = payloads
+        self._redactor = redactor
+
+    def __getattr__(self, name):
+        return getattr(self._payloads, name)
+
+    @property
+    def json(self):
+        return scrub_in_place(copy.deepcopy(self._payloads.json), self._redactor)
+
+    @property
+    def secret_json(self):
+        return scrub_in_place(copy.deepcopy(self._payloads.secret_json), self._redactor)
+
+    @property
+    def headers(self):
+        return scrub_in_place(copy.deepcopy(self._payloads.headers), self._redactor)
+
+    @property
+    def text(self):
+        return self._redactor.redact_text(self._payloads.text)
+
+
+# 方法名 -> 根据载荷构造一次调用
+# redacted 模式下：add_request_to_report 的请求头含 Authorization（编码前脱敏，只编码一次）；
+# add_response_to_report[json] 预检未命中；add_response_to_report[secret] 敏感字段在深层（预检命中，遍历后重新编码）
+CASES: Dict[str, Callable[[_Payloads], Callable]] = {
+    'add_request_to_report': lambda p: lambda: AllureHandle.add_request_to_report(
+        'POST', 'https://api.example.com/orders', headers=p.headers, json_data=p.json),
+    'add_response_to_report[json]': lambda p: lambda: AllureHandle.add_response_to_report(
+        200, response_json=p.json, response_time=0.012),
+    'add_response_to_report[secret]': lambda p: lambda: AllureHandle.add_response_to_report(
+        200, response_json=p.secret_json, response_time=0.012),
+    'add_response_to_report[text]': lambda p: lambda: AllureHandle.add_response_to_report(
+        200, response_text=p.text, response_time=0.012),
+    'add_testdata_to_report': lambda p: lambda: AllureHandle.add_testdata_to_report(p.json),
+    'add_testdata_to_report[frozen]': lambda p: lambda: AllureHandle.add_testdata_to_report(p.frozen_json),
+    'add_step_with_attachment': lambda p: lambda: AllureHandle.add_step_with_attachment("基准步骤", p.text),
+    'add_log_to_report': lambda p: lambda: AllureHandle.add_log_to_report(p.text),
+    'add_file_to_report': lambda p: lambda: AllureHandle.add_file_to_report(str(p.file)),
+    'add_case_description_html': lambda p: lambda: AllureHandle.add_case_description_html(p.rows),
+}
+
+
+@contextmanager
+def allure_session(results_dir: Path):
+    """在当前进程中注册 Allure 监听器和文件日志器，模拟 pytest --alluredir 会话"""
+    listener = AllureListener(None)
+    file_logger = AllureFileLogger(str(results_dir))
+    plugin_manager.register(listener)
+    plugin_manager.register(file_logger)
+    AllureHandle.refresh_active()
+    try:
+        yield listener.allure_logger
+    finally:
+        AllureHandle.disable_async_writer()
+        plugin_manager.unregister(plugin=listener)
+        plugin_manager.unregister(plugin=file_logger)
+        AllureHandle._active = None
+
+
+@contextmanager
+def _test_case(reporter):
+    uuid = uuid4()
+    reporter.schedule_test(uuid, TestResult(name="benchmark", uuid=uuid, start=now()))
+    try:
+        yield
+    finally:
+        AllureHandle.flush()
+        reporter.get_test(uuid).stop = now()
+        reporter.close_test(uuid)
+
+
+def _dir_size(path: Path) -> int:
+    with os.scandir(path) as entries:
+        return sum(entry.stat().st_size for entry in entries if entry.is_file())
+
+
+def _set_mode(mode: str):
+    AllureHandle.disable_async_writer()
+    AllureHandle.disable_redaction()
+    AllureHandle.disable_serialization_cache()
+    if mode == 'disabled':
+        AllureHandle._active = False
+        return
+    AllureHandle.refresh_active()
+    if mode == 'buffered':
+        AllureHandle.enable_async_writer()
+    elif mode == 'redacted':
+        AllureHandle.enable_redaction()
+    elif mode == 'cached':
+        AllureHandle.enable_serialization_cache()
+
+
+def measure(call: Callable, reporter, results_dir: Path, size: int, repeat: int = 3) -> Dict:
+    """
+    测量一个调用：耗时取多轮中最快一轮的平均值，内存分配为单次调用的 tracemalloc 峰值
+
+    Returns:
+        {calls, wall_us, wall_us_mean, peak_alloc_bytes, bytes_written}
+    """
+    number = max(1, min(_MAX_CALLS, _ROUND_BYTES // max(1, size)))
+    shutil.rmtree(results_dir, ignore_errors=True)
+    results_dir.mkdir(parents=True)
+    rounds = []
+    for _ in range(repeat):
+        with _test_case(reporter):
+            started = time.perf_counter()
+            for _ in range(number):
+                call()
+            AllureHandle.flush()
+            rounds.append((time.perf_counter() - started) / number)
+    bytes_written = _dir_size(results_dir) / (number * repeat)
+
+    with _test_case(reporter):
+        tracemalloc.start()
+        try:
+            baseline = tracemalloc.get_traced_memory()[0]
+            call()
+            AllureHandle.flush()
+            peak = tracemalloc.get_traced_memory()[1] - baseline
+        finally:
+            tracemalloc.stop()
+    return {
+        'calls': number * repeat,
+        'wall_us': round(min(rounds) * 1e6, 3),
+        'wall_us_mean': round(sum(rounds) / len(rounds) * 1e6, 3),
+        'peak_alloc_bytes': max(0, peak),
+        'bytes_written': int(bytes_written),
+    }
+
+
+def run(sizes: List[int], modes: List[str] = DEFAULT_MODES, methods: List[str] = None, depth: int = 3,
+        repeat: int = 3, progress: Callable[[str], None] = None) -> Dict:
+    """
+    运行基准测试矩阵
+
+    Args:
+        sizes: 载荷大小列表（字节）
+        modes: enabled（同步写入）/ disabled（未启用 Allure）/ buffered（后台写入器）/
+               redacted（内置脱敏）/ scrubbed（深拷贝后清洗再调用，与 redacted 对比）/
+               cached（开启序列化缓存，与 enabled 对比）
+        methods: 要测量的方法，默认 CASES 中的全部
+        depth: JSON 载荷的嵌套层数
+        repeat: 每个组合的测量轮数
+        progress: 进度回调，每完成一个组合调用一次
+
+    Returns:
+        {'meta': {...}, 'results': [{method, size, mode, ...}, ...]}
+    """
+    from allure_handle import __version__
+
+    methods = methods or list(CASES)
+    unknown = [name for name in methods if name not in CASES]
+    if unknown:
+        raise ValueError(f"未知的方法: {', '.join(unknown)}，可选值: {', '.join(CASES)}")
+    results = []
+    workdir = Path(tempfile.mkdtemp(prefix='allure-handle-bench-'))
+    results_dir = workdir / 'results'
+    results_dir.mkdir()
+    try:
+        with allure_session(results_dir) as reporter:
+            for size in sizes:
+                payloads = _Payloads(size, depth, workdir)
+                scrubbed = _Scrubbed(payloads, Redactor())
+                for method in methods:
+                    for mode in modes:
+                        call = CASES[method](scrubbed if mode == 'scrubbed' else payloads)
+                        _set_mode(mode)
+                        row = {'method': method, 'size': size, 'mode': mode}
+                        row.update(measure(call, reporter, results_dir, size, repeat))
+                        results.append(row)
+                        if progress is not None:
+                            progress(_format_row(row))
+                del payloads, scrubbed
+    finally:
+        AllureHandle.disable_redaction()
+        AllureHandle.disable_serialization_cache()
+        shutil.rmtree(workdir, ignore_errors=True)
+    return {
+        'meta': {
+            'version': __version__,
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'encoder': AllureHandle._encoder.backend,
+            'depth': depth,
+            'repeat': repeat,
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        },
+        'results': results,
+    }
+
+
+def _key(row: Dict) -> Tuple:
+    return row['method'], row['size'], row['mode']
+
+
+def compare(current: Dict, baseline: Dict, threshold: float = 0.2,
+            min_delta: Optional[Dict[str, float]] = None) -> List[Dict]:
+    """
+    与基线对比：相对增长超过 threshold 且绝对增长不小于 min_delta 才视为回归
+
+    Args:
+        current: run() 的结果
+        baseline: 之前保存的 run() 结果
+        threshold: 允许的相对增长，0.2 表示超过基线 20% 视为回归
+        min_delta: 各指标的最小绝对增长，覆盖 MIN_DELTA 中的同名项
+
+    Returns:
+        回归列表 [{method, size, mode, metric, baseline, current, ratio}, ...]
+    """
+    floors = dict(MIN_DELTA, **(min_delta or {}))
+    base = {_key(row): row for row in baseline.get('results', [])}
+    regressions = []
+    for row in current['results']:
+        old = base.get(_key(row))
+        if old is None:
+            continue
+        for metric in METRICS:
+            before, after = old.get(metric), row.get(metric)
+            if not before or after is None:
+                continue
+            ratio = after / before
+            if ratio > 1 + threshold and after - before >= floors.get(metric, 0):
+                regressions.append({
+                    'method': row['method'], 'size': row['size'], 'mode': row['mode'],
+                    'metric': metric, 'baseline': before, 'current': after, 'ratio': round(ratio, 3),
+                })
+    return regressions
+
+
+def _format_row(row: Dict) -> str:
+    return (f"{row['method']:<30} {format_size(row['size']):>6} {row['mode']:<9} "
+            f"{row['wall_us']:>12.1f}us {row['peak_alloc_bytes'] / 1024:>10.1f}KB "
+            f"{row['bytes_written'] / 1024:>10.1f}KB")
+
+
+def main(argv=None):
+    """命令行入口：allure-handle-bench"""
+    parser = argparse.ArgumentParser(
+        prog='allure-handle-bench',
+        description='测量 AllureHandle 各方法每次调用的耗时、内存分配和写入字节数'
+    )
+    parser.add_argument('--sizes', default=DEFAULT_SIZES, help=f'载荷大小列表（默认 {DEFAULT_SIZES}）')
+    parser.add_argument('--modes', default=','.join(DEFAULT_MODES),
+                        help=f"模式列表，可选 {','.join(MODES)}（默认 {','.join(DEFAULT_MODES)}）")
+    parser.add_argument('--methods', default=None, help='要测量的方法（逗号分隔），默认全部')
+    parser.add_argument('--depth', type=int, default=3, help='JSON 载荷的嵌套层数（默认 3）')
+    parser.add_argument('--repeat', type=int, default=3, help='每个组合的测量轮数（默认 3）')
+    parser.add_argument('-o', '--output', default=None, help='结果 JSON 输出文件')
+    parser.add_argument('--baseline', default=None, help='基线 JSON 文件，指定时对比并判定回归')
+    parser.add_argument('--threshold', type=float, default=0.2, help='回归阈值（相对增长，默认 0.2）')
+    parser.add_argument('--min-delta-us', type=float, default=MIN_DELTA['wall_us'],
+                        help=f"耗时的最小绝对增长（微秒），低于该值不判定为回归（默认 {MIN_DELTA['wall_us']:g}）")
+    parser.add_argument('--list', action='store_true', help='列出可测量的方法')
+    args = parser.parse_args(argv)
+
+    if args.list:
+        print('\n'.join(CASES))
+        return 0
+    modes = [mode.strip() for mode in args.modes.split(',')]
+    unknown = [mode for mode in modes if mode not in MODES]
+    if unknown:
+        parser.error(f"未知的模式: {', '.join(unknown)}，可选值: {', '.join(MODES)}")
+    methods = [name.strip() for name in args.methods.split(',')] if args.methods else None
+    sizes = [parse_size(size) for size in args.sizes.split(',')]
+
+    print(f"{'method':<30} {'size':>6} {'mode':<9} {'wall/call':>14} {'peak alloc':>12} {'written':>12}")
+    results = run(sizes, modes, methods, depth=args.depth, repeat=args.repeat, progress=print)
+    if args.output:
+        Path(args.output).write_text(json.dumps(results, indent=2, ensure_ascii=False), encoding='utf-8')
+        print(f"结果已保存: {args.output}")
+    if args.baseline:
+        baseline = json.loads(Path(args.baseline).read_text(encoding='utf-8'))
+        regressions = compare(results, baseline, args.threshold, {'wall_us': args.min_delta_us})
+        if regressions:
+            print(f"\n发现 {len(regressions)} 项性能回归（阈值 {args.threshold:.0%}）:")
+            for item in regressions:
+                print(f"  {item['method']} {format_size(item['size'])} {item['mode']} {item['metric']}: "
+                      f"{item['baseline']} -> {item['current']} (x{item['ratio']})")
+            return 1
+        print(f"\n与基线相比没有超过 {args.threshold:.0%} 的回归")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,454 @@
+# -*- coding:UTF-8 -*-
+"""
+附件预算
+按用例和会话限制附件字节数和数量，用量越接近上限写得越少：
+完整内容 → 截断内容 → 只写摘要 → 只计数不写出；每次调用只做常数次计算，会话结束时汇总被省略的附件
+"""
+import json
+import os
+import threading
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+import allure
+
+from allure_handle.encoder import JsonStream
+from allure_handle.policy import _human_size, _is_text, _size_of, sample_bytes
+from allure_handle.templates import HtmlTemplate
+
+# 降级级别，数值越大写得越少
+FULL, TRUNCATED, SUMMARY, DROPPED = range(4)
+LEVEL_NAMES = ('full', 'truncated', 'summary', 'dropped')
+# 没有用例上下文时（会话级 fixture、插件外调用）的记录名称
+SESSION_SCOPE = '(session)'
+# 每个用例最多记录的被降级附件名称数
+MAX_NAMES = 20
+# 被截断的附件名称后追加的标记
+TRUNCATED_LABEL = " [预算: 已截断]"
+# 流式内容被截断时代替其余内容的标记
+_CLIP_MARKER = "\n... 已超出附件预算，其余内容已省略 ...\n".encode('utf-8')
+
+BUDGET_TEMPLATE = HtmlTemplate(
+    columns=[
+        ('test', '用例'),
+        ('truncated', '截断'),
+        ('summary', '只写摘要'),
+        ('dropped', '未写出'),
+        ('bytes_dropped', '省略字节数'),
+        ('names', '附件'),
+    ],
+    title="附件预算",
+)
+
+_UNITS = {'B': 1, 'KB': 1024, 'MB': 1024 ** 2, 'GB': 1024 ** 3}
+
+
+def parse_size(value) -> int:
+    """解析字节数：整数或带 KB / MB / GB 后缀的字符串（如 '50MB'）"""
+    if isinstance(value, int):
+        return value
+    text = str(value).strip().upper()
+    for unit in ('GB', 'MB', 'KB', 'B'):
+        if text.endswith(unit):
+            return int(float(text[:-len(unit)]) * _UNITS[unit])
+    return int(text)
+
+
+class TruncatedBytes(bytes):
+    """写出时被预算截断的内容，写出方据此在附件名称后追加 TRUNCATED_LABEL"""
+
+    truncated = True
+
+
+class BudgetStream(JsonStream):
+    """
+    预算限制下的流式内容（流式 JSON、流式日志）
+
+    迭代时最多产生 limit 字节（含省略标记），同时保留前 keep 字节。超出 limit 时 truncated 为 True；
+    limit 大于 keep 时（完整写出级别下单个附件超出剩余预算）clipped() 返回只保留前 keep 字节的内容，
+    写出方用它重写附件文件，使超大附件与截断级别一样只占 keep 字节，而不是耗尽剩余预算。
+    """
+
+    __slots__ = ('truncated', '_keep', '_limit', '_head', '_on_end')
+
+    def __init__(self, chunks: Iterable, keep: int, limit: Optional[int],
+                 on_end: Optional[Callable[['BudgetStream'], None]] = None):
+        super().__init__(self._clip(chunks))
+        self.truncated = False
+        self._keep = keep
+        self._limit = limit
+        self._head = bytearray()
+        self._on_end = on_end
+
+    def clipped(self) -> Optional[bytes]:
+        """需要重写附件文件时返回只保留开头部分的内容，否则返回 None"""
+        if not self.truncated or self._limit is None or self._limit <= self._keep:
+            return None
+        head = bytes(self._head[:max(0, self._keep - len(_CLIP_MARKER))])
+        return head.decode('utf-8', 'ignore').encode('utf-8') + _CLIP_MARKER
+
+    @property
+    def written(self) -> int:
+        """最终占用的字节数（需要重写时为重写后的大小）"""
+        clipped = self.clipped()
+        return self.size if clipped is None else len(clipped)
+
+    def _clip(self, chunks: Iterable) -> Iterator[bytes]:
+        limit = self._limit
+        cut = None if limit is None else max(0, limit - len(_CLIP_MARKER))
+        written, pending = 0, b''
+        for chunk in chunks:
+            chunk = chunk.encode('utf-8') if isinstance(chunk, str) else bytes(chunk)
+            if len(self._head) < self._keep:
+                self._head += chunk[:self._keep - len(self._head)]
+            if limit is None:
+                yield chunk
+                continue
+            data = pending + chunk if pending else chunk
+            # 先写到给标记留出空间的位置，其余最多暂存标记长度的字节，确定没有超出 limit 后再写出
+            part = data[:max(0, cut - written)]
+            if part:
+                written += len(part)
+                yield part
+            pending = data[len(part):]
+            if written + len(pending) > limit:
+                self.truncated = True
+                yield _CLIP_MARKER
+                break
+        else:
+            if pending:
+                yield pending
+        if self._on_end is not None:
+            self._on_end(self)
+
+
+class _Usage:
+    """一个用例（或会话）的用量和降级记录"""
+
+    __slots__ = ('name', 'bytes', 'count', 'levels', 'bytes_dropped', 'names')
+
+    def __init__(self, name: str):
+        self.name = name
+        self.bytes = 0
+        self.count = 0
+        self.levels = [0, 0, 0, 0]
+        self.bytes_dropped = 0
+        self.names: List[str] = []
+
+    def degraded(self) -> bool:
+        return any(self.levels[TRUNCATED:])
+
+    def to_dict(self) -> Dict:
+        return {
+            'test': self.name,
+            'bytes': self.bytes,
+            'attachments': self.count,
+            **{LEVEL_NAMES[level]: self.levels[level] for level in range(4)},
+            'bytes_dropped': self.bytes_dropped,
+            'names': list(self.names),
+        }
+
+
+class AttachmentBudget:
+    """
+    附件预算
+
+    用量比例取用例字节数、用例附件数、会话字节数、会话附件数中最高的一个：
+    - 低于 truncate_at：完整写出
+    - 低于 summary_at：文本附件只保留前 truncate_bytes 字节（不超过剩余字节预算；二进制附件改为摘要），
+      内容没有超出时照常完整写出
+    - 低于 1：只写一行摘要（名称、类型、原始大小）
+    - 达到 1：不写出，只计数
+
+    会话预算按进程计算（pytest-xdist 下每个 worker 各自计算）；
+    由 pytest 插件在用例开始和结束时调用 begin() / end()。
+    """
+
+    def __init__(self, test_bytes=None, test_count: int = None, session_bytes=None, session_count: int = None,
+                 truncate_at: float = 0.5, summary_at: float = 0.8, truncate_bytes=4096):
+        """
+        Args:
+            test_bytes: 每个用例的附件字节预算（整数或 '50MB' 形式），None 表示不限制
+            test_count: 每个用例的附件数量预算
+            session_bytes: 整个会话的附件字节预算
+            session_count: 整个会话的附件数量预算
+            truncate_at: 用量达到预算的该比例后开始截断
+            summary_at: 用量达到预算的该比例后只写摘要
+            truncate_bytes: 截断时保留的字节数
+        """
+        if not 0 <= truncate_at <= summary_at <= 1:
+            raise ValueError("需要满足 0 <= truncate_at <= summary_at <= 1")
+        # 预算取倒数，用量比例只需乘法；未设置的预算为 0（比例恒为 0）
+        self._inverse = tuple(1.0 / parse_size(limit) if limit else 0.0
+                              for limit in (test_bytes, test_count, session_bytes, session_count))
+        self.limits = {'test_bytes': parse_size(test_bytes) if test_bytes else None, 'test_count': test_count,
+                       'session_bytes': parse_size(session_bytes) if session_bytes else None,
+                       'session_count': session_count}
+        self.truncate_at = truncate_at
+        self.summary_at = summary_at
+        self.truncate_bytes = parse_size(truncate_bytes)
+        self._session = _Usage(SESSION_SCOPE)
+        self._current = self._session
+        self._degraded: Dict[str, _Usage] = {}
+        self._lock = threading.Lock()
+
+    def begin(self, test: str):
+        """开始统计一个新用例"""
+        self._current = _Usage(test)
+
+    def end(self):
+        """结束当前用例，有降级的用例保留到最终报告"""
+        usage, self._current = self._current, self._session
+        if usage is not self._session and usage.degraded():
+            with self._lock:
+                self._degraded[usage.name] = usage
+
+    def level(self) -> Tuple[int, _Usage]:
+        """
+        根据当前用量决定下一个附件的降级级别（常数时间），并计入附件数
+
+        Returns:
+            (级别, 用量记录)，之后写出的字节数通过 charge(usage, size) 计入
+        """
+        usage, session = self._current, self._session
+        test_bytes, test_count, session_bytes, session_count = self._inverse
+        ratio = max(usage.bytes * test_bytes, usage.count * test_count,
+                    session.bytes * session_bytes, session.count * session_count)
+        if ratio >= 1:
+            level = DROPPED
+        elif ratio >= self.summary_at:
+            level = SUMMARY
+        elif ratio >= self.truncate_at:
+            level = TRUNCATED
+        else:
+            level = FULL
+        if level != DROPPED:
+            with self._lock:
+                usage.count += 1
+                if usage is not session:
+                    session.count += 1
+        return level, usage
+
+    def charge(self, usage: _Usage, size: int):
+        """计入实际写出的字节数（后台写入模式下在工作线程中调用）"""
+        with self._lock:
+            usage.bytes += size
+            if usage is not self._session:
+                self._session.bytes += size
+
+    def settle(self, usage: _Usage, level: int, name: str, size: int, dropped_bytes: int = 0):
+        """直接写入结果目录的内容写出后，一次性记录级别并计入字节数（失败时捕获暂存时在提交时调用）"""
+        self.note(usage, level, name, dropped_bytes)
+        self.charge(usage, size)
+
+    def note(self, usage: _Usage, level: int, name: str, dropped_bytes: int = 0):
+        """记录一次降级（同时计入会话合计）"""
+        with self._lock:
+            usage.levels[level] += 1
+            usage.bytes_dropped += dropped_bytes
+            if level != FULL and len(usage.names) < MAX_NAMES:
+                usage.names.append(name)
+            if usage is not self._session:
+                self._session.levels[level] += 1
+                self._session.bytes_dropped += dropped_bytes
+
+    def admit(self, body, name: str, attachment_type, encode: Optional[Callable] = None):
+        """
+        对一个附件应用预算
+
+        降级级别在调用时决定，字节数在返回的 encode 被调用（附件真正写出）时才计入：
+        失败时捕获丢弃的附件不占用预算。
+
+        Args:
+            body: 附件内容；指定 encode 时为待序列化对象
+            name: 附件名称
+            attachment_type: allure.attachment_type 枚举
+            encode: 序列化函数
+
+        Returns:
+            (body, name, attachment_type, encode)；不写出时返回 None。返回的 encode 总是不为 None，
+            调用方必须在写出时调用它
+        """
+        level, usage = self.level()
+        mime_type = attachment_type.mime_type
+        if level == TRUNCATED and not _is_text(mime_type):
+            level = SUMMARY
+        if level == FULL:
+            if encode is not None:
+                return body, name, attachment_type, self._charged(encode, usage, name, _is_text(mime_type))
+            size, remaining = _size_of(body), self._remaining(usage)
+            if remaining is None or size <= remaining:
+                return body, name, attachment_type, self._charged(_unchanged, usage, name, _is_text(mime_type))
+            # 单个附件就超出剩余预算
+            level = TRUNCATED if _is_text(mime_type) else SUMMARY
+        if level == TRUNCATED and self._keep(usage) == 0:
+            level = SUMMARY
+        if level == TRUNCATED:
+            # 是否真的截断在写出时才确定：截断的内容为 TruncatedBytes / BudgetStream，写出方据此追加名称标记
+            if encode is not None:
+                return body, name, attachment_type, lambda payload: self._truncate(encode(payload), usage, name)
+            return body, name, attachment_type, lambda payload: self._truncate(payload, usage, name)
+        if level == SUMMARY:
+            size = _size_of(body) if encode is None else None
+            self.note(usage, SUMMARY, name, size or 0)
+            summary = self.summary_line(name, mime_type, size)
+            return summary, f"{name} [预算: 已省略]", allure.attachment_type.TEXT, self.charging(usage)
+        self.note(usage, DROPPED, name, _size_of(body) if encode is None else 0)
+        return None
+
+    def admit_size(self, mime_type: str, size: Optional[int]) -> Tuple[int, _Usage, Optional[int]]:
+        """
+        对直接写入结果目录的内容（文件、流）决定降级级别，供 add_file_to_report / add_log_to_report 使用
+
+        Args:
+            mime_type: 附件 MIME 类型
+            size: 内容大小，流式内容为 None
+
+        Returns:
+            (级别, 用量记录, 最多写出的字节数)；最多写出的字节数为 None 表示不限制。
+            完整写出时不超过剩余字节预算，超出的部分按截断处理；大小已知且不超过截断长度时按完整写出返回；
+            SUMMARY 时调用方写 summary_line。字节数由调用方写出后通过 settle() 计入
+        """
+        level, usage = self.level()
+        limit = None
+        if level == FULL:
+            limit = self._remaining(usage)
+            if limit is not None and size is not None and size > limit:
+                level = TRUNCATED
+        if level == TRUNCATED:
+            limit = self._keep(usage)
+            if not _is_text(mime_type) or limit == 0:
+                level = SUMMARY
+            elif size is not None and size <= limit:
+                level = FULL
+        return level, usage, limit
+
+    def clip(self, chunks: Iterable, usage: _Usage, limit: Optional[int]) -> BudgetStream:
+        """
+        按 admit_size 返回的上限包装流式内容；写出后用 clipped() 判断是否需要重写、written 计入预算
+
+        Args:
+            chunks: 逐块产生 str 或 bytes 的可迭代对象
+            usage: admit_size 返回的用量记录
+            limit: admit_size 返回的最多写出字节数
+        """
+        return BudgetStream(chunks, self._keep(usage), limit)
+
+    def _remaining(self, usage: _Usage) -> Optional[int]:
+        """当前用例和会话剩余字节预算中较小的一个，均未设置时返回 None"""
+        remaining = [limit - used for limit, used in ((self.limits['test_bytes'], usage.bytes),
+                                                        (self.limits['session_bytes'], self._session.bytes)) if limit]
+        return max(0, min(remaining)) if remaining else None
+
+    def _keep(self, usage: _Usage) -> int:
+        """截断时保留的字节数：truncate_bytes 与剩余字节预算中较小的一个"""
+        remaining = self._remaining(usage)
+        return self.truncate_bytes if remaining is None else min(self.truncate_bytes, remaining)
+
+    def summary_line(self, name: str, mime_type: str, size: Optional[int]) -> str:
+        """超出预算时代替原附件写出的一行摘要"""
+        size_text = _human_size(size) if size is not None else "未序列化"
+        return f"[已省略: {name}, {mime_type}, 原始大小 {size_text}（超出附件预算）]\n"
+
+    def _charged(self, encode: Callable, usage: _Usage, name: str, text: bool) -> Callable:
+        """
+        序列化后计入字节数；单个附件就超出剩余预算时与截断级别一样只保留前 keep 字节
+        （二进制附件照常写出），避免一个超大附件耗尽预算后同一用例的其余附件全部不写出
+        """
+        def wrapper(payload):
+            data = encode(payload)
+            remaining = self._remaining(usage)
+            if isinstance(data, JsonStream):
+                return self._charged_stream(data, usage, name, remaining if text else None)
+            if text and remaining is not None and _size_of(data) > remaining:
+                return self._truncate(data, usage, name)
+            self.note(usage, FULL, name)
+            self.charge(usage, _size_of(data))
+            return data
+        return wrapper
+
+    def charging(self, usage: _Usage) -> Callable:
+        """写出时才计入字节数的 encode（内容已是 str/bytes，原样返回），用于代替原附件写出的摘要"""
+        def wrapper(payload):
+            self.charge(usage, _size_of(payload))
+            return payload
+        return wrapper
+
+    def _charged_stream(self, stream: JsonStream, usage: _Usage, name: str, limit: Optional[int]) -> BudgetStream:
+        """流式序列化的附件边写边计数，超出 limit 的部分不写出；写完后记录级别并计入最终大小"""
+        def settle(clipped: BudgetStream):
+            self.note(usage, TRUNCATED if clipped.truncated else FULL, name)
+            self.charge(usage, clipped.written)
+        return BudgetStream(stream, self._keep(usage), limit, on_end=settle)
+
+    def _truncate(self, data, usage: _Usage, name: str):
+        """写出时按当时的剩余预算截断（省略标记也计入保留长度）；内容没有超出时原样写出，记为完整写出"""
+        keep = self._keep(usage)
+        if isinstance(data, JsonStream):
+            return self._charged_stream(data, usage, name, keep)
+        size = _size_of(data)
+        if size <= keep:
+            self.note(usage, FULL, name)
+            self.charge(usage, size)
+            return data
+        data = data.encode('utf-8') if isinstance(data, str) else bytes(data)
+        marker = len(sample_bytes(b'', b'', size))
+        data = TruncatedBytes(sample_bytes(data[:max(0, keep - marker)], b'', size))
+        self.note(usage, TRUNCATED, name, size - keep)
+        self.charge(usage, len(data))
+        return data
+
+    def summary(self) -> Dict:
+        """会话累计用量和各级别的附件数"""
+        with self._lock:
+            return self._session.to_dict()
+
+    def to_dict(self) -> Dict:
+        """完整报告：预算设置、会话用量、各降级用例的明细（按被省略字节数从多到少）"""
+        with self._lock:
+            tests = sorted((usage.to_dict() for usage in self._degraded.values()),
+                           key=lambda row: (row['bytes_dropped'], row['dropped'], row['summary']), reverse=True)
+            session = self._session.to_dict()
+        return {'limits': self.limits, 'session': session, 'tests': tests}
+
+    def to_html(self, stylesheet: Optional[str] = None) -> str:
+        """渲染为 HTML 表格：每个降级用例一行，首行为会话合计"""
+        report = self.to_dict()
+        rows = [report['session']] + report['tests']
+        for row in rows:
+            row['names'] = ', '.join(row['names'])
+        return BUDGET_TEMPLATE.render(rows, stylesheet=stylesheet)
+
+    def merge(self, data: Dict):
+        """合并另一个进程 to_dict() 的结果（例如其他 xdist worker）"""
+        with self._lock:
+            session = self._session
+            other = data['session']
+            session.bytes += other['bytes']
+            session.count += other['attachments']
+            session.bytes_dropped += other['bytes_dropped']
+            for level in range(4):
+                session.levels[level] += other[LEVEL_NAMES[level]]
+            for row in data['tests']:
+                usage = _Usage(row['test'])
+                usage.bytes, usage.count, usage.bytes_dropped = row['bytes'], row['attachments'], row['bytes_dropped']
+                usage.levels = [row[LEVEL_NAMES[level]] for level in range(4)]
+                usage.names = row['names']
+                self._degraded[usage.name] = usage
+
+    def save(self, path):
+        """保存完整报告（JSON）"""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(path.name + '.tmp')
+        tmp.write_text(json.dumps(self.to_dict(), indent=2, ensure_ascii=False), encoding='utf-8')
+        os.replace(tmp, path)
+
+    @staticmethod
+    def load(path) -> Dict:
+        """加载 save 保存的报告"""
+        return json.loads(Path(path).read_text(encoding='utf-8'))
+
+
+def _unchanged(payload):
+    return payload
@@ -0,0 +1,169 @@
+# -*- coding:UTF-8 -*-
+"""
+失败时捕获
+用例执行期间附件以未序列化对象的形式暂存在内存中，只有用例失败或出错时才写入结果目录
+"""
+import os
+import threading
+from typing import Callable, Dict, List, Optional
+
+from allure_handle._lifecycle import reserve_attachment_entry, write_entry
+
+# 暂存条目中 encode 位置的标记：内容已直接写入结果目录，payload 为文件路径
+_WRITTEN = object()
+
+
+class FailureCapture:
+    """
+    失败时捕获缓冲区
+
+    - 附件元数据在调用时登记（保证步骤内顺序），内容暂存在内存中
+    - 用例失败：按登记顺序序列化并写出（开启后台写入时交给写入器）
+    - 用例通过：从报告中移除已登记的附件，不做任何序列化
+    - 文件附件和流式日志不便暂存在内存中，照常直接写入结果目录后登记（hold_written），
+      用例通过时从报告中移除并删除已写出的文件
+    """
+
+    def __init__(self):
+        self._held = []
+        self._active = False
+        self._lock = threading.Lock()
+        self.stats = {
+            "tests_written": 0,
+            "tests_discarded": 0,
+            "attachments_written": 0,
+            "attachments_discarded": 0,
+        }
+
+    def begin(self):
+        """开始缓冲一个新用例的附件"""
+        with self._lock:
+            self._held = []
+            self._active = True
+
+    @property
+    def holding(self) -> bool:
+        """当前是否处于缓冲状态"""
+        return self._active
+
+    def hold(self, payload, name: str, attachment_type, encode: Optional[Callable] = None,
+             extension: str = None) -> bool:
+        """
+        暂存一个附件
+
+        Args:
+            payload: 附件内容；指定 encode 时为待序列化对象
+            name: 附件名称
+            attachment_type: allure.attachment_type 枚举
+            encode: 序列化函数，仅在用例失败时调用
+            extension: 自定义扩展名
+
+        Returns:
+            是否已接管该附件；未处于缓冲状态时返回 False，由调用方照常写入
+        """
+        if not self._active:
+            return False
+        entry = reserve_attachment_entry(name, attachment_type, extension)
+        if entry is not None:
+            with self._lock:
+                self._held.append((payload, encode, entry))
+        return True
+
+    def hold_entry(self, payload, entry, encode: Optional[Callable] = None) -> bool:
+        """
+        暂存一个已登记的附件（asyncio API 自行登记附件时使用）
+
+        Returns:
+            是否已接管该附件；未处于缓冲状态时返回 False
+        """
+        if not self._active:
+            return False
+        with self._lock:
+            self._held.append((payload, encode, entry))
+        return True
+
+    def hold_written(self, path, entry, on_commit: Optional[Callable] = None) -> bool:
+        """
+        登记一个已直接写入结果目录的附件（文件附件、流式日志）
+
+        Args:
+            path: 已写出的附件文件路径，用例通过时删除
+            entry: reserve_attachment_entry 返回的 (文件名, 所属对象, Attachment)
+            on_commit: 用例失败保留该附件时调用（例如计入附件预算），丢弃时不调用
+
+        Returns:
+            是否已接管该附件；未处于缓冲状态时返回 False
+        """
+        if not self._active:
+            return False
+        with self._lock:
+            self._held.append(((path, on_commit), _WRITTEN, entry))
+        return True
+
+    def commit(self, writer=None, store: Callable = write_entry) -> int:
+        """
+        写出当前用例暂存的全部附件并结束缓冲
+
+        Args:
+            writer: 可选的 AttachmentWriter，指定时异步写出
+            store: 同步写出函数 store(body, entry)
+
+        Returns:
+            写出的附件数量
+        """
+        held = self._take()
+        for payload, encode, entry in held:
+            if encode is _WRITTEN:
+                on_commit = payload[1]
+                if on_commit is not None:
+                    on_commit()
+                continue
+            if writer is not None:
+                writer.enqueue(payload, entry, encode)
+            else:
+                store(encode(payload) if encode else payload, entry)
+        self.stats["tests_written"] += 1
+        self.stats["attachments_written"] += len(held)
+        return len(held)
+
+    def discard(self) -> List[str]:
+        """
+        丢弃当前用例暂存的全部附件，并从报告中移除对应的附件条目
+
+        Returns:
+            被丢弃的附件名称列表
+        """
+        held = self._take()
+        for payload, encode, (_, parent, attachment) in held:
+            parent.attachments.remove(attachment)
+            if encode is _WRITTEN:
+                try:
+                    os.remove(payload[0])
+                except OSError:
+                    pass
+        self.stats["tests_discarded"] += 1
+        self.stats["attachments_discarded"] += len(held)
+        return [attachment.name for _, _, (_, _, attachment) in held]
+
+    def summary(self, outcome: str, names: List[str]) -> Dict:
+        """
+        生成通过用例的附件摘要
+
+        Args:
+            outcome: 用例结果
+            names: 被丢弃的附件名称列表
+        """
+        counts = {}
+        for name in names:
+            counts[name] = counts.get(name, 0) + 1
+        return {
+            "测试结果": outcome,
+            "已省略附件数": len(names),
+            "已省略附件": counts,
+        }
+
+    def _take(self) -> list:
+        with self._lock:
+            held, self._held = self._held, []
+            self._active = False
+        return held
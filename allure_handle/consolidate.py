@@ -0,0 +1,152 @@
+# -*- coding:UTF-8 -*-
+"""
+合并步骤模式
+add_request_to_report / add_response_to_report 的摘要字段作为步骤参数写入结果 JSON，不再生成附件文件；
+较长的内容打包进每个用例一个的「请求/响应包」附件，只有超过阈值的正文才单独写成附件文件
+"""
+import threading
+from typing import Dict, List, Optional, Tuple, Union
+
+from allure_commons.model2 import Parameter
+
+from allure_handle.encoder import JsonStream
+
+BUNDLE_NAME = "请求/响应包"
+
+
+def _text(value: Union[str, bytes]) -> str:
+    return value.decode('utf-8', 'replace') if isinstance(value, (bytes, bytearray)) else value
+
+
+class ConsolidatedSteps:
+    """
+    合并步骤记录器
+
+    每个字段按长度决定去处：
+    - 不超过 inline_limit：直接作为步骤参数显示
+    - 不超过 body_threshold：追加到当前用例的请求/响应包，步骤参数中给出包内编号
+    - 超过 body_threshold（或已是流式序列化结果 JsonStream）：单独写成附件文件，步骤参数中给出附件名称
+
+    由 pytest 插件在用例开始时调用 begin()，teardown 时调用 finish() 取出请求/响应包写入附件；
+    未处于用例中时（如不使用插件）包内内容改为单独写成附件。
+    统计信息可能被多个线程同时更新（后台写入器、asyncio 线程池），统一在锁内修改。
+    """
+
+    def __init__(self, body_threshold: int = 64 * 1024, inline_limit: int = 256):
+        """
+        Args:
+            body_threshold: 超过该长度（字符数/字节数）的内容单独写成附件文件
+            inline_limit: 不超过该长度的内容直接作为步骤参数
+        """
+        if inline_limit > body_threshold:
+            raise ValueError("inline_limit 不能大于 body_threshold")
+        self.body_threshold = body_threshold
+        self.inline_limit = inline_limit
+        self._packed: List[Tuple[str, str, Union[str, bytes]]] = []
+        self._active = False
+        self._lock = threading.Lock()
+        self.stats = {
+            "tests": 0,
+            "steps": 0,
+            "parameters": 0,
+            "packed": 0,
+            "spilled": 0,
+            "bundles": 0,
+            "files": 0,
+            "max_files": 0,
+        }
+
+    def begin(self):
+        """开始记录一个新用例的请求/响应包"""
+        with self._lock:
+            self._packed = []
+            self._active = True
+
+    def record(self, step, title: str, fields: List[Tuple[str, Union[str, bytes]]]) -> List[Tuple]:
+        """
+        把一个请求/响应步骤的字段写入步骤参数，内容较长时改为打包或单独附件
+
+        Args:
+            step: 当前步骤对象（TestStepResult）
+            title: 步骤标题（用于请求/响应包中的分节标题）
+            fields: [(字段名称, 已序列化的内容或 JsonStream), ...]
+
+        Returns:
+            需要由调用方单独写成附件的字段 [(字段名称, 内容), ...]，附件名称即字段名称；
+            JsonStream 原样返回，写出附件时才逐块序列化
+        """
+        spilled, packed = [], 0
+        for name, text in fields:
+            size = None if isinstance(text, JsonStream) else len(text)
+            if size is not None and size <= self.inline_limit:
+                value = _text(text)
+            elif size is None or size > self.body_threshold or not self._active:
+                value = f"见附件: {name}"
+                spilled.append((name, text))
+            else:
+                with self._lock:
+                    self._packed.append((title, name, text))
+                    index = len(self._packed)
+                value = f"见{BUNDLE_NAME} #{index}（{size} 字节）"
+                packed += 1
+            step.parameters.append(Parameter(name=name, value=value))
+        with self._lock:
+            self.stats["steps"] += 1
+            self.stats["parameters"] += len(fields)
+            self.stats["packed"] += packed
+            self.stats["spilled"] += len(spilled)
+        return spilled
+
+    def finish(self) -> Optional[List[Tuple[str, str, Union[str, bytes]]]]:
+        """
+        取出当前用例的请求/响应包并停止打包
+
+        Returns:
+            [(步骤标题, 字段名称, 内容), ...]；没有打包任何内容时返回 None
+        """
+        with self._lock:
+            packed, self._packed = self._packed, []
+            self._active = False
+            self.stats["tests"] += 1
+            if packed:
+                self.stats["bundles"] += 1
+        return packed or None
+
+    @staticmethod
+    def render(packed: List[Tuple[str, str, Union[str, bytes]]]) -> bytes:
+        """把请求/响应包渲染为带编号分节的纯文本"""
+        parts = []
+        for index, (title, name, text) in enumerate(packed, 1):
+            parts.append(f"===== #{index} {title} · {name} =====\n".encode('utf-8'))
+            parts.append(text.encode('utf-8') if isinstance(text, str) else bytes(text))
+            parts.append(b"\n\n")
+        return b''.join(parts)
+
+    def count_files(self, test_result) -> int:
+        """
+        统计用例（含各级步骤）中的附件文件数，计入 files / max_files
+
+        需在失败时捕获决定丢弃/写出暂存附件之后调用，只统计真正写出的附件。
+
+        Args:
+            test_result: 用例对象（TestResult）
+
+        Returns:
+            该用例的附件文件数
+        """
+        files, pending = 0, [test_result]
+        while pending:
+            node = pending.pop()
+            files += len(node.attachments)
+            pending.extend(node.steps)
+        with self._lock:
+            self.stats["files"] += files
+            self.stats["max_files"] = max(self.stats["max_files"], files)
+        return files
+
+    def summary(self) -> Dict:
+        """统计信息，files_per_test 为平均每个用例的附件文件数"""
+        with self._lock:
+            stats = dict(self.stats)
+        stats["files_per_test"] = stats["files"] / stats["tests"] if stats["tests"] else 0.0
+        return stats
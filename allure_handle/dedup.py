@@ -0,0 +1,136 @@
+# -*- coding:UTF-8 -*-
+"""
+附件内容去重
+会话级内容哈希索引：内容相同的附件只写一次，之后的附件直接引用已有文件（或硬链接到已有文件）
+"""
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional
+
+from allure_handle._lifecycle import get_results_dir, write_attachment, write_attachment_file
+from allure_handle.policy import GzippedBytes
+
+MODES = ('reference', 'hardlink')
+
+
+class AttachmentDeduplicator:
+    """
+    附件去重索引
+
+    - 索引键为 (内容摘要, 扩展名)，值为首次写出的附件文件名；gzip 压缩的附件按压缩前的内容计算摘要
+    - 索引按 LRU 淘汰，最多保留 max_entries 条，内存占用有上限
+    - reference 模式：重复附件的 source 直接指向已有文件，不产生新文件
+    - hardlink 模式：为重复附件创建指向已有文件的硬链接，每个附件仍有独立文件名
+    """
+
+    def __init__(self, mode: str = 'reference', max_entries: int = 100000, min_size: int = 512):
+        """
+        Args:
+            mode: 去重方式，reference / hardlink
+            max_entries: 索引最大条目数
+            min_size: 小于该字节数的附件不参与去重
+        """
+        if mode not in MODES:
+            raise ValueError(f"不支持的去重模式: {mode}，可选值: {', '.join(MODES)}")
+        self.mode = mode
+        self.max_entries = max_entries
+        self.min_size = min_size
+        self._index = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {
+            "hits": 0,
+            "misses": 0,
+            "evictions": 0,
+            "bytes_saved": 0,
+        }
+
+    def store(self, body, entry):
+        """
+        写出附件内容，内容重复时复用已有文件
+
+        Args:
+            body: 附件内容（str 或 bytes）
+            entry: reserve_attachment_entry 返回的 (文件名, 所属对象, Attachment)
+        """
+        data = body.encode('utf-8') if isinstance(body, str) else body
+        # 压缩结果不含时间戳，压缩前相同的内容压缩后也相同
+        content = data.raw if isinstance(data, GzippedBytes) else data
+        if len(content) < self.min_size:
+            write_attachment(data, entry[0])
+            return
+        key = (hashlib.blake2b(content, digest_size=16).digest(), _extension(entry[0]))
+        if self._reuse(key, entry, len(data)):
+            return
+        write_attachment(data, entry[0])
+        self._remember(key, entry[0])
+
+    def store_file(self, source: str, entry):
+        """
+        写出文件附件，文件内容重复时复用已有文件
+
+        Args:
+            source: 源文件路径
+            entry: reserve_attachment_entry 返回的 (文件名, 所属对象, Attachment)
+        """
+        size = os.path.getsize(source)
+        if size < self.min_size:
+            write_attachment_file(source, entry[0])
+            return
+        digest = hashlib.blake2b(digest_size=16)
+        with open(source, 'rb') as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b''):
+                digest.update(chunk)
+        key = (digest.digest(), _extension(entry[0]))
+        if self._reuse(key, entry, size):
+            return
+        write_attachment_file(source, entry[0])
+        self._remember(key, entry[0])
+
+    def summary(self) -> Dict:
+        """返回去重统计信息"""
+        with self._lock:
+            return dict(self.stats, entries=len(self._index))
+
+    def _reuse(self, key, entry, size: int) -> bool:
+        with self._lock:
+            existing = self._index.get(key)
+            if existing is None:
+                self.stats["misses"] += 1
+                return False
+            self._index.move_to_end(key)
+        file_name, _, attachment = entry
+        if self.mode == 'hardlink':
+            if not self._link(existing, file_name):
+                with self._lock:
+                    self.stats["misses"] += 1
+                return False
+        else:
+            attachment.source = existing
+        with self._lock:
+            self.stats["hits"] += 1
+            self.stats["bytes_saved"] += size
+        return True
+
+    def _remember(self, key, file_name: str):
+        with self._lock:
+            self._index[key] = file_name
+            if len(self._index) > self.max_entries:
+                self._index.popitem(last=False)
+                self.stats["evictions"] += 1
+
+    @staticmethod
+    def _link(existing: str, file_name: str) -> bool:
+        results_dir = get_results_dir()
+        if results_dir is None:
+            return False
+        try:
+            os.link(results_dir / existing, results_dir / file_name)
+        except OSError:
+            return False
+        return True
+
+
+def _extension(file_name: str) -> Optional[str]:
+    return os.path.splitext(file_name)[1]
@@ -0,0 +1,215 @@
+# -*- coding:UTF-8 -*-
+"""
+JSON 编码层
+统一所有附件的 JSON 序列化，支持紧凑输出和可插拔后端（优先使用已安装的 orjson）；
+超大对象可逐块序列化（JsonStream），内存占用与对象大小无关
+"""
+import itertools
+import json
+from typing import Iterator, Union
+
+try:
+    import orjson
+except ImportError:  # orjson 为可选依赖
+    orjson = None
+
+BACKENDS = ('auto', 'orjson', 'stdlib')
+# 流式序列化时每次写出的块大小，也是一次性序列化的子树大小上限
+STREAM_CHUNK_SIZE = 64 * 1024
+# 估算大小时数组（以及字段很多的对象）只抽样这么多个元素，按长度外推
+_SAMPLES = 3
+_WIDE_DICT = 64
+
+
+def estimate_size(obj) -> int:
+    """
+    估算对象序列化后的字节数（不含缩进）
+
+    对象逐个字段计算，数组只抽样首、中、尾元素按长度外推，开销与数组长度无关；
+    只用于选择序列化方式，估算偏差不影响输出内容。
+    """
+    if isinstance(obj, str):
+        return len(obj) + 2
+    if isinstance(obj, dict):
+        size = len(obj) * 4 + 2
+        if len(obj) <= _WIDE_DICT:
+            for key, value in obj.items():
+                size += estimate_size(key) + estimate_size(value)
+            return size
+        items = itertools.islice(obj.items(), _SAMPLES)
+        sampled = sum(estimate_size(key) + estimate_size(value) for key, value in items)
+        return size + sampled * len(obj) // _SAMPLES
+    if isinstance(obj, (list, tuple)):
+        count = len(obj)
+        if count <= _SAMPLES:
+            return count * 2 + 2 + sum(estimate_size(value) for value in obj)
+        sampled = estimate_size(obj[0]) + estimate_size(obj[count // 2]) + estimate_size(obj[-1])
+        return count * 2 + 2 + sampled * count // _SAMPLES
+    return 8
+
+
+class JsonStream:
+    """
+    流式序列化结果：迭代时逐块产生 UTF-8 bytes，写出附件时才执行序列化
+
+    只能迭代一次；迭代结束后 size 为写出的总字节数。
+    """
+
+    __slots__ = ('_chunks', 'size')
+
+    def __init__(self, chunks: Iterator[bytes]):
+        self._chunks = chunks
+        self.size = 0
+
+    def __iter__(self) -> Iterator[bytes]:
+        for chunk in self._chunks:
+            self.size += len(chunk)
+            yield chunk
+
+
+class JsonEncoder:
+    """
+    JSON 编码器
+
+    - backend='auto' 时优先使用 orjson，未安装则回退到标准库 json
+    - orjson 无法处理的对象（如超大整数）自动回退到标准库
+    - compact=True 时输出无缩进、无多余空格的紧凑 JSON
+    """
+
+    def __init__(self, backend: str = 'auto', compact: bool = False):
+        """
+        Args:
+            backend: 编码后端，可选 auto / orjson / stdlib
+            compact: 是否输出紧凑 JSON
+        """
+        if backend not in BACKENDS:
+            raise ValueError(f"不支持的 JSON 后端: {backend}，可选值: {', '.join(BACKENDS)}")
+        if backend == 'orjson' and orjson is None:
+            raise ImportError("未安装 orjson，请执行: pip install orjson")
+        if backend == 'auto':
+            backend = 'orjson' if orjson is not None else 'stdlib'
+        self.backend = backend
+        self.compact = compact
+        if orjson is not None:
+            self._orjson_option = orjson.OPT_NON_STR_KEYS
+            if not compact:
+                self._orjson_option |= orjson.OPT_INDENT_2
+
+    def encode(self, obj) -> Union[str, bytes]:
+        """
+        序列化对象
+
+        Args:
+            obj: 可 JSON 序列化的对象
+
+        Returns:
+            orjson 后端返回 UTF-8 bytes，标准库后端返回 str
+        """
+        if self.backend == 'orjson':
+            try:
+                return orjson.dumps(obj, option=self._orjson_option)
+            except TypeError:
+                pass
+        if self.compact:
+            return json.dumps(obj, ensure_ascii=False, separators=(',', ':'))
+        return json.dumps(obj, indent=2, ensure_ascii=False)
+
+    def encode_large(self, obj, threshold: int) -> Union[str, bytes, JsonStream]:
+        """
+        估算大小超过 threshold 字节时返回 JsonStream（写出时逐块序列化），否则同 encode
+
+        Args:
+            obj: 可 JSON 序列化的对象
+            threshold: 流式序列化的阈值（字节）
+        """
+        if isinstance(obj, (dict, list, tuple)) and estimate_size(obj) > threshold:
+            return JsonStream(self.iterencode(obj))
+        return self.encode(obj)
+
+    def iterencode(self, obj, chunk_size: int = STREAM_CHUNK_SIZE) -> Iterator[bytes]:
+        """
+        逐块序列化对象，输出与 encode 完全相同
+
+        大容器按估算大小把相邻元素分组，每组约 chunk_size 字节，交给 encode 一次性序列化后
+        去掉外层括号、按层级补齐缩进；单个元素仍然过大时再向下展开。因此仍使用 orjson 等快速后端，
+        内存占用约为 chunk_size 的常数倍。
+
+        Args:
+            obj: 可 JSON 序列化的对象
+            chunk_size: 每次产生的块大小（字节）
+
+        Returns:
+            逐块产生 UTF-8 bytes 的迭代器
+        """
+        pending, size = [], 0
+        for piece in self._pieces(obj, 0, chunk_size):
+            pending.append(piece)
+            size += len(piece)
+            if size >= chunk_size:
+                yield b''.join(pending)
+                pending, size = [], 0
+        if pending:
+            yield b''.join(pending)
+
+    def _pieces(self, obj, level: int, chunk_size: int) -> Iterator[bytes]:
+        is_dict = isinstance(obj, dict)
+        if not (is_dict or isinstance(obj, (list, tuple))) or not obj:
+            yield self._encode_at(obj, level)
+            return
+        size = estimate_size(obj)
+        if size <= chunk_size:
+            yield self._encode_at(obj, level)
+            return
+        per_group = max(1, chunk_size * len(obj) // size)
+        items = iter(obj.items()) if is_dict else iter(obj)
+        closing = (b'' if self.compact else b'\n' + b'  ' * level) + (b'}' if is_dict else b']')
+        yield b'{' if is_dict else b'['
+        first = True
+        while True:
+            group = list(itertools.islice(items, per_group))
+            if not group:
+                break
+            if len(group) > 1 and estimate_size(group) > 2 * chunk_size:
+                # 抽样估算偏小，组内有较大的元素，逐个处理
+                members = [[item] for item in group]
+            else:
+                members = [group]
+            for member in members:
+                if not first:
+                    yield b','
+                first = False
+                yield from self._members(member, is_dict, level, chunk_size)
+        yield closing
+
+    def _members(self, group: list, is_dict: bool, level: int, chunk_size: int) -> Iterator[bytes]:
+        """序列化容器中相邻的若干元素（不含外层括号和首尾分隔符）"""
+        value = group[0][1] if is_dict else group[0]
+        if len(group) == 1 and isinstance(value, (dict, list, tuple)) and estimate_size(value) > chunk_size:
+            if not self.compact:
+                yield b'\n' + b'  ' * (level + 1)
+            if is_dict:
+                yield _encode_key(group[0][0]) + (b':' if self.compact else b': ')
+            yield from self._pieces(value, level + 1, chunk_size)
+            return
+        data = self._encode_at(dict(group) if is_dict else group, level)
+        # 去掉外层括号（非紧凑格式下包括右括号前的换行和缩进）
+        yield data[1:len(data) - 1 - (0 if self.compact else 1 + 2 * level)]
+
+    def _encode_at(self, obj, level: int) -> bytes:
+        """一次性序列化，并把缩进调整到第 level 层"""
+        data = self.encode(obj)
+        data = data.encode('utf-8') if isinstance(data, str) else data
+        if level and not self.compact:
+            # 字符串中的换行已转义为 \n，原始换行只出现在缩进处
+            data = data.replace(b'\n', b'\n' + b'  ' * level)
+        return data
+
+    def __repr__(self):
+        return f"JsonEncoder(backend={self.backend!r}, compact={self.compact!r})"
+
+
+def _encode_key(key) -> bytes:
+    """对象字段名：非字符串键按标准库规则转为字符串（与 orjson OPT_NON_STR_KEYS 一致）"""
+    if not isinstance(key, str):
+        key = json.dumps(key)
+    return json.dumps(key, ensure_ascii=False).encode('utf-8')
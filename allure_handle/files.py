@@ -0,0 +1,139 @@
+# -*- coding:UTF-8 -*-
+"""
+大文件附件
+按 硬链接 / reflink / copy_file_range / sendfile / 普通复制 的顺序选择最快的方式把文件写入结果目录，
+并支持只附加文件末尾或指定字节范围
+"""
+import errno
+import mmap
+import os
+from typing import Optional, Tuple
+
+# Linux ioctl FICLONE，用于 btrfs / xfs 等文件系统的写时复制克隆
+FICLONE = 0x40049409
+# 按行对齐时最多向后查找的字节数
+LINE_ALIGN_WINDOW = 64 * 1024
+# 每次内核复制的最大字节数
+CHUNK_SIZE = 64 * 1024 * 1024
+
+STRATEGIES = ('auto', 'hardlink')
+
+# 这些错误表示当前文件系统/内核不支持该复制方式，可以安全地换下一种方式
+_UNSUPPORTED_ERRNOS = {errno.EXDEV, errno.ENOSYS, errno.EINVAL, errno.EOPNOTSUPP, errno.EPERM, errno.EBADF}
+
+
+def copy_file(source: str, dest: str, strategy: str = 'auto', offset: int = 0,
+              length: Optional[int] = None) -> str:
+    """
+    把源文件（或其中一段）复制到目标路径
+
+    Args:
+        source: 源文件路径
+        dest: 目标文件路径（先写入 dest.tmp 再原子替换）
+        strategy: auto（reflink → copy_file_range → sendfile → 普通复制）/
+                  hardlink（同一文件系统下优先硬链接，失败时按 auto 处理）
+        offset: 起始字节
+        length: 复制的字节数，None 表示到文件末尾
+
+    Returns:
+        实际使用的方式：hardlink / reflink / copy_file_range / sendfile / copy
+    """
+    if strategy not in STRATEGIES:
+        raise ValueError(f"不支持的复制方式: {strategy}，可选值: {', '.join(STRATEGIES)}")
+    whole = offset == 0 and length is None
+    tmp = f"{dest}.tmp"
+    if whole and strategy == 'hardlink':
+        try:
+            os.link(source, tmp)
+            os.replace(tmp, dest)
+            return 'hardlink'
+        except OSError:
+            _remove(tmp)
+    with open(source, 'rb') as src, open(tmp, 'wb') as dst:
+        if whole and _reflink(src, dst):
+            used = 'reflink'
+        else:
+            if length is None:
+                length = os.fstat(src.fileno()).st_size - offset
+            used = _copy_range(src, dst, offset, length)
+    os.replace(tmp, dest)
+    return used
+
+
+def tail_range(source: str, tail_bytes: int, align_lines: bool = True) -> Tuple[int, int]:
+    """
+    计算文件末尾 tail_bytes 字节的范围
+
+    Args:
+        source: 源文件路径
+        tail_bytes: 末尾字节数
+        align_lines: 是否把起点对齐到下一行行首（通过 mmap 在起点附近查找换行符，不读取整个文件）
+
+    Returns:
+        (offset, length)
+    """
+    size = os.path.getsize(source)
+    offset = max(0, size - tail_bytes)
+    if align_lines and 0 < offset < size:
+        with open(source, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            newline = mm.find(b'\n', offset - 1, min(size, offset + LINE_ALIGN_WINDOW))
+            if newline != -1:
+                offset = newline + 1
+    return offset, size - offset
+
+
+def _reflink(src, dst) -> bool:
+    try:
+        import fcntl
+        fcntl.ioctl(dst.fileno(), FICLONE, src.fileno())
+    except (ImportError, OSError):
+        return False
+    return True
+
+
+def _copy_range(src, dst, offset: int, length: int) -> str:
+    src_fd, dst_fd = src.fileno(), dst.fileno()
+    for name, kernel_copy in (('copy_file_range', _copy_file_range), ('sendfile', _sendfile)):
+        try:
+            kernel_copy(src_fd, dst_fd, offset, length)
+            return name
+        except (AttributeError, OSError) as e:
+            if isinstance(e, OSError) and e.errno not in _UNSUPPORTED_ERRNOS:
+                raise
+            os.ftruncate(dst_fd, 0)
+            os.lseek(dst_fd, 0, os.SEEK_SET)
+    src.seek(offset)
+    remaining = length
+    while remaining > 0:
+        chunk = src.read(min(1024 * 1024, remaining))
+        if not chunk:
+            break
+        dst.write(chunk)
+        remaining -= len(chunk)
+    return 'copy'
+
+
+def _copy_file_range(src_fd: int, dst_fd: int, offset: int, length: int):
+    copied = 0
+    while copied < length:
+        n = os.copy_file_range(src_fd, dst_fd, min(CHUNK_SIZE, length - copied), offset + copied)
+        if n == 0:
+            break
+        copied += n
+
+
+def _sendfile(src_fd: int, dst_fd: int, offset: int, length: int):
+    copied = 0
+    while copied < length:
+        n = os.sendfile(dst_fd, src_fd, offset + copied, min(CHUNK_SIZE, length - copied))
+        if n == 0:
+            break
+        copied += n
+
+
+def _remove(path: str):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
@@ -0,0 +1,540 @@
+# -*- coding:UTF-8 -*-
+"""
+历史结果索引
+把多次运行的 *-result.json 增量导入本地 SQLite 数据库（按文件名 + mtime 跳过已导入的文件），
+提供不稳定用例、耗时趋势、变慢用例等历史查询，无需每次重新解析全部结果文件。
+导入时同步维护按 (天, 用例) 汇总的 daily 表，历史查询只扫描汇总行，百万级结果也能在毫秒级返回
+"""
+import argparse
+import json
+import os
+import sqlite3
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from allure_handle.summary import PARALLEL_THRESHOLD, RESULT_SUFFIX
+
+SCHEMA_VERSION = 1
+DAY_MS = 24 * 3600 * 1000
+# 参与通过/失败翻转统计的状态（ok 列：passed=1，failed/broken=0），skipped / unknown 不计入
+OUTCOMES = {'passed': 1, 'failed': 0, 'broken': 0}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY,
+    label TEXT NOT NULL,
+    results_dir TEXT NOT NULL,
+    ingested_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS files (
+    id INTEGER PRIMARY KEY,
+    results_dir TEXT NOT NULL,
+    name TEXT NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    size INTEGER NOT NULL,
+    UNIQUE (results_dir, name)
+);
+CREATE TABLE IF NOT EXISTS tests (
+    id INTEGER PRIMARY KEY,
+    history_id TEXT NOT NULL UNIQUE,
+    name TEXT,
+    full_name TEXT,
+    suite TEXT
+);
+CREATE TABLE IF NOT EXISTS results (
+    id INTEGER PRIMARY KEY,
+    test_id INTEGER NOT NULL REFERENCES tests (id),
+    run_id INTEGER NOT NULL REFERENCES runs (id),
+    file_id INTEGER NOT NULL REFERENCES files (id),
+    uuid TEXT,
+    status TEXT NOT NULL,
+    ok INTEGER,
+    flip INTEGER NOT NULL DEFAULT 0,
+    start INTEGER NOT NULL,
+    duration INTEGER NOT NULL,
+    attachments INTEGER NOT NULL,
+    attachment_bytes INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS attachments (
+    result_id INTEGER NOT NULL REFERENCES results (id),
+    name TEXT,
+    source TEXT,
+    type TEXT,
+    size INTEGER
+);
+CREATE TABLE IF NOT EXISTS daily (
+    day INTEGER NOT NULL,
+    test_id INTEGER NOT NULL,
+    results INTEGER NOT NULL,
+    outcomes INTEGER NOT NULL,
+    passed INTEGER NOT NULL,
+    flips INTEGER NOT NULL,
+    duration_sum INTEGER NOT NULL,
+    duration_min INTEGER NOT NULL,
+    duration_max INTEGER NOT NULL,
+    passed_duration_sum INTEGER NOT NULL,
+    attachments INTEGER NOT NULL,
+    attachment_bytes INTEGER NOT NULL,
+    PRIMARY KEY (day, test_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_results_test_start ON results (test_id, start);
+CREATE INDEX IF NOT EXISTS idx_results_run ON results (run_id);
+CREATE INDEX IF NOT EXISTS idx_results_file ON results (file_id);
+CREATE INDEX IF NOT EXISTS idx_attachments_result ON attachments (result_id);
+CREATE INDEX IF NOT EXISTS idx_daily_test ON daily (test_id, day);
+CREATE INDEX IF NOT EXISTS idx_tests_name ON tests (name);
+"""
+
+# 按脏 (天, 用例) 从 results 重建 daily 汇总行
+REBUILD_DAILY = f"""
+INSERT INTO daily
+SELECT d.day, d.test_id, COUNT(*), SUM(r.ok IS NOT NULL), SUM(r.ok IS 1), SUM(r.flip),
+       SUM(r.duration), MIN(r.duration), MAX(r.duration),
+       SUM(CASE WHEN r.ok IS 1 THEN r.duration ELSE 0 END), SUM(r.attachments), SUM(r.attachment_bytes)
+FROM temp.dirty_days d
+JOIN results r ON r.test_id = d.test_id AND r.start >= d.day * {DAY_MS} AND r.start < (d.day + 1) * {DAY_MS}
+GROUP BY d.day, d.test_id
+"""
+
+
+def parse_result(path: str) -> Optional[Dict]:
+    """
+    解析单个 *-result.json，只保留索引需要的字段
+
+    附件大小取自结果目录中附件文件的实际大小（包括各级步骤中的附件）
+
+    Returns:
+        精简后的记录；文件损坏时返回 None
+    """
+    try:
+        with open(path, 'rb') as f:
+            data = json.loads(f.read())
+    except (OSError, ValueError):
+        return None
+    labels = {label.get('name'): label.get('value') for label in data.get('labels', ())}
+    directory = os.path.dirname(path)
+    attachments = []
+    pending = [data]
+    while pending:
+        node = pending.pop()
+        for attachment in node.get('attachments', ()):
+            source = attachment.get('source')
+            try:
+                size = os.stat(os.path.join(directory, source)).st_size if source else None
+            except OSError:
+                size = None
+            attachments.append((attachment.get('name'), source, attachment.get('type'), size))
+        pending.extend(node.get('steps', ()))
+    start = data.get('start') or 0
+    return {
+        'uuid': data.get('uuid'),
+        'history_id': data.get('historyId') or data.get('fullName') or data.get('uuid'),
+        'name': data.get('name'),
+        'full_name': data.get('fullName'),
+        'suite': labels.get('suite') or labels.get('parentSuite') or '',
+        'status': data.get('status') or 'unknown',
+        'start': start,
+        'duration': max(0, (data.get('stop') or 0) - start),
+        'attachments': attachments,
+    }
+
+
+class ResultIndex:
+    """
+    allure-results 历史索引
+
+    历史查询按天（UTC）汇总，days 参数向下取整到天的边界
+
+    Example:
+        with ResultIndex("allure-history.db") as index:
+            index.ingest("reports/allure_results", run="build-1024")
+            for row in index.flaky(days=7):
+                print(row['name'], row['flip_rate'])
+    """
+
+    def __init__(self, path):
+        self.path = str(path)
+        self.conn = sqlite3.connect(self.path)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        version = self.conn.execute("PRAGMA user_version").fetchone()[0]
+        if version not in (0, SCHEMA_VERSION):
+            raise ValueError(f"不支持的索引版本 {version}，请删除 {self.path} 后重新导入")
+        self.conn.executescript(SCHEMA)
+        self.conn.execute(f"PRAGMA user_version={SCHEMA_VERSION}")
+        self.conn.execute("CREATE TEMP TABLE IF NOT EXISTS dirty_days (day INTEGER, test_id INTEGER, "
+                          "PRIMARY KEY (day, test_id)) WITHOUT ROWID")
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def ingest(self, results_dir, run: str = None, processes: int = None) -> Dict:
+        """
+        增量导入结果目录，文件名和 mtime 均未变化的文件直接跳过；内容变化的文件先删除旧记录再重新导入
+
+        Args:
+            results_dir: allure-results 目录
+            run: 本次导入的运行标识，默认取 executor.json 中的 buildName，没有时使用目录名
+            processes: 解析进程数，默认为 CPU 数；文件较少时在当前进程中解析
+
+        Returns:
+            统计信息：files / parsed / skipped / results / run_id / elapsed_seconds
+        """
+        started = time.perf_counter()
+        results_dir = Path(results_dir).resolve()
+        directory = str(results_dir)
+        known = {row['name']: row for row in self.conn.execute(
+            "SELECT id, name, mtime_ns, size FROM files WHERE results_dir = ?", (directory,))}
+        pending = []
+        files = 0
+        with os.scandir(results_dir) as entries:
+            for entry in entries:
+                if not entry.name.endswith(RESULT_SUFFIX):
+                    continue
+                files += 1
+                stat = entry.stat()
+                row = known.get(entry.name)
+                if row is None or row['mtime_ns'] != stat.st_mtime_ns or row['size'] != stat.st_size:
+                    pending.append((entry.name, entry.path, stat))
+
+        stats = {'files': files, 'parsed': len(pending), 'skipped': files - len(pending),
+                 'results': 0, 'run_id': None}
+        if pending:
+            paths = [path for _, path, _ in pending]
+            if len(paths) >= PARALLEL_THRESHOLD and processes != 1:
+                processes = processes or os.cpu_count() or 1
+                chunksize = max(1, len(paths) // (processes * 4))
+                with ProcessPoolExecutor(max_workers=processes) as pool:
+                    parsed = list(pool.map(parse_result, paths, chunksize=chunksize))
+            else:
+                parsed = [parse_result(path) for path in paths]
+            # test_id -> 需要重新计算翻转的最早开始时间；(天, test_id) -> 需要重建的 daily 行
+            dirty_from, dirty_days = {}, set()
+            with self.conn:
+                stats['run_id'] = self.conn.execute(
+                    "INSERT INTO runs (label, results_dir, ingested_at) VALUES (?, ?, ?)",
+                    (run or _run_label(results_dir), directory, time.time())).lastrowid
+                for (name, _, stat), record in zip(pending, parsed):
+                    row = known.get(name)
+                    if row is None:
+                        file_id = self.conn.execute(
+                            "INSERT INTO files (results_dir, name, mtime_ns, size) VALUES (?, ?, ?, ?)",
+                            (directory, name, stat.st_mtime_ns, stat.st_size)).lastrowid
+                    else:
+                        file_id = row['id']
+                        self._delete_file_results(file_id, dirty_from, dirty_days)
+                        self.conn.execute("UPDATE files SET mtime_ns = ?, size = ? WHERE id = ?",
+                                          (stat.st_mtime_ns, stat.st_size, file_id))
+                    if record is not None:
+                        test_id = self._insert_result(stats['run_id'], file_id, record)
+                        _mark(dirty_from, dirty_days, test_id, record['start'])
+                        stats['results'] += 1
+                for test_id, since in dirty_from.items():
+                    self._refresh_flips(test_id, since, dirty_days)
+                self._rebuild_daily(dirty_days)
+        stats['elapsed_seconds'] = time.perf_counter() - started
+        return stats
+
+    def _delete_file_results(self, file_id: int, dirty_from: Dict, dirty_days: set):
+        for row in self.conn.execute("SELECT test_id, start FROM results WHERE file_id = ?", (file_id,)):
+            _mark(dirty_from, dirty_days, row['test_id'], row['start'])
+        self.conn.execute("DELETE FROM attachments WHERE result_id IN (SELECT id FROM results WHERE file_id = ?)",
+                          (file_id,))
+        self.conn.execute("DELETE FROM results WHERE file_id = ?", (file_id,))
+
+    def _insert_result(self, run_id: int, file_id: int, record: Dict) -> int:
+        self.conn.execute(
+            "INSERT INTO tests (history_id, name, full_name, suite) VALUES (?, ?, ?, ?) "
+            "ON CONFLICT (history_id) DO UPDATE SET name = excluded.name, full_name = excluded.full_name, "
+            "suite = excluded.suite",
+            (record['history_id'], record['name'], record['full_name'], record['suite']))
+        test_id = self.conn.execute("SELECT id FROM tests WHERE history_id = ?",
+                                    (record['history_id'],)).fetchone()[0]
+        attachments = record['attachments']
+        result_id = self.conn.execute(
+            "INSERT INTO results (test_id, run_id, file_id, uuid, status, ok, start, duration, attachments, "
+            "attachment_bytes) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (test_id, run_id, file_id, record['uuid'], record['status'], OUTCOMES.get(record['status']),
+             record['start'], record['duration'], len(attachments),
+             sum(size for *_, size in attachments if size))).lastrowid
+        if attachments:
+            self.conn.executemany(
+                "INSERT INTO attachments (result_id, name, source, type, size) VALUES (?, ?, ?, ?, ?)",
+                [(result_id,) + tuple(attachment) for attachment in attachments])
+        return test_id
+
+    def _refresh_flips(self, test_id: int, since: int, dirty_days: set):
+        """从 since 之前最近的一次结果开始，按开始时间重新计算该用例各结果是否发生了通过/失败翻转"""
+        rows = self.conn.execute("""
+            SELECT id, ok, flip, start FROM results
+            WHERE test_id = :test AND ok IS NOT NULL AND start >= COALESCE(
+                (SELECT MAX(start) FROM results WHERE test_id = :test AND ok IS NOT NULL AND start < :since), :since)
+            ORDER BY start, id
+        """, {'test': test_id, 'since': since})
+        updates, previous = [], None
+        for row in rows:
+            flip = int(previous is not None and row['ok'] != previous)
+            previous = row['ok']
+            if row['start'] >= since and flip != row['flip']:
+                updates.append((flip, row['id']))
+                dirty_days.add((row['start'] // DAY_MS, test_id))
+        if updates:
+            self.conn.executemany("UPDATE results SET flip = ? WHERE id = ?", updates)
+
+    def _rebuild_daily(self, dirty_days: set):
+        self.conn.execute("DELETE FROM temp.dirty_days")
+        self.conn.executemany("INSERT INTO temp.dirty_days (day, test_id) VALUES (?, ?)", dirty_days)
+        self.conn.execute("DELETE FROM daily WHERE (day, test_id) IN (SELECT day, test_id FROM temp.dirty_days)")
+        self.conn.execute(REBUILD_DAILY)
+
+    def flaky(self, days: float = None, min_results: int = 3, limit: int = 20) -> List[Dict]:
+        """
+        不稳定用例：按开始时间排序后，通过 ↔ 失败/异常 的翻转次数占结果数的比例（flip_rate）从高到低排列
+
+        Args:
+            days: 只统计最近 N 天的结果，默认全部
+            min_results: 至少有多少次 passed/failed/broken 结果才参与统计
+            limit: 返回数量
+        """
+        rows = self.conn.execute("""
+            SELECT t.name, t.full_name, t.suite, t.history_id, w.results, w.passed, w.failed, w.flips
+            FROM (
+                SELECT test_id, SUM(outcomes) AS results, SUM(passed) AS passed,
+                       SUM(outcomes - passed) AS failed, SUM(flips) AS flips
+                FROM daily WHERE day >= ?
+                GROUP BY test_id
+                HAVING SUM(outcomes) >= ? AND SUM(flips) > 0
+            ) w JOIN tests t ON t.id = w.test_id
+            ORDER BY CAST(w.flips AS REAL) / w.results DESC, w.results DESC
+            LIMIT ?
+        """, (_since_day(days), min_results, limit))
+        return [dict(row, flip_rate=row['flips'] / row['results'], fail_rate=row['failed'] / row['results'])
+                for row in rows]
+
+    def duration_trend(self, test: str, days: float = None, bucket: str = 'day') -> List[Dict]:
+        """
+        用例耗时趋势：按天（或按运行）汇总平均 / 最小 / 最大耗时
+
+        Args:
+            test: historyId，或用例名称 / fullName（支持 SQL LIKE 通配符 %）
+            days: 只统计最近 N 天的结果，默认全部
+            bucket: 'day' 按天汇总，'run' 按导入的运行汇总
+        """
+        if bucket == 'day':
+            sql = """
+                SELECT date(day * 86400, 'unixepoch') AS bucket, SUM(results) AS results,
+                       CAST(SUM(duration_sum) AS REAL) / SUM(results) AS avg_ms,
+                       MIN(duration_min) AS min_ms, MAX(duration_max) AS max_ms, SUM(outcomes - passed) AS failed
+                FROM daily
+                WHERE test_id IN (SELECT id FROM tests WHERE history_id = ? OR name LIKE ? OR full_name LIKE ?)
+                  AND day >= ?
+                GROUP BY day ORDER BY day
+            """
+            since = _since_day(days)
+        elif bucket == 'run':
+            sql = """
+                SELECT runs.label AS bucket, COUNT(*) AS results, AVG(r.duration) AS avg_ms,
+                       MIN(r.duration) AS min_ms, MAX(r.duration) AS max_ms, SUM(r.ok IS 0) AS failed
+                FROM results r JOIN runs ON runs.id = r.run_id
+                WHERE r.test_id IN (SELECT id FROM tests WHERE history_id = ? OR name LIKE ? OR full_name LIKE ?)
+                  AND r.start >= ?
+                GROUP BY r.run_id ORDER BY MIN(r.start)
+            """
+            since = _since_day(days) * DAY_MS
+        else:
+            raise ValueError("bucket 只能是 'day' 或 'run'")
+        return [dict(row) for row in self.conn.execute(sql, (test, test, test, since))]
+
+    def regressions(self, days: float = 7, baseline_days: float = 28, min_ratio: float = 1.2,
+                    min_ms: int = 100, limit: int = 20) -> List[Dict]:
+        """
+        变慢用例：最近 days 天通过结果的平均耗时与之前 baseline_days 天相比，按增加的绝对耗时从大到小排列
+
+        Args:
+            days: 近期窗口（天）
+            baseline_days: 基线窗口（天），紧接在近期窗口之前
+            min_ratio: 近期 / 基线 平均耗时至少达到该倍数
+            min_ms: 近期平均耗时低于该值（毫秒）的用例忽略
+            limit: 返回数量
+        """
+        recent = _since_day(days)
+        rows = self.conn.execute("""
+            SELECT t.name, t.full_name, t.suite, t.history_id,
+                   w.baseline_ms, w.recent_ms, w.baseline_results, w.recent_results
+            FROM (
+                SELECT test_id,
+                       CAST(SUM(CASE WHEN day >= :recent THEN passed_duration_sum END) AS REAL)
+                           / SUM(CASE WHEN day >= :recent THEN passed END) AS recent_ms,
+                       CAST(SUM(CASE WHEN day < :recent THEN passed_duration_sum END) AS REAL)
+                           / SUM(CASE WHEN day < :recent THEN passed END) AS baseline_ms,
+                       SUM(CASE WHEN day >= :recent THEN passed ELSE 0 END) AS recent_results,
+                       SUM(CASE WHEN day < :recent THEN passed ELSE 0 END) AS baseline_results
+                FROM daily
+                WHERE day >= :baseline AND passed > 0
+                GROUP BY test_id
+            ) w JOIN tests t ON t.id = w.test_id
+            WHERE w.recent_ms >= :min_ms AND w.baseline_ms > 0 AND w.recent_ms >= w.baseline_ms * :ratio
+            ORDER BY w.recent_ms - w.baseline_ms DESC
+            LIMIT :limit
+        """, {'recent': recent, 'baseline': recent - int(baseline_days), 'min_ms': min_ms, 'ratio': min_ratio,
+              'limit': limit})
+        return [dict(row, ratio=row['recent_ms'] / row['baseline_ms']) for row in rows]
+
+    def slowest(self, days: float = None, limit: int = 20) -> List[Dict]:
+        """最慢用例：按平均耗时从大到小排列"""
+        rows = self.conn.execute("""
+            SELECT t.name, t.full_name, t.suite, t.history_id, w.results, w.avg_ms, w.max_ms
+            FROM (
+                SELECT test_id, SUM(results) AS results, CAST(SUM(duration_sum) AS REAL) / SUM(results) AS avg_ms,
+                       MAX(duration_max) AS max_ms
+                FROM daily WHERE day >= ? GROUP BY test_id
+            ) w JOIN tests t ON t.id = w.test_id
+            ORDER BY w.avg_ms DESC
+            LIMIT ?
+        """, (_since_day(days), limit))
+        return [dict(row) for row in rows]
+
+    def attachment_sizes(self, days: float = None, limit: int = 20) -> List[Dict]:
+        """附件体积最大的用例：按单次结果的平均附件总字节数从大到小排列"""
+        rows = self.conn.execute("""
+            SELECT t.name, t.full_name, t.suite, t.history_id, w.results, w.attachments, w.total_bytes,
+                   w.total_bytes / w.results AS avg_bytes
+            FROM (
+                SELECT test_id, SUM(results) AS results, SUM(attachments) AS attachments,
+                       SUM(attachment_bytes) AS total_bytes
+                FROM daily WHERE day >= ? GROUP BY test_id
+            ) w JOIN tests t ON t.id = w.test_id
+            WHERE w.attachments > 0
+            ORDER BY avg_bytes DESC
+            LIMIT ?
+        """, (_since_day(days), limit))
+        return [dict(row) for row in rows]
+
+
+def _mark(dirty_from: Dict, dirty_days: set, test_id: int, start: int):
+    if start < dirty_from.get(test_id, start + 1):
+        dirty_from[test_id] = start
+    dirty_days.add((start // DAY_MS, test_id))
+
+
+def _since_day(days: Optional[float]) -> int:
+    """最近 days 天的起始日（自 1970-01-01 起的 UTC 天数）；days 为空时返回 0，即不限制"""
+    if days is None:
+        return 0
+    return int((time.time() * 1000 - days * DAY_MS) // DAY_MS)
+
+
+def _run_label(results_dir: Path) -> str:
+    try:
+        executor = json.loads((results_dir / 'executor.json').read_text(encoding='utf-8'))
+        if executor.get('buildName'):
+            return str(executor['buildName'])
+    except (OSError, ValueError, AttributeError):
+        pass
+    return results_dir.name
+
+
+def _table(rows: List[Dict], columns) -> str:
+    """把查询结果渲染为 Markdown 表格"""
+    lines = ['| ' + ' | '.join(title for _, title in columns) + ' |', '|' + '---|' * len(columns)]
+    for row in rows:
+        cells = []
+        for key, _ in columns:
+            value = row.get(key)
+            if isinstance(value, float):
+                value = f"{value:.2f}"
+            cells.append(str('' if value is None else value).replace('|', '\\|'))
+        lines.append('| ' + ' | '.join(cells) + ' |')
+    return '\n'.join(lines)
+
+
+REPORT_COLUMNS = {
+    'flaky': [('name', '用例'), ('suite', '套件'), ('results', '结果数'), ('failed', '失败'),
+              ('flips', '翻转'), ('flip_rate', '翻转率')],
+    'trend': [('bucket', '日期/运行'), ('results', '结果数'), ('avg_ms', '平均 (ms)'), ('min_ms', '最小 (ms)'),
+              ('max_ms', '最大 (ms)'), ('failed', '失败')],
+    'regressions': [('name', '用例'), ('suite', '套件'), ('baseline_ms', '基线 (ms)'), ('recent_ms', '近期 (ms)'),
+                    ('ratio', '倍数')],
+    'slowest': [('name', '用例'), ('suite', '套件'), ('results', '结果数'), ('avg_ms', '平均 (ms)'),
+                ('max_ms', '最大 (ms)')],
+    'attachments': [('name', '用例'), ('suite', '套件'), ('results', '结果数'), ('attachments', '附件数'),
+                    ('avg_bytes', '平均字节数')],
+}
+
+
+def main(argv: List[str] = None):
+    """命令行入口：allure-handle-history <db> <command>"""
+    parser = argparse.ArgumentParser(
+        prog='allure-handle-history',
+        description='把 allure-results 增量导入 SQLite，查询不稳定用例、耗时趋势和变慢用例'
+    )
+    parser.add_argument('db', help='SQLite 索引文件路径')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    ingest = commands.add_parser('ingest', help='增量导入结果目录')
+    ingest.add_argument('results_dirs', nargs='+', help='allure-results 目录')
+    ingest.add_argument('--run', default=None, help='运行标识（默认 executor.json 的 buildName 或目录名）')
+    ingest.add_argument('--processes', type=int, default=None, help='解析进程数（默认 CPU 数）')
+
+    for name, help_text in (('flaky', '不稳定用例'), ('trend', '用例耗时趋势'), ('regressions', '变慢用例'),
+                            ('slowest', '最慢用例'), ('attachments', '附件体积最大的用例')):
+        command = commands.add_parser(name, help=help_text)
+        command.add_argument('--days', type=float, default=7 if name == 'regressions' else None,
+                             help='只统计最近 N 天' + ('（默认 7）' if name == 'regressions' else ''))
+        command.add_argument('--format', choices=('md', 'json'), default='md', help='输出格式（默认 md）')
+        if name == 'trend':
+            command.add_argument('test', help='historyId、用例名称或 fullName（支持 % 通配符）')
+            command.add_argument('--by', choices=('day', 'run'), default='day', help='汇总粒度（默认 day）')
+        else:
+            command.add_argument('--limit', type=int, default=20, help='返回数量（默认 20）')
+        if name == 'flaky':
+            command.add_argument('--min-results', type=int, default=3, help='最少结果数（默认 3）')
+        if name == 'regressions':
+            command.add_argument('--baseline-days', type=float, default=28, help='基线窗口天数（默认 28）')
+            command.add_argument('--min-ratio', type=float, default=1.2, help='最小变慢倍数（默认 1.2）')
+            command.add_argument('--min-ms', type=int, default=100, help='忽略近期平均耗时低于该值的用例（默认 100）')
+    args = parser.parse_args(argv)
+
+    with ResultIndex(args.db) as index:
+        if args.command == 'ingest':
+            for results_dir in args.results_dirs:
+                if not os.path.isdir(results_dir):
+                    parser.error(f"结果目录不存在: {results_dir}")
+                stats = index.ingest(results_dir, run=args.run, processes=args.processes)
+                print(f"{results_dir}: {stats['files']} 个结果文件, 新导入 {stats['parsed']}, "
+                      f"跳过 {stats['skipped']}, 用时 {stats['elapsed_seconds']:.2f}s")
+            return 0
+        started = time.perf_counter()
+        if args.command == 'flaky':
+            rows = index.flaky(days=args.days, min_results=args.min_results, limit=args.limit)
+        elif args.command == 'trend':
+            rows = index.duration_trend(args.test, days=args.days, bucket=args.by)
+        elif args.command == 'regressions':
+            rows = index.regressions(days=args.days, baseline_days=args.baseline_days, min_ratio=args.min_ratio,
+                                     min_ms=args.min_ms, limit=args.limit)
+        elif args.command == 'slowest':
+            rows = index.slowest(days=args.days, limit=args.limit)
+        else:
+            rows = index.attachment_sizes(days=args.days, limit=args.limit)
+        elapsed = time.perf_counter() - started
+
+    if args.format == 'json':
+        print(json.dumps(rows, indent=2, ensure_ascii=False))
+    else:
+        print(_table(rows, REPORT_COLUMNS[args.command]))
+        print(f"\n_{len(rows)} 行，查询用时 {elapsed * 1000:.1f}ms_")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,441 @@
+# -*- coding:UTF-8 -*-
+"""
+HTTP 客户端适配器
+在传输层自动记录请求/响应：requests 的 Adapter 和 httpx 的 Transport 包装已有的适配器（复用其连接池），
+请求体和响应体以原始字节直接写入附件，不额外解析；只有小于阈值的 JSON 才在写出时格式化
+（后台写入模式下在工作线程中完成），大 JSON 由 Allure 报告在查看时格式化。
+httpx 的响应体不在传输层读取：客户端读取正文时旁路复制最多 max_body_bytes 字节，响应关闭时再记录
+"""
+import json
+import time
+import zlib
+from typing import Dict, List, Optional, Tuple
+
+import allure
+
+from allure_handle.aio import AsyncAllureHandle
+from allure_handle.allure_handle import AllureHandle, _when_active
+from allure_handle.policy import _is_text
+
+try:
+    import requests
+    from requests.adapters import BaseAdapter, HTTPAdapter
+except ImportError:  # requests 为可选依赖
+    requests = None
+    BaseAdapter = object
+
+try:
+    import httpx
+except ImportError:  # httpx 为可选依赖
+    httpx = None
+
+# 小于该字节数的 JSON 正文在写出时格式化
+PRETTY_THRESHOLD = 64 * 1024
+# 超过该字节数的响应体不记录（按 Content-Length 判断时不读取，避免破坏流式下载）
+MAX_BODY_BYTES = 16 * 1024 * 1024
+
+# 不读取正文的流式响应类型
+_STREAMING_TYPES = ('text/event-stream', 'application/octet-stream')
+
+_CONTENT_TYPES = (
+    ('json', allure.attachment_type.JSON),
+    ('xml', allure.attachment_type.XML),
+    ('html', allure.attachment_type.HTML),
+    ('csv', allure.attachment_type.CSV),
+    ('image/png', allure.attachment_type.PNG),
+    ('image/jpeg', allure.attachment_type.JPG),
+    ('image/gif', allure.attachment_type.GIF),
+    ('image/svg', allure.attachment_type.SVG),
+)
+
+
+def _attachment_type(content_type: Optional[str]):
+    content_type = (content_type or '').lower()
+    for marker, attachment_type in _CONTENT_TYPES:
+        if marker in content_type:
+            return attachment_type
+    return allure.attachment_type.TEXT
+
+
+def _pretty_json(body: bytes):
+    """格式化 JSON 正文，无法解析时原样返回（开启脱敏时按值规则脱敏）"""
+    try:
+        return AllureHandle._json_encode()(json.loads(body))
+    except ValueError:
+        return AllureHandle._redact_text(body)
+
+
+def _redacted_json(body: bytes):
+    """超过格式化阈值的 JSON 正文在开启脱敏时仍需解析，按字段名/路径规则脱敏后输出紧凑 JSON；无法解析时不写出原文"""
+    try:
+        obj = json.loads(body)
+    except ValueError:
+        return f"[正文无法解析为 JSON，已省略 {len(body)} 字节（开启脱敏时不写出未脱敏的原文）]"
+    return AllureHandle._json_encode(compact=True)(obj)
+
+
+def _body_part(body, content_type: Optional[str], name: str, pretty_threshold: int):
+    attachment_type = _attachment_type(content_type)
+    encode = None
+    if attachment_type is allure.attachment_type.JSON:
+        if len(body) <= pretty_threshold:
+            encode = _pretty_json
+        elif AllureHandle._redactor is not None:
+            encode = _redacted_json
+    elif AllureHandle._redactor is not None and _is_text(attachment_type.mime_type):
+        # 未格式化的文本正文只能按值规则脱敏
+        encode = AllureHandle._redactor.redact_text
+    return body, name, attachment_type, encode
+
+
+def exchange_parts(method: str, url: str, request_headers: Dict, request_body,
+                   status_code: int, response_headers: Dict, response_body,
+                   elapsed: Optional[float], pretty_threshold: int = PRETTY_THRESHOLD) -> List[Tuple]:
+    """
+    构造一次 HTTP 交互的附件（同步和 asyncio 共用）
+
+    Args:
+        request_body / response_body: 原始字节；str 表示未读取正文的说明
+        elapsed: 耗时（秒）
+
+    Returns:
+        [(内容, 名称, 附件类型, 序列化函数), ...]
+    """
+    encode = AllureHandle._json_encode()
+    request_info = {"Method": method, "URL": url, "Headers": request_headers}
+    if isinstance(request_body, str):
+        request_info["Body"] = request_body
+    response_info = {"Status Code": status_code, "Headers": response_headers}
+    if elapsed is not None:
+        response_info["Response Time"] = f"{elapsed:.3f}s"
+    if isinstance(response_body, str):
+        response_info["Response Body"] = response_body
+    elif response_body:
+        response_info["Response Length"] = len(response_body)
+
+    parts = [(request_info, "请求信息", allure.attachment_type.JSON, encode)]
+    if isinstance(request_body, (bytes, bytearray, memoryview)) and request_body:
+        parts.append(_body_part(request_body, request_headers.get('Content-Type') or
+                                request_headers.get('content-type'), "请求体", pretty_threshold))
+    parts.append((response_info, "响应信息", allure.attachment_type.JSON, encode))
+    if isinstance(response_body, (bytes, bytearray, memoryview)) and response_body:
+        parts.append(_body_part(response_body, response_headers.get('Content-Type') or
+                                response_headers.get('content-type'), "响应内容", pretty_threshold))
+    return parts
+
+
+@_when_active
+def record_exchange(method: str, url: str, request_headers: Dict, request_body,
+                    status_code: int, response_headers: Dict, response_body,
+                    elapsed: Optional[float] = None, pretty_threshold: int = PRETTY_THRESHOLD):
+    """
+    把一次 HTTP 交互写入报告：一个步骤，包含请求信息、请求体、响应信息和响应内容
+
+    适配器自动调用；自定义客户端也可以直接调用，参数同 exchange_parts
+    """
+    AllureHandle._record_latency(method, url, elapsed)
+    with allure.step(f"{method} {AllureHandle._redact_text(url)} → {status_code}"):
+        for payload, name, attachment_type, encode in exchange_parts(
+                method, url, request_headers, request_body, status_code, response_headers,
+                response_body, elapsed, pretty_threshold):
+            AllureHandle._attach(payload, name=name, attachment_type=attachment_type, encode=encode)
+
+
+def _is_active() -> bool:
+    active = AllureHandle._active
+    if active is None:
+        active = AllureHandle.refresh_active()
+    return active
+
+
+def _readable(headers, max_body_bytes: int) -> Optional[str]:
+    """判断是否应读取响应体；不读取时返回说明"""
+    content_type = (headers.get('content-type') or '').lower()
+    if content_type.startswith(_STREAMING_TYPES):
+        return f"(流式响应 {content_type}，未读取)"
+    length = headers.get('content-length')
+    if length is not None and length.isdigit() and int(length) > max_body_bytes:
+        return f"(Content-Length={length}，超过 {max_body_bytes} 字节，未读取)"
+    return None
+
+
+def _decode_body(body: bytes, headers):
+    """按 Content-Encoding 解压旁路复制的原始字节（gzip / deflate），无法解压时返回说明"""
+    encoding = (headers.get('content-encoding') or 'identity').lower().strip()
+    if encoding in ('identity', ''):
+        return body
+    try:
+        if encoding in ('gzip', 'x-gzip'):
+            return zlib.decompress(body, 16 + zlib.MAX_WBITS)
+        if encoding == 'deflate':
+            try:
+                return zlib.decompress(body)
+            except zlib.error:
+                return zlib.decompress(body, -zlib.MAX_WBITS)
+    except zlib.error:
+        return f"(Content-Encoding={encoding}，解压失败，未记录)"
+    return f"(Content-Encoding={encoding}，未解码，未记录)"
+
+
+class _BodyTee:
+    """
+    旁路复制客户端读取的响应体（最多 limit 字节），不改变客户端看到的内容
+
+    响应关闭时调用 finish() 得到记录用的正文：完整读取且未超出上限时为 bytes，否则为说明
+    """
+
+    def __init__(self, headers, limit: int):
+        self.headers = headers
+        self.limit = limit
+        self._buffer = bytearray()
+        self._size = 0
+        self._complete = False
+        self._finished = False
+
+    def feed(self, chunk: bytes):
+        self._size += len(chunk)
+        if self._size <= self.limit:
+            self._buffer += chunk
+        elif self._buffer:
+            self._buffer = bytearray()  # 超出上限后不再保留
+
+    def complete(self):
+        self._complete = True
+
+    def finish(self):
+        """返回记录用的正文；只有第一次调用返回结果，之后返回 None"""
+        if self._finished:
+            return None
+        self._finished = True
+        if not self._complete:
+            return f"(响应体未读完即关闭，已读取 {self._size} 字节，未记录)"
+        if self._size > self.limit:
+            return f"(响应体 {self._size} 字节，超过 {self.limit} 字节，未记录)"
+        return _decode_body(bytes(self._buffer), self.headers)
+
+
+class AllureRequestsAdapter(BaseAdapter):
+    """
+    requests 适配器：包装已挂载的适配器（复用其连接池），自动记录每次请求
+
+    Example:
+        session = requests.Session()
+        instrument_session(session)
+    """
+
+    def __init__(self, adapter=None, pretty_threshold: int = PRETTY_THRESHOLD,
+                 max_body_bytes: int = MAX_BODY_BYTES):
+        """
+        Args:
+            adapter: 被包装的适配器，默认新建 HTTPAdapter
+            pretty_threshold: 小于该字节数的 JSON 正文在写出时格式化
+            max_body_bytes: 超过该字节数（按 Content-Length）的响应体不读取
+        """
+        if requests is None:
+            raise ImportError("未安装 requests，请执行: pip install requests")
+        super().__init__()
+        self.adapter = adapter if adapter is not None else HTTPAdapter()
+        self.pretty_threshold = pretty_threshold
+        self.max_body_bytes = max_body_bytes
+
+    def send(self, request, stream=False, **kwargs):
+        started = time.perf_counter()
+        response = self.adapter.send(request, stream=stream, **kwargs)
+        if not _is_active():
+            return response
+        # 非流式请求的正文已由连接池读入，response.content 直接复用；
+        # 流式请求只在 Content-Length 已知且不超过上限时读取（读取后 iter_content 复用缓存的正文）
+        note = None
+        if stream:
+            note = _readable(response.headers, self.max_body_bytes)
+            if note is None and response.headers.get('content-length') is None:
+                note = "(流式响应未声明 Content-Length，未读取)"
+        response_body = note or response.content
+        elapsed = time.perf_counter() - started
+        request_body = request.body
+        if isinstance(request_body, str):
+            request_body = request_body.encode('utf-8')
+        elif request_body is not None and not isinstance(request_body, bytes):
+            request_body = "(流式请求体，未记录)"
+        record_exchange(request.method, request.url, dict(request.headers), request_body,
+                        response.status_code, dict(response.headers), response_body, elapsed,
+                        self.pretty_threshold)
+        return response
+
+    def close(self):
+        self.adapter.close()
+
+
+def instrument_session(session, **kwargs):
+    """
+    为 requests.Session 的全部已挂载适配器加上自动记录（复用原适配器及其连接池）
+
+    Args:
+        session: requests.Session
+        **kwargs: 传给 AllureRequestsAdapter 的参数
+
+    Returns:
+        session 本身
+    """
+    for prefix, adapter in list(session.adapters.items()):
+        if not isinstance(adapter, AllureRequestsAdapter):
+            session.mount(prefix, AllureRequestsAdapter(adapter, **kwargs))
+    return session
+
+
+def _httpx_request_body(request):
+    try:
+        return request.content
+    except httpx.RequestNotRead:
+        return "(流式请求体，未记录)"
+
+
+def _cached_body(response, max_body_bytes: int):
+    """已读入内存的 httpx 响应体（已解码），超过上限时返回说明"""
+    content = response.content
+    if len(content) > max_body_bytes:
+        return f"(响应体 {len(content)} 字节，超过 {max_body_bytes} 字节，未记录)"
+    return content
+
+
+class _TeeStream(httpx.SyncByteStream if httpx is not None else object):
+    """包装 httpx 同步响应流：客户端迭代时旁路复制正文，关闭时调用 on_close(正文)"""
+
+    def __init__(self, stream, tee: _BodyTee, on_close):
+        self._stream = stream
+        self._tee = tee
+        self._on_close = on_close
+
+    def __iter__(self):
+        for chunk in self._stream:
+            self._tee.feed(chunk)
+            yield chunk
+        self._tee.complete()
+
+    def close(self):
+        try:
+            self._stream.close()
+        finally:
+            body = self._tee.finish()
+            if body is not None:
+                self._on_close(body)
+
+
+class _AsyncTeeStream(httpx.AsyncByteStream if httpx is not None else object):
+    """包装 httpx 异步响应流：客户端迭代时旁路复制正文，关闭时 await on_close(正文)"""
+
+    def __init__(self, stream, tee: _BodyTee, on_close):
+        self._stream = stream
+        self._tee = tee
+        self._on_close = on_close
+
+    async def __aiter__(self):
+        async for chunk in self._stream:
+            self._tee.feed(chunk)
+            yield chunk
+        self._tee.complete()
+
+    async def aclose(self):
+        try:
+            await self._stream.aclose()
+        finally:
+            body = self._tee.finish()
+            if body is not None:
+                await self._on_close(body)
+
+
+class AllureTransport(httpx.BaseTransport if httpx is not None else object):
+    """
+    httpx 同步传输层：包装已有的 transport（复用其连接池），自动记录每次请求
+
+    响应体不在传输层读取，client.stream(...) 照常流式返回；客户端读取正文时旁路复制
+    最多 max_body_bytes 字节，响应关闭时写入报告
+
+    Example:
+        client = httpx.Client(transport=AllureTransport())
+    """
+
+    def __init__(self, transport=None, pretty_threshold: int = PRETTY_THRESHOLD,
+                 max_body_bytes: int = MAX_BODY_BYTES):
+        if httpx is None:
+            raise ImportError("未安装 httpx，请执行: pip install httpx")
+        self.transport = transport if transport is not None else httpx.HTTPTransport()
+        self.pretty_threshold = pretty_threshold
+        self.max_body_bytes = max_body_bytes
+
+    def handle_request(self, request):
+        started = time.perf_counter()
+        response = self.transport.handle_request(request)
+        if not _is_active():
+            return response
+
+        def record(response_body):
+            record_exchange(request.method, str(request.url), dict(request.headers), _httpx_request_body(request),
+                            response.status_code, dict(response.headers), response_body,
+                            time.perf_counter() - started, self.pretty_threshold)
+
+        if response.is_stream_consumed:
+            # 正文已读入内存（如 MockTransport 按 content 构造的响应），直接复用
+            record(_cached_body(response, self.max_body_bytes))
+            return response
+        note = _readable(response.headers, self.max_body_bytes)
+        if note is not None:
+            record(note)
+        else:
+            response.stream = _TeeStream(response.stream, _BodyTee(response.headers, self.max_body_bytes), record)
+        return response
+
+    def close(self):
+        self.transport.close()
+
+
+class AllureAsyncTransport(httpx.AsyncBaseTransport if httpx is not None else object):
+    """
+    httpx 异步传输层：序列化和写文件交给 AsyncAllureHandle 的线程池，步骤归属按协程跟踪
+
+    响应体的处理与 AllureTransport 相同：读取时旁路复制，响应关闭时写入报告
+
+    Example:
+        async with httpx.AsyncClient(transport=AllureAsyncTransport()) as client:
+            await asyncio.gather(*(client.get(url) for url in urls))
+    """
+
+    def __init__(self, transport=None, pretty_threshold: int = PRETTY_THRESHOLD,
+                 max_body_bytes: int = MAX_BODY_BYTES):
+        if httpx is None:
+            raise ImportError("未安装 httpx，请执行: pip install httpx")
+        self.transport = transport if transport is not None else httpx.AsyncHTTPTransport()
+        self.pretty_threshold = pretty_threshold
+        self.max_body_bytes = max_body_bytes
+
+    async def handle_async_request(self, request):
+        started = time.perf_counter()
+        response = await self.transport.handle_async_request(request)
+        if not _is_active():
+            return response
+
+        async def record(response_body):
+            elapsed = time.perf_counter() - started
+            method, url = request.method, str(request.url)
+            AllureHandle._record_latency(method, url, elapsed)
+            await AsyncAllureHandle._step_with_parts(
+                f"{method} {AllureHandle._redact_text(url)} → {response.status_code}",
+                exchange_parts(method, url, dict(request.headers), _httpx_request_body(request),
+                               response.status_code, dict(response.headers), response_body, elapsed,
+                               self.pretty_threshold),
+                method=type(self).__name__
+            )
+
+        if response.is_stream_consumed:
+            await record(_cached_body(response, self.max_body_bytes))
+            return response
+        note = _readable(response.headers, self.max_body_bytes)
+        if note is not None:
+            await record(note)
+        else:
+            response.stream = _AsyncTeeStream(response.stream, _BodyTee(response.headers, self.max_body_bytes),
+                                              record)
+        return response
+
+    async def aclose(self):
+        await self.transport.aclose()
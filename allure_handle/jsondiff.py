@@ -0,0 +1,309 @@
+# -*- coding:UTF-8 -*-
+"""
+JSON 结构差异
+比较两个 JSON 类对象，只输出差异部分：相同分支用 C 实现的 == 直接跳过，
+数组元素按 id 等键匹配（无键时先去掉首尾相同部分，中间部分按子树哈希配对，顺序变化的元素记为移动），时间和内存与对象大小近似线性
+"""
+import json
+from bisect import bisect_left
+from collections import defaultdict
+from typing import Dict, List, Optional, Sequence
+
+from allure_handle.templates import HtmlTemplate, register_template
+
+# 自动识别数组元素键时依次尝试的字段
+DEFAULT_ARRAY_KEYS = ('id', 'key', 'uuid', 'name')
+_MASK = (1 << 64) - 1
+_SCALAR_TYPES = (str, int, float, bool, type(None))
+_MISSING = object()
+
+DIFF_TEMPLATE = HtmlTemplate(
+    columns=[('path', '路径'), ('op', '差异'), ('expected', '预期'), ('actual', '实际')],
+    value_maps={'op': {'changed': '不同', 'added': '多出', 'removed': '缺少', 'moved': '移动'}},
+    title="JSON 差异",
+)
+register_template('json_diff', DIFF_TEMPLATE)
+
+
+class _Full(Exception):
+    """差异数量达到上限，提前结束遍历"""
+
+
+class JsonDiff:
+    """
+    JSON 结构差异比较器
+
+    - 相同的分支用 == 跳过（与 Python 语义一致，True 与 1、1 与 1.0 视为相同），
+      只沿着不同的分支向下遍历，总开销约为对象大小 × 差异路径深度
+    - 数组元素都是带唯一 array_keys 字段的字典时按该字段匹配，路径写作 items[id=42]
+    - 其他数组先去掉首尾相同的元素，中间部分按子树哈希（每个子树只计算一次，按对象 id 缓存）
+      配对相等的元素，相对顺序改变的记为 moved（因插入/删除整体平移的不算）；
+      相邻的配对元素之间剩余的元素按顺序比较，多出的记为 added / removed
+    - 差异数量达到 max_changes 后停止遍历；差异中的值只保留有限层级和元素数的预览
+
+    Example:
+        diff = JsonDiff(max_changes=200).diff(expected, actual)
+        diff['changes']  # [{'path': '$.data[id=3].price', 'op': 'changed', 'expected': 10, 'actual': 12}, ...]
+    """
+
+    def __init__(self, array_keys: Sequence[str] = DEFAULT_ARRAY_KEYS, max_changes: int = 500,
+                 preview_items: int = 20, preview_depth: int = 3, preview_chars: int = 200):
+        """
+        Args:
+            array_keys: 数组元素匹配字段，按顺序尝试，空序列表示不按键匹配
+            max_changes: 最多输出的差异数量
+            preview_items: 差异值预览中每个对象/数组最多保留的元素数
+            preview_depth: 差异值预览的最大嵌套层级
+            preview_chars: 差异值预览中字符串的最大长度
+        """
+        self.array_keys = tuple(array_keys)
+        self.max_changes = max_changes
+        self.preview_items = preview_items
+        self.preview_depth = preview_depth
+        self.preview_chars = preview_chars
+        self._hashes: Dict[int, int] = {}
+        self._changes: List[Dict] = []
+
+    def diff(self, expected, actual) -> Dict:
+        """
+        比较两个对象
+
+        Returns:
+            {'equal': 是否相同, 'changes': [{path, op, expected, actual}, ...],
+             'counts': {'changed': n, 'added': n, 'removed': n, 'moved': n}, 'truncated': 是否因达到上限而省略了后续差异}
+            moved 差异的 path 为元素在实际数组中的位置，另有 'from' / 'to' 两个下标，actual 为元素预览
+        """
+        counts = {'changed': 0, 'added': 0, 'removed': 0, 'moved': 0}
+        equal = expected is actual or expected == actual
+        if equal:
+            return {'equal': True, 'changes': [], 'counts': counts, 'truncated': False}
+        self._hashes, self._changes = {}, []
+        truncated = False
+        try:
+            self._walk(expected, actual, '$')
+        except _Full:
+            truncated = True
+        changes, self._changes, self._hashes = self._changes, [], {}
+        for change in changes:
+            counts[change['op']] += 1
+        return {'equal': False, 'changes': changes, 'counts': counts, 'truncated': truncated}
+
+    def _hash(self, obj) -> int:
+        """子树哈希（与 == 语义一致）：对象与键顺序无关，数组与顺序有关；容器的哈希按 id 缓存"""
+        if isinstance(obj, dict):
+            cached = self._hashes.get(id(obj))
+            if cached is None:
+                acc = 0
+                for key, value in obj.items():
+                    acc = (acc + hash((key, self._hash(value)))) & _MASK
+                cached = self._hashes[id(obj)] = hash((dict, len(obj), acc))
+            return cached
+        if isinstance(obj, (list, tuple)):
+            cached = self._hashes.get(id(obj))
+            if cached is None:
+                cached = self._hashes[id(obj)] = hash((list, tuple(self._hash(value) for value in obj)))
+            return cached
+        try:
+            return hash(obj)
+        except TypeError:
+            return hash(repr(obj))
+
+    def _walk(self, expected, actual, path: str):
+        if expected is actual or expected == actual:
+            return
+        if isinstance(expected, dict) and isinstance(actual, dict):
+            for key, value in expected.items():
+                if key in actual:
+                    self._walk(value, actual[key], _child(path, key))
+                else:
+                    self._add(_child(path, key), 'removed', expected=value)
+            for key, value in actual.items():
+                if key not in expected:
+                    self._add(_child(path, key), 'added', actual=value)
+        elif isinstance(expected, (list, tuple)) and isinstance(actual, (list, tuple)):
+            self._walk_array(expected, actual, path)
+        else:
+            self._add(path, 'changed', expected=expected, actual=actual)
+
+    def _walk_array(self, expected: Sequence, actual: Sequence, path: str):
+        key = self._array_key(expected, actual)
+        if key is not None:
+            by_key = {item[key]: item for item in actual}
+            for item in expected:
+                other = by_key.pop(item[key], _MISSING)
+                if other is _MISSING:
+                    self._add(f"{path}[{key}={_scalar(item[key])}]", 'removed', expected=item)
+                elif other is not item and other != item:
+                    self._walk(item, other, f"{path}[{key}={_scalar(item[key])}]")
+            for value, item in by_key.items():
+                self._add(f"{path}[{key}={_scalar(value)}]", 'added', actual=item)
+            return
+
+        # 去掉首尾相同的元素
+        start, end_e, end_a = 0, len(expected), len(actual)
+        limit = min(end_e, end_a)
+        while start < limit and expected[start] == actual[start]:
+            start += 1
+        while end_e > start and end_a > start and expected[end_e - 1] == actual[end_a - 1]:
+            end_e -= 1
+            end_a -= 1
+        # 中间部分按哈希配对相等的元素（哈希相同时再比较值，重复元素按出现顺序配对）
+        pending = defaultdict(list)
+        for index in range(end_a - 1, start - 1, -1):
+            pending[self._hash(actual[index])].append(index)
+        pairs = []
+        for index in range(start, end_e):
+            candidates = pending.get(self._hash(expected[index]))
+            if candidates:
+                match = _pop_equal(candidates, expected[index], actual)
+                if match is not None:
+                    pairs.append((index, match))
+        # 实际下标的最长递增子序列保持了相对顺序，作为锚点；其余配对元素记为移动
+        kept = _increasing(pairs)
+        anchors = []
+        for position, (index_e, index_a) in enumerate(pairs):
+            if position in kept:
+                anchors.append((index_e, index_a))
+            elif index_e != index_a:
+                self._add_moved(path, index_e, index_a, actual[index_a])
+        # 相邻锚点之间未配对的元素按顺序比较，多出的记为缺少/多出（整体平移时只在两端出现差异）
+        matched_e = {index_e for index_e, _ in pairs}
+        matched_a = {index_a for _, index_a in pairs}
+        low_e = low_a = start
+        for high_e, high_a in anchors + [(end_e, end_a)]:
+            rest_e = [index for index in range(low_e, high_e) if index not in matched_e]
+            rest_a = [index for index in range(low_a, high_a) if index not in matched_a]
+            for index_e, index_a in zip(rest_e, rest_a):
+                self._walk(expected[index_e], actual[index_a], f"{path}[{index_a}]")
+            for index in rest_e[len(rest_a):]:
+                self._add(f"{path}[{index}]", 'removed', expected=expected[index])
+            for index in rest_a[len(rest_e):]:
+                self._add(f"{path}[{index}]", 'added', actual=actual[index])
+            low_e, low_a = high_e + 1, high_a + 1
+
+    def _array_key(self, expected: Sequence, actual: Sequence) -> Optional[str]:
+        """两个数组的元素都是字典且某个字段在各自数组内唯一时，返回该字段"""
+        if not self.array_keys or not expected or not actual:
+            return None
+        if not (isinstance(expected[0], dict) and isinstance(actual[0], dict)):
+            return None
+        for key in self.array_keys:
+            if key in expected[0] and key in actual[0] and _unique_key(expected, key) and _unique_key(actual, key):
+                return key
+        return None
+
+    def _add(self, path: str, op: str, expected=None, actual=None):
+        change = {'path': path, 'op': op}
+        if op != 'added':
+            change['expected'] = self._preview(expected, 0)
+        if op != 'removed':
+            change['actual'] = self._preview(actual, 0)
+        self._changes.append(change)
+        if len(self._changes) >= self.max_changes:
+            raise _Full()
+
+    def _add_moved(self, path: str, index_e: int, index_a: int, value):
+        self._changes.append({'path': f"{path}[{index_a}]", 'op': 'moved', 'from': index_e, 'to': index_a,
+                              'actual': self._preview(value, 0)})
+        if len(self._changes) >= self.max_changes:
+            raise _Full()
+
+    def _preview(self, value, depth: int):
+        """差异值的有限预览，长度与原对象大小无关"""
+        if isinstance(value, str):
+            if len(value) > self.preview_chars:
+                return f"{value[:self.preview_chars]}…(共 {len(value)} 字符)"
+            return value
+        if isinstance(value, dict):
+            if depth >= self.preview_depth:
+                return f"<对象: {len(value)} 个字段>"
+            preview = {}
+            for index, (key, item) in enumerate(value.items()):
+                if index == self.preview_items:
+                    preview['…'] = f"另有 {len(value) - index} 个字段"
+                    break
+                preview[str(key)] = self._preview(item, depth + 1)
+            return preview
+        if isinstance(value, (list, tuple)):
+            if depth >= self.preview_depth:
+                return f"<数组: {len(value)} 个元素>"
+            preview = [self._preview(item, depth + 1) for item in value[:self.preview_items]]
+            if len(value) > self.preview_items:
+                preview.append(f"…另有 {len(value) - self.preview_items} 个元素")
+            return preview
+        if isinstance(value, _SCALAR_TYPES):
+            return value
+        return repr(value)
+
+
+def _unique_key(items: Sequence, key: str) -> bool:
+    try:
+        values = [item.get(key, _MISSING) for item in items]
+        unique = set(values)
+    except (AttributeError, TypeError):  # 元素不是字典，或键值不可哈希
+        return False
+    return len(unique) == len(values) and _MISSING not in unique
+
+
+def _pop_equal(candidates: List[int], value, actual: Sequence) -> Optional[int]:
+    """从哈希相同的候选下标（逆序栈）中取出第一个与 value 相等的，哈希碰撞时不配对"""
+    for position in range(len(candidates) - 1, -1, -1):
+        other = actual[candidates[position]]
+        if other is value or other == value:
+            return candidates.pop(position)
+    return None
+
+
+def _increasing(pairs: Sequence) -> set:
+    """按实际下标求最长递增子序列，返回其在 pairs 中的位置集合（O(n log n)）"""
+    tails, tail_positions, previous = [], [], []
+    for position, (_, index_a) in enumerate(pairs):
+        slot = bisect_left(tails, index_a)
+        if slot == len(tails):
+            tails.append(index_a)
+            tail_positions.append(position)
+        else:
+            tails[slot] = index_a
+            tail_positions[slot] = position
+        previous.append(tail_positions[slot - 1] if slot else -1)
+    kept = set()
+    position = tail_positions[-1] if tail_positions else -1
+    while position >= 0:
+        kept.add(position)
+        position = previous[position]
+    return kept
+
+
+def _child(path: str, key) -> str:
+    if isinstance(key, str) and key.isidentifier():
+        return f"{path}.{key}"
+    return f"{path}[{json.dumps(key, ensure_ascii=False)}]"
+
+
+def _scalar(value) -> str:
+    return json.dumps(value, ensure_ascii=False)
+
+
+def json_diff(expected, actual, array_keys: Sequence[str] = DEFAULT_ARRAY_KEYS, max_changes: int = 500) -> Dict:
+    """比较两个 JSON 类对象，参数和返回值见 JsonDiff"""
+    return JsonDiff(array_keys=array_keys, max_changes=max_changes).diff(expected, actual)
+
+
+def render_html(diff: Dict, stylesheet: Optional[str] = None) -> str:
+    """把差异渲染为 HTML 表格，预期/实际值显示为紧凑 JSON"""
+    rows = []
+    for change in diff['changes']:
+        if change['op'] == 'moved':
+            expected, actual = f"[{change['from']}]", f"[{change['to']}] {_compact(change['actual'])}"
+        else:
+            expected = _compact(change['expected']) if 'expected' in change else ''
+            actual = _compact(change['actual']) if 'actual' in change else ''
+        rows.append({'path': change['path'], 'op': change['op'], 'expected': expected, 'actual': actual})
+    if diff['truncated']:
+        rows.append({'path': '…', 'op': '', 'expected': f"已达到上限 {len(diff['changes'])} 条，其余差异未列出",
+                     'actual': ''})
+    return DIFF_TEMPLATE.render(rows, stylesheet=stylesheet)
+
+
+def _compact(value) -> str:
+    return json.dumps(value, ensure_ascii=False, separators=(',', ':'), default=str)
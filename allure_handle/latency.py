@@ -0,0 +1,225 @@
+# -*- coding:UTF-8 -*-
+"""
+接口延迟直方图
+按 (Method, URL 模板) 汇总 add_response_to_report 的响应时间，使用 HDR 风格的对数分桶，
+每个接口占用固定内存，可跨 xdist worker 合并，会话结束时输出 p50/p95/p99/max
+"""
+import json
+import os
+import re
+import threading
+from array import array
+from pathlib import Path
+from typing import Dict, List, Optional
+from urllib.parse import urlsplit
+
+from allure_handle.templates import HtmlTemplate
+
+# 每个 2 的幂区间划分 32 个子桶，相对误差约 3%
+SUB_BUCKET_BITS = 5
+SUB_BUCKET_COUNT = 1 << SUB_BUCKET_BITS
+SUB_BUCKET_HALF = SUB_BUCKET_COUNT // 2
+# 可记录的最大值（微秒），约 1 小时，超出的值计入最后一个桶
+MAX_VALUE_US = (1 << 32) - 1
+BUCKET_COUNT = (MAX_VALUE_US.bit_length() - SUB_BUCKET_BITS + 1) * SUB_BUCKET_HALF + SUB_BUCKET_HALF
+# 超出 max_endpoints 后新接口统一归入该名称
+OVERFLOW_ENDPOINT = '(other)'
+
+_ID_SEGMENT = re.compile(
+    r'^(\d+|[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12}|[0-9a-fA-F]{16,})$'
+)
+
+LATENCY_TEMPLATE = HtmlTemplate(
+    columns=[
+        ('endpoint', '接口'),
+        ('count', '请求数'),
+        ('p50_ms', 'p50 (ms)'),
+        ('p95_ms', 'p95 (ms)'),
+        ('p99_ms', 'p99 (ms)'),
+        ('max_ms', 'max (ms)'),
+        ('mean_ms', '平均 (ms)'),
+    ],
+    title="接口延迟分布",
+)
+
+
+def url_template(url: str) -> str:
+    """
+    把 URL 归一化为接口模板：去掉协议、主机和查询参数，数字/UUID/长十六进制路径段替换为 {id}
+
+    Example:
+        https://api.example.com/users/123/orders?page=2 -> /users/{id}/orders
+    """
+    path = urlsplit(url).path or url
+    return '/'.join('{id}' if _ID_SEGMENT.match(segment) else segment for segment in path.split('/'))
+
+
+def _bucket_index(value_us: int) -> int:
+    value_us = min(max(value_us, 0), MAX_VALUE_US)
+    bucket = max(0, value_us.bit_length() - SUB_BUCKET_BITS)
+    return bucket * SUB_BUCKET_HALF + (value_us >> bucket)
+
+
+def _bucket_value(index: int) -> int:
+    """桶的上界（微秒）"""
+    if index < SUB_BUCKET_COUNT:
+        return index
+    bucket = index // SUB_BUCKET_HALF - 1
+    sub = index - bucket * SUB_BUCKET_HALF
+    return ((sub + 1) << bucket) - 1
+
+
+class LatencyHistogram:
+    """固定内存的对数分桶直方图（单位：微秒）"""
+
+    def __init__(self):
+        self.counts = array('q', bytes(8 * BUCKET_COUNT))
+        self.count = 0
+        self.total_us = 0
+        self.max_us = 0
+
+    def record(self, seconds: float):
+        """记录一次耗时（秒）"""
+        value_us = int(seconds * 1000000)
+        self.counts[_bucket_index(value_us)] += 1
+        self.count += 1
+        self.total_us += value_us
+        if value_us > self.max_us:
+            self.max_us = value_us
+
+    def percentile(self, percent: float) -> int:
+        """返回百分位数（微秒），误差不超过所在桶的宽度"""
+        if not self.count:
+            return 0
+        target = max(1, int(self.count * percent / 100 + 0.5))
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if seen >= target:
+                return min(_bucket_value(index), self.max_us)
+        return self.max_us
+
+    def merge(self, other: 'LatencyHistogram'):
+        """合并另一个直方图"""
+        for index, count in enumerate(other.counts):
+            if count:
+                self.counts[index] += count
+        self.count += other.count
+        self.total_us += other.total_us
+        self.max_us = max(self.max_us, other.max_us)
+
+    def to_dict(self) -> Dict:
+        return {
+            'count': self.count,
+            'total_us': self.total_us,
+            'max_us': self.max_us,
+            'buckets': {str(i): c for i, c in enumerate(self.counts) if c},
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'LatencyHistogram':
+        histogram = cls()
+        for index, count in data.get('buckets', {}).items():
+            histogram.counts[int(index)] = count
+        histogram.count = data.get('count', 0)
+        histogram.total_us = data.get('total_us', 0)
+        histogram.max_us = data.get('max_us', 0)
+        return histogram
+
+
+class LatencyStore:
+    """会话级接口延迟统计，线程安全"""
+
+    def __init__(self, max_endpoints: int = 1000):
+        """
+        Args:
+            max_endpoints: 最多统计的接口数，超出后归入 (other)，保证内存上限
+        """
+        self.max_endpoints = max_endpoints
+        self._histograms: Dict[str, LatencyHistogram] = {}
+        self._lock = threading.Lock()
+
+    def record(self, method: str, url: str, seconds: float):
+        """
+        记录一次请求耗时
+
+        Args:
+            method: HTTP 方法
+            url: 请求URL（自动归一化为接口模板）
+            seconds: 响应时间（秒）
+        """
+        endpoint = f"{method.upper()} {url_template(url)}"
+        with self._lock:
+            histogram = self._histograms.get(endpoint)
+            if histogram is None:
+                if len(self._histograms) >= self.max_endpoints:
+                    endpoint = OVERFLOW_ENDPOINT
+                    histogram = self._histograms.get(endpoint)
+                if histogram is None:
+                    histogram = self._histograms[endpoint] = LatencyHistogram()
+            histogram.record(seconds)
+
+    def merge(self, other: 'LatencyStore'):
+        """合并另一个统计（例如其他 xdist worker 的结果）"""
+        with self._lock:
+            for endpoint, histogram in other._histograms.items():
+                current = self._histograms.get(endpoint)
+                if current is None:
+                    current = self._histograms[endpoint] = LatencyHistogram()
+                current.merge(histogram)
+
+    def __len__(self):
+        return len(self._histograms)
+
+    def report(self) -> List[Dict]:
+        """按 p99 从高到低返回各接口的延迟分布（毫秒）"""
+        with self._lock:
+            items = list(self._histograms.items())
+        rows = []
+        for endpoint, histogram in items:
+            rows.append({
+                'endpoint': endpoint,
+                'count': histogram.count,
+                'p50_ms': histogram.percentile(50) / 1000,
+                'p95_ms': histogram.percentile(95) / 1000,
+                'p99_ms': histogram.percentile(99) / 1000,
+                'max_ms': histogram.max_us / 1000,
+                'mean_ms': round(histogram.total_us / histogram.count / 1000, 3) if histogram.count else 0,
+            })
+        rows.sort(key=lambda row: row['p99_ms'], reverse=True)
+        return rows
+
+    def to_html(self, stylesheet: Optional[str] = None) -> str:
+        """渲染为 HTML 表格"""
+        return LATENCY_TEMPLATE.render(self.report(), stylesheet=stylesheet)
+
+    def to_dict(self) -> Dict:
+        with self._lock:
+            return {endpoint: histogram.to_dict() for endpoint, histogram in self._histograms.items()}
+
+    @classmethod
+    def from_dict(cls, data: Dict, max_endpoints: int = 1000) -> 'LatencyStore':
+        store = cls(max_endpoints=max_endpoints)
+        for endpoint, histogram in data.items():
+            store._histograms[endpoint] = LatencyHistogram.from_dict(histogram)
+        return store
+
+    def save(self, path):
+        """保存原始直方图（用于跨 worker 合并）"""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(path.name + '.tmp')
+        tmp.write_text(json.dumps(self.to_dict()), encoding='utf-8')
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path, max_endpoints: int = 1000) -> 'LatencyStore':
+        """加载 save 保存的直方图"""
+        return cls.from_dict(json.loads(Path(path).read_text(encoding='utf-8')), max_endpoints=max_endpoints)
+
+    def export(self, path):
+        """导出各接口百分位数（JSON），供 CI 回归门禁使用"""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        report = {row['endpoint']: {k: v for k, v in row.items() if k != 'endpoint'} for row in self.report()}
+        path.write_text(json.dumps(report, indent=2, ensure_ascii=False), encoding='utf-8')
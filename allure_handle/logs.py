@@ -0,0 +1,113 @@
+# -*- coding:UTF-8 -*-
+"""
+用例日志捕获
+logging.Handler 把每个用例的日志记录写入有界环形缓冲区（按字节数/条数封顶），
+用例结束时以流的方式写入附件文件，内存占用与日志量无关
+"""
+import logging
+import threading
+from collections import deque
+from typing import Iterator, Optional
+
+MODES = ('always', 'failure')
+
+DEFAULT_FORMAT = '%(asctime)s %(levelname)-8s %(name)s: %(message)s'
+
+
+class LogRingBuffer:
+    """
+    有界环形缓冲区，保存编码后的日志行
+
+    超出 max_bytes 或 max_records 时丢弃最早的记录，并统计丢弃数量。
+    """
+
+    def __init__(self, max_bytes: int = 4 * 1024 * 1024, max_records: Optional[int] = None):
+        """
+        Args:
+            max_bytes: 缓冲区最大字节数
+            max_records: 缓冲区最大记录数，None 表示不限制
+        """
+        self.max_bytes = max_bytes
+        self.max_records = max_records
+        self._lines = deque()
+        self.size = 0
+        self.dropped = 0
+
+    def __len__(self):
+        return len(self._lines)
+
+    def append(self, line: bytes):
+        """追加一行（已编码、含换行符）"""
+        lines = self._lines
+        lines.append(line)
+        self.size += len(line)
+        while lines and (self.size > self.max_bytes or
+                         (self.max_records is not None and len(lines) > self.max_records)):
+            self.size -= len(lines.popleft())
+            self.dropped += 1
+
+    def __iter__(self) -> Iterator[bytes]:
+        if self.dropped:
+            yield f"... 已丢弃 {self.dropped} 条较早的日志 ...\n".encode('utf-8')
+        yield from self._lines
+
+
+class AllureLogHandler(logging.Handler):
+    """
+    按用例缓冲日志的 logging.Handler
+
+    由 pytest 插件在用例开始时调用 begin()，结束时调用 take() 取出缓冲区写入附件；
+    任意线程的日志都会进入当前用例的缓冲区。
+    根 logger 级别高于本 handler 时，只在用例执行期间（begin 到 take）临时调低，用例结束时恢复。
+    """
+
+    def __init__(self, level=logging.NOTSET, max_bytes: int = 4 * 1024 * 1024,
+                 max_records: Optional[int] = None, mode: str = 'always', fmt: str = DEFAULT_FORMAT):
+        """
+        Args:
+            level: 日志级别
+            max_bytes: 每个用例缓冲区的最大字节数
+            max_records: 每个用例缓冲区的最大记录数，None 表示不限制
+            mode: always（每个用例都附加）/ failure（只为失败/出错的用例附加）
+            fmt: 日志格式
+        """
+        if mode not in MODES:
+            raise ValueError(f"不支持的模式: {mode}，可选值: {', '.join(MODES)}")
+        super().__init__(level)
+        self.setFormatter(logging.Formatter(fmt))
+        self.max_bytes = max_bytes
+        self.max_records = max_records
+        self.mode = mode
+        self._buffer: Optional[LogRingBuffer] = None
+        self._swap_lock = threading.Lock()
+        # begin() 调低根 logger 级别前的原级别，None 表示未调整
+        self._root_level: Optional[int] = None
+
+    def begin(self):
+        """开始缓冲一个新用例的日志"""
+        with self._swap_lock:
+            self._buffer = LogRingBuffer(self.max_bytes, self.max_records)
+            root = logging.getLogger()
+            if self._root_level is None and self.level and root.getEffectiveLevel() > self.level:
+                self._root_level = root.level
+                root.setLevel(self.level)
+
+    def take(self) -> Optional[LogRingBuffer]:
+        """取出当前用例的缓冲区、停止缓冲并恢复根 logger 级别；没有缓冲任何日志时返回 None"""
+        with self._swap_lock:
+            buffer, self._buffer = self._buffer, None
+            if self._root_level is not None:
+                logging.getLogger().setLevel(self._root_level)
+                self._root_level = None
+        return buffer if buffer else None
+
+    def emit(self, record: logging.LogRecord):
+        buffer = self._buffer
+        if buffer is None:
+            return
+        try:
+            line = (self.format(record) + '\n').encode('utf-8', 'replace')
+        except Exception:
+            self.handleError(record)
+            return
+        buffer.append(line)
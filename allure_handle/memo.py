@@ -0,0 +1,160 @@
+# -*- coding:UTF-8 -*-
+"""
+序列化结果缓存
+参数化用例反复传入相同（或内容相同）的测试数据时，复用之前的序列化结果；
+缓存键为对象的结构指纹（repr 的摘要），用 frozen() 标记的不可变数据直接按对象身份命中，不计算指纹；
+指纹不比序列化本身便宜时（如 orjson 编码 JSON）调用方关闭按内容缓存，只有 frozen() 数据参与缓存
+"""
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, Hashable, Optional
+
+# 默认 repr 中包含内存地址，无法反映对象内容，含有此类对象的数据不缓存
+_DEFAULT_REPR_MARKER = ' object at 0x'
+
+
+class Frozen:
+    """
+    不可变数据标记：调用方保证被包装的对象之后不会被修改，缓存按对象身份命中
+
+    Example:
+        COMMON = frozen({"env": "staging", "tenant": "t1", ...})
+
+        @pytest.mark.parametrize("case", cases)
+        def test_x(case):
+            AllureHandle.add_testdata_to_report(COMMON, name="公共数据")
+    """
+
+    __slots__ = ('value',)
+
+    def __init__(self, value):
+        self.value = value
+
+    def __repr__(self):
+        return f"frozen({self.value!r})"
+
+
+def frozen(value) -> Frozen:
+    """把对象标记为不可变数据（见 Frozen）"""
+    return value if isinstance(value, Frozen) else Frozen(value)
+
+
+def unfreeze(value):
+    """取出 frozen() 包装的原对象；未包装的对象原样返回"""
+    return value.value if isinstance(value, Frozen) else value
+
+
+def fingerprint(obj) -> Optional[bytes]:
+    """
+    计算对象的结构指纹
+
+    内置容器和标量的 repr 由 C 实现，完整反映内容且远快于带缩进的 JSON 序列化；
+    包含默认 repr 对象（无法反映内容）时返回 None，表示不缓存。
+    """
+    text = repr(obj)
+    if _DEFAULT_REPR_MARKER in text:
+        return None
+    return hashlib.blake2b(text.encode('utf-8', 'surrogatepass'), digest_size=16).digest()
+
+
+class SerializationCache:
+    """
+    序列化结果缓存（线程安全，LRU 淘汰）
+
+    - 缓存键为 (命名空间, 结构指纹)；frozen() 标记的对象为 (命名空间, 对象身份)，并持有对象引用防止身份被复用
+    - 最多保留 max_entries 条、max_bytes 字节，超出时淘汰最久未使用的条目
+    - 命名空间区分同一对象的不同序列化方式（JSON / 不同的 HTML 模板）
+    - by_content=False 时未标记的对象不计算指纹，直接序列化（计入 bypassed）
+    - 编码器或大小策略变化时由 AllureHandle 调用 clear() 清空
+    """
+
+    def __init__(self, max_entries: int = 1024, max_bytes: int = 64 * 1024 * 1024):
+        """
+        Args:
+            max_entries: 最大条目数
+            max_bytes: 缓存结果的最大总字节数（按序列化结果的长度计算）
+        """
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+        self.stats = {
+            "hits": 0,
+            "misses": 0,
+            "evictions": 0,
+            "uncacheable": 0,
+            "bypassed": 0,
+        }
+
+    def encode(self, obj, encode: Callable, namespace: Hashable = 'json', by_content: bool = True):
+        """
+        返回对象的序列化结果，命中缓存时不再调用 encode
+
+        Args:
+            obj: 待序列化对象（可为 frozen() 包装的对象）
+            encode: 序列化函数
+            namespace: 缓存命名空间
+            by_content: 未用 frozen() 标记的对象是否按结构指纹缓存；计算指纹比 encode 更慢时传 False
+
+        Returns:
+            序列化结果（与 encode 的返回值相同）
+        """
+        if isinstance(obj, Frozen):
+            value = obj.value
+            key, owner = (namespace, 'id', id(value)), value
+        elif not by_content:
+            with self._lock:
+                self.stats["bypassed"] += 1
+            return encode(obj)
+        else:
+            value = obj
+            digest = fingerprint(value)
+            if digest is None:
+                with self._lock:
+                    self.stats["uncacheable"] += 1
+                return encode(value)
+            key, owner = (namespace, digest), None
+        with self._lock:
+            cached = self._entries.get(key)
+            if cached is not None and cached[1] is owner:
+                self._entries.move_to_end(key)
+                self.stats["hits"] += 1
+                return cached[0]
+            self.stats["misses"] += 1
+        body = encode(value)
+        self._remember(key, body, owner)
+        return body
+
+    def wrap(self, encode: Callable, namespace: Hashable = 'json', by_content: bool = True) -> Callable:
+        """返回带缓存的序列化函数（可在工作线程中调用），参数同 encode"""
+        return lambda obj: self.encode(obj, encode, namespace, by_content)
+
+    def _remember(self, key, body, owner):
+        if not isinstance(body, (str, bytes, bytearray)):
+            return  # 流式序列化结果（JsonStream）只能写出一次，不缓存
+        size = len(body)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._size -= len(previous[0])
+            self._entries[key] = (body, owner)
+            self._size += size
+            while len(self._entries) > self.max_entries or self._size > self.max_bytes:
+                evicted, _ = self._entries.popitem(last=False)[1]
+                self._size -= len(evicted)
+                self.stats["evictions"] += 1
+
+    def clear(self):
+        """清空缓存（统计保留）"""
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+
+    def summary(self) -> Dict:
+        """返回缓存统计：命中、未命中、淘汰、不可缓存、跳过指纹次数，当前条目数和字节数"""
+        with self._lock:
+            return dict(self.stats, entries=len(self._entries), bytes=self._size)
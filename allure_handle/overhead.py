@@ -0,0 +1,251 @@
+# -*- coding:UTF-8 -*-
+"""
+报告开销统计
+按 (用例, 方法) 记录 AllureHandle 自身的耗时：方法总耗时、序列化耗时、附件写入耗时、附件数和字节数，
+用于区分夜间回归变慢是被测系统的问题还是报告生成的问题
+"""
+import json
+import os
+import socket
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+from allure_handle.policy import _size_of
+
+# 不在用例中调用时使用的用例名
+SESSION_TEST = '(session)'
+
+FIELDS = ('calls', 'total_seconds', 'serialize_seconds', 'attach_seconds', 'attachments', 'bytes')
+
+
+class _Context:
+    """一次最外层方法调用的归属（用例, 方法）；序列化可能在工作线程中完成，上下文随任务一起传递"""
+
+    __slots__ = ('test', 'method')
+
+    def __init__(self, test: str, method: str):
+        self.test = test
+        self.method = method
+
+
+class OverheadStats:
+    """
+    报告开销统计（线程安全）
+
+    - total_seconds: 测试线程在 add_* 方法中花费的时间（含惰性参数求值）
+    - serialize_seconds: 序列化耗时（后台写入模式下发生在工作线程中）
+    - attach_seconds: 测试线程把附件交给 Allure / 写入器 / 捕获缓冲区的耗时
+    """
+
+    def __init__(self):
+        self._stats: Dict[str, Dict[str, List]] = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._test = SESSION_TEST
+        self._sinks: List[Callable] = []
+
+    def add_sink(self, sink: Callable):
+        """
+        添加自定义输出：每个用例结束时调用 sink(test, method, stats)，stats 为该方法在该用例中的统计字典
+        """
+        self._sinks.append(sink)
+
+    def begin(self, test: str):
+        """开始统计一个用例（由 pytest 插件调用）"""
+        self._test = test
+
+    def end(self):
+        """结束当前用例，把该用例的统计推送给自定义输出"""
+        test, self._test = self._test, SESSION_TEST
+        if not self._sinks:
+            return
+        with self._lock:
+            methods = {method: self._row(values) for method, values in self._stats.get(test, {}).items()}
+        for method, stats in methods.items():
+            for sink in self._sinks:
+                try:
+                    sink(test, method, stats)
+                except Exception:  # 自定义输出的异常不影响用例
+                    pass
+
+    def enter(self, method: str) -> Optional[float]:
+        """
+        进入 add_* 方法；嵌套调用时返回 None，只统计最外层方法
+
+        Returns:
+            开始时间，传给 leave
+        """
+        if getattr(self._local, 'context', None) is not None:
+            return None
+        self._local.context = _Context(self._test, method)
+        return time.perf_counter()
+
+    def leave(self, started: Optional[float]):
+        """离开最外层 add_* 方法"""
+        if started is None:
+            return
+        context, self._local.context = self._local.context, None
+        self._add(context, calls=1, total_seconds=time.perf_counter() - started)
+
+    def call_context(self, method: str) -> _Context:
+        """不绑定线程的上下文：协程中使用，同一线程上并发的协程各自持有自己的上下文"""
+        return _Context(self._test, method)
+
+    def add_call(self, context: _Context, seconds: float):
+        """记录一次用 call_context 统计的方法调用"""
+        self._add(context, calls=1, total_seconds=seconds)
+
+    def context(self) -> Optional[_Context]:
+        """当前线程正在统计的上下文"""
+        return getattr(self._local, 'context', None)
+
+    def timed_encode(self, encode: Callable, context: Optional[_Context]) -> Callable:
+        """包装序列化函数，把耗时和输出字节数计入调用时的上下文（可在任意线程中执行）"""
+        if context is None:
+            return encode
+
+        def wrapper(payload):
+            started = time.perf_counter()
+            body = encode(payload)
+            elapsed = time.perf_counter() - started
+            # 同步写入时序列化发生在交付过程中，记录本线程的序列化耗时以便从交付耗时中扣除
+            self._local.serialize_seconds = getattr(self._local, 'serialize_seconds', 0.0) + elapsed
+            self._add(context, serialize_seconds=elapsed, bytes=_size_of(body))
+            return body
+        return wrapper
+
+    def attaching(self, context: Optional[_Context], size: int = 0) -> '_AttachTimer':
+        """
+        统计一次附件交付的上下文管理器，交付耗时不含其中的序列化耗时
+
+        Args:
+            context: context() 返回的上下文
+            size: 未经序列化的附件字节数（可在 with 块中通过 timer.size 更新）
+        """
+        return _AttachTimer(self, context, size)
+
+    def _add(self, context: _Context, **values):
+        with self._lock:
+            row = self._stats.setdefault(context.test, {}).get(context.method)
+            if row is None:
+                row = self._stats[context.test][context.method] = [0, 0.0, 0.0, 0.0, 0, 0]
+            for index, field in enumerate(FIELDS):
+                if field in values:
+                    row[index] += values[field]
+
+    @staticmethod
+    def _row(values: List) -> Dict:
+        return dict(zip(FIELDS, values))
+
+    def merge(self, other: 'OverheadStats'):
+        """合并另一个统计（例如其他 xdist worker 的结果）"""
+        with self._lock:
+            for test, methods in other._stats.items():
+                for method, values in methods.items():
+                    row = self._stats.setdefault(test, {}).setdefault(method, [0, 0.0, 0.0, 0.0, 0, 0])
+                    for index, value in enumerate(values):
+                        row[index] += value
+
+    def to_dict(self) -> Dict:
+        """完整数据：{tests: {用例: {方法: 统计}}, methods: {方法: 统计}, totals: 统计}"""
+        with self._lock:
+            tests = {test: {method: self._row(values) for method, values in methods.items()}
+                     for test, methods in self._stats.items()}
+        methods, totals = {}, dict.fromkeys(FIELDS, 0)
+        for per_test in tests.values():
+            for method, stats in per_test.items():
+                row = methods.setdefault(method, dict.fromkeys(FIELDS, 0))
+                for field in FIELDS:
+                    row[field] += stats[field]
+                    totals[field] += stats[field]
+        return {'tests': tests, 'methods': methods, 'totals': totals}
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'OverheadStats':
+        stats = cls()
+        for test, methods in data.get('tests', {}).items():
+            stats._stats[test] = {method: [row[field] for field in FIELDS] for method, row in methods.items()}
+        return stats
+
+    def top_tests(self, n: int = 10) -> List[Dict]:
+        """报告开销最大的 n 个用例"""
+        rows = []
+        for test, methods in self.to_dict()['tests'].items():
+            row = {'test': test}
+            for field in FIELDS:
+                row[field] = sum(stats[field] for stats in methods.values())
+            rows.append(row)
+        rows.sort(key=lambda row: row['total_seconds'], reverse=True)
+        return rows[:n]
+
+    def top_methods(self, n: int = 10) -> List[Dict]:
+        """总开销最大的 n 个方法"""
+        rows = [dict(stats, method=method) for method, stats in self.to_dict()['methods'].items()]
+        rows.sort(key=lambda row: row['total_seconds'], reverse=True)
+        return rows[:n]
+
+    def save(self, path):
+        """保存完整数据（JSON）"""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(path.name + '.tmp')
+        tmp.write_text(json.dumps(self.to_dict(), indent=2, ensure_ascii=False), encoding='utf-8')
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path) -> 'OverheadStats':
+        """加载 save 保存的数据"""
+        return cls.from_dict(json.loads(Path(path).read_text(encoding='utf-8')))
+
+
+class _AttachTimer:
+    __slots__ = ('stats', 'context', 'size', '_started', '_serialized')
+
+    def __init__(self, stats: OverheadStats, context: Optional[_Context], size: int):
+        self.stats = stats
+        self.context = context
+        self.size = size
+
+    def __enter__(self) -> '_AttachTimer':
+        self._serialized = getattr(self.stats._local, 'serialize_seconds', 0.0)
+        self._started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        if self.context is None:
+            return
+        serialized = getattr(self.stats._local, 'serialize_seconds', 0.0) - self._serialized
+        elapsed = time.perf_counter() - self._started - serialized
+        self.stats._add(self.context, attach_seconds=elapsed, attachments=1, bytes=self.size or 0)
+
+
+class StatsdSink:
+    """
+    StatsD 风格的 UDP 输出：每个用例结束时按方法发送计时和计数
+
+    指标名: <prefix>.<method>.total / serialize / attach（ms），attachments / bytes（计数）
+    """
+
+    def __init__(self, host: str = '127.0.0.1', port: int = 8125, prefix: str = 'allure_handle'):
+        self.address = (host, port)
+        self.prefix = prefix
+        self._socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+
+    def __call__(self, test: str, method: str, stats: Dict):
+        name = f"{self.prefix}.{method}"
+        lines = [
+            f"{name}.total:{stats['total_seconds'] * 1000:.3f}|ms",
+            f"{name}.serialize:{stats['serialize_seconds'] * 1000:.3f}|ms",
+            f"{name}.attach:{stats['attach_seconds'] * 1000:.3f}|ms",
+            f"{name}.attachments:{stats['attachments']}|c",
+            f"{name}.bytes:{stats['bytes']}|c",
+        ]
+        try:
+            self._socket.sendto('\n'.join(lines).encode('utf-8'), self.address)
+        except OSError:  # 采集端不可用时丢弃
+            pass
+
+    def close(self):
+        self._socket.close()
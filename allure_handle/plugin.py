@@ -0,0 +1,662 @@
+# -*- coding:UTF-8 -*-
+"""
+Allure Handle pytest 插件
+通过 pytest11 入口自动加载，所有功能默认关闭，需通过命令行参数开启
+"""
+import os
+import shutil
+from pathlib import Path
+
+import allure
+import pytest
+
+from allure_handle._lifecycle import get_results_dir, set_results_dir
+from allure_handle.aio import AsyncAllureHandle
+from allure_handle.allure_handle import AllureHandle
+from allure_handle.budget import AttachmentBudget, parse_size
+from allure_handle.latency import LatencyStore
+from allure_handle.overhead import OverheadStats, StatsdSink
+from allure_handle.redact import DEFAULT_KEYS, DEFAULT_PATTERNS
+from allure_handle.shards import merge_shards, shard_dir, shards_root
+
+# 失败时捕获 / 日志捕获模式下各用例的汇总结果（setup/call/teardown 中最差的一个）
+_outcomes = {}
+# 会话级状态：最终结果目录、是否合并分片、分片合并统计等
+_session = {}
+
+
+def pytest_addoption(parser):
+    group = parser.getgroup("allure_handle")
+    group.addoption(
+        "--allure-async-writer",
+        dest="allure_async_writer",
+        type=int,
+        default=0,
+        metavar="WORKERS",
+        help="开启后台附件写入模式，指定工作线程数（默认 0 表示同步写入）"
+    )
+    group.addoption(
+        "--allure-async-queue",
+        dest="allure_async_queue",
+        type=int,
+        default=256,
+        metavar="SIZE",
+        help="后台写入队列最大长度，队列满时测试线程阻塞等待（默认 256）"
+    )
+    group.addoption(
+        "--allure-capture-on-failure",
+        dest="allure_capture_on_failure",
+        action="store_true",
+        default=False,
+        help="只为失败/出错的用例写入附件，通过的用例只保留附件摘要"
+    )
+    group.addoption(
+        "--allure-dedup",
+        dest="allure_dedup",
+        choices=("reference", "hardlink"),
+        default=None,
+        help="开启会话级附件去重：reference 引用已有文件，hardlink 硬链接到已有文件"
+    )
+    group.addoption(
+        "--allure-shards",
+        dest="allure_shards",
+        action="store_true",
+        default=False,
+        help="pytest-xdist 下每个 worker 写入独立的分片目录，会话结束后合并到 --alluredir"
+    )
+    group.addoption(
+        "--allure-shards-keep",
+        dest="allure_shards_keep",
+        action="store_true",
+        default=False,
+        help="会话结束后不合并分片（稍后使用 allure-handle-merge 合并）"
+    )
+    group.addoption(
+        "--allure-latency",
+        dest="allure_latency",
+        action="store_true",
+        default=False,
+        help="按接口统计 add_response_to_report 的响应时间，会话结束时附加 p50/p95/p99/max"
+    )
+    group.addoption(
+        "--allure-latency-export",
+        dest="allure_latency_export",
+        default=None,
+        metavar="PATH",
+        help="延迟统计导出文件（JSON，供 CI 回归门禁使用），默认 <alluredir>.latency.json"
+    )
+    group.addoption(
+        "--allure-overhead",
+        dest="allure_overhead",
+        action="store_true",
+        default=False,
+        help="统计 AllureHandle 自身的开销（序列化、附件写入、附件数、字节数），在终端汇总中输出"
+    )
+    group.addoption(
+        "--allure-overhead-json",
+        dest="allure_overhead_json",
+        default=None,
+        metavar="PATH",
+        help="开销统计完整数据输出文件，默认 <alluredir>.overhead.json"
+    )
+    group.addoption(
+        "--allure-overhead-top",
+        dest="allure_overhead_top",
+        type=int,
+        default=10,
+        metavar="N",
+        help="终端汇总中输出开销最大的 N 个用例和方法（默认 10）"
+    )
+    group.addoption(
+        "--allure-overhead-statsd",
+        dest="allure_overhead_statsd",
+        default=None,
+        metavar="HOST:PORT",
+        help="每个用例结束时以 StatsD 格式通过 UDP 发送开销统计"
+    )
+    group.addoption(
+        "--allure-max-bytes",
+        dest="allure_max_bytes",
+        default=None,
+        metavar="LIMITS",
+        help="附件字节上限，超出时保留头尾：BYTES 或 TYPE=BYTES,...（如 JSON=1048576,TEXT=262144,default=524288）"
+    )
+    group.addoption(
+        "--allure-json-array-keep",
+        dest="allure_json_array_keep",
+        type=int,
+        default=None,
+        metavar="N",
+        help="JSON 附件中的大数组只保留首尾各 N 个元素"
+    )
+    group.addoption(
+        "--allure-gzip-threshold",
+        dest="allure_gzip_threshold",
+        type=int,
+        default=None,
+        metavar="BYTES",
+        help="不小于该字节数的附件 gzip 压缩存储"
+    )
+    group.addoption(
+        "--allure-serialization-cache",
+        dest="allure_serialization_cache",
+        type=int,
+        default=0,
+        metavar="N",
+        help="缓存最近 N 个测试数据/用例描述的序列化结果，参数化用例的相同数据只序列化一次（默认 0，不缓存）"
+    )
+    group.addoption(
+        "--allure-redact",
+        dest="allure_redact",
+        action="store_true",
+        default=False,
+        help="序列化时脱敏 Authorization、Cookie、token、密码、邮箱等敏感信息"
+    )
+    group.addoption(
+        "--allure-redact-keys",
+        dest="allure_redact_keys",
+        default=None,
+        metavar="KEYS",
+        help="在默认规则之外额外脱敏的字段名，逗号分隔，支持通配符（如 phone,*_no）"
+    )
+    group.addoption(
+        "--allure-redact-paths",
+        dest="allure_redact_paths",
+        default=None,
+        metavar="PATHS",
+        help="按 JSON 路径脱敏，逗号分隔（如 $.data[*].user.phone）"
+    )
+    group.addoption(
+        "--allure-redact-patterns",
+        dest="allure_redact_patterns",
+        default=None,
+        metavar="NAMES",
+        help="在默认值规则之外额外开启的预置规则，逗号分隔（cn_mobile / cn_id_card / card_number）"
+    )
+    group.addoption(
+        "--allure-consolidate",
+        dest="allure_consolidate",
+        action="store_true",
+        default=False,
+        help="合并步骤模式：请求/响应字段写为步骤参数，较长内容打包进每个用例一个附件，减少附件文件数"
+    )
+    group.addoption(
+        "--allure-consolidate-threshold",
+        dest="allure_consolidate_threshold",
+        type=int,
+        default=64 * 1024,
+        metavar="BYTES",
+        help="合并步骤模式下超过该长度的正文单独写成附件文件（默认 64KB）"
+    )
+    group.addoption(
+        "--allure-budget",
+        dest="allure_budget",
+        default=None,
+        metavar="LIMITS",
+        help="附件预算，如 test_bytes=50MB,test_count=500,session_bytes=5GB,session_count=100000；"
+             "用量越接近预算写得越少（完整 → 截断 → 摘要 → 只计数），会话结束时附加被省略附件的报告"
+    )
+    group.addoption(
+        "--allure-budget-truncate-bytes",
+        dest="allure_budget_truncate_bytes",
+        default="4KB",
+        metavar="BYTES",
+        help="附件预算进入截断阶段后每个文本附件保留的字节数（默认 4KB）"
+    )
+    group.addoption(
+        "--allure-log-capture",
+        dest="allure_log_capture",
+        choices=("always", "failure"),
+        default=None,
+        help="把每个用例的 logging 日志附加到报告：always 每个用例都附加，failure 只为失败/出错的用例附加"
+    )
+    group.addoption(
+        "--allure-log-level",
+        dest="allure_log_level",
+        default="INFO",
+        metavar="LEVEL",
+        help="日志捕获的最低级别（默认 INFO）"
+    )
+    group.addoption(
+        "--allure-log-max-bytes",
+        dest="allure_log_max_bytes",
+        type=int,
+        default=4 * 1024 * 1024,
+        metavar="BYTES",
+        help="每个用例最多保留的日志字节数，超出后丢弃最早的记录（默认 4MB）"
+    )
+    group.addoption(
+        "--allure-log-max-records",
+        dest="allure_log_max_records",
+        type=int,
+        default=None,
+        metavar="N",
+        help="每个用例最多保留的日志条数（默认不限制）"
+    )
+
+
+@pytest.hookimpl(trylast=True)
+def pytest_configure(config):
+    _session["results_dir"] = get_results_dir()
+    if config.getoption("allure_shards"):
+        _configure_shards(config)
+    # allure-pytest 注册监听器之后再检测，整个会话只检测一次
+    AllureHandle.refresh_active()
+    workers = config.getoption("allure_async_writer")
+    if workers > 0:
+        AllureHandle.enable_async_writer(workers=workers, max_queue=config.getoption("allure_async_queue"))
+    if config.getoption("allure_capture_on_failure"):
+        AllureHandle.enable_failure_capture()
+    if config.getoption("allure_dedup"):
+        AllureHandle.enable_dedup(mode=config.getoption("allure_dedup"))
+    if config.getoption("allure_latency"):
+        AllureHandle.enable_latency_stats()
+    if config.getoption("allure_overhead") and AllureHandle._active:
+        overhead = AllureHandle.enable_overhead_stats()
+        statsd = config.getoption("allure_overhead_statsd")
+        if statsd:
+            host, _, port = statsd.rpartition(":")
+            overhead.add_sink(StatsdSink(host or "127.0.0.1", int(port)))
+    max_bytes = config.getoption("allure_max_bytes")
+    json_array_keep = config.getoption("allure_json_array_keep")
+    gzip_threshold = config.getoption("allure_gzip_threshold")
+    if max_bytes or json_array_keep is not None or gzip_threshold is not None:
+        AllureHandle.enable_payload_policy(max_bytes=_parse_limits(max_bytes), json_array_keep=json_array_keep,
+                                           gzip_threshold=gzip_threshold)
+    if config.getoption("allure_redact"):
+        AllureHandle.enable_redaction(
+            keys=DEFAULT_KEYS + _split(config.getoption("allure_redact_keys")),
+            paths=_split(config.getoption("allure_redact_paths")),
+            patterns=DEFAULT_PATTERNS + _split(config.getoption("allure_redact_patterns")),
+        )
+    if config.getoption("allure_serialization_cache") > 0:
+        AllureHandle.enable_serialization_cache(max_entries=config.getoption("allure_serialization_cache"))
+    if config.getoption("allure_consolidate"):
+        AllureHandle.enable_consolidated_steps(body_threshold=config.getoption("allure_consolidate_threshold"))
+    if config.getoption("allure_budget"):
+        AllureHandle.enable_budget(truncate_bytes=config.getoption("allure_budget_truncate_bytes"),
+                                   **_parse_budget(config.getoption("allure_budget")))
+    if config.getoption("allure_log_capture") and AllureHandle._active:
+        level = config.getoption("allure_log_level")
+        AllureHandle.enable_log_capture(
+            level=int(level) if level.isdigit() else level.upper(),
+            max_bytes=config.getoption("allure_log_max_bytes"),
+            max_records=config.getoption("allure_log_max_records"),
+            mode=config.getoption("allure_log_capture")
+        )
+        if getattr(config.option, "attach_capture", False):
+            # allure-pytest 内置的 "log" 附件与本插件的日志附件重复：关闭内置捕获附件，stdout/stderr 由本插件照常附加
+            config.option.attach_capture = False
+            _session["attach_capture"] = True
+
+
+def _parse_limits(value):
+    """解析 --allure-max-bytes：BYTES 或 TYPE=BYTES,..."""
+    if not value:
+        return None
+    if "=" not in value:
+        return int(value)
+    limits = {}
+    for item in value.split(","):
+        type_name, _, limit = item.partition("=")
+        limits[type_name.strip()] = int(limit)
+    return limits
+
+
+def _split(value) -> tuple:
+    """解析逗号分隔的列表参数"""
+    return tuple(item.strip() for item in value.split(",") if item.strip()) if value else ()
+
+
+def _parse_budget(value):
+    """解析 --allure-budget：NAME=LIMIT,...，字节数可带 KB / MB / GB 后缀"""
+    limits = {}
+    for item in value.split(","):
+        name, _, limit = item.partition("=")
+        name = name.strip()
+        if name not in ("test_bytes", "test_count", "session_bytes", "session_count"):
+            raise pytest.UsageError(f"--allure-budget 不支持的预算: {name}")
+        limits[name] = parse_size(limit) if name.endswith("_bytes") else int(limit)
+    return limits
+
+
+def pytest_runtest_logstart(nodeid, location):
+    capture = AllureHandle._capture
+    if capture is not None:
+        capture.begin()
+    log_handler = AllureHandle._log_handler
+    if log_handler is not None:
+        log_handler.begin()
+    if capture is not None or log_handler is not None:
+        _outcomes[nodeid] = "passed"
+    if AllureHandle._overhead is not None:
+        AllureHandle._overhead.begin(nodeid)
+    if AllureHandle._consolidated is not None:
+        AllureHandle._consolidated.begin()
+    if AllureHandle._budget is not None:
+        AllureHandle._budget.begin(nodeid)
+
+
+def pytest_runtest_logfinish(nodeid, location):
+    if AllureHandle._overhead is not None:
+        AllureHandle._overhead.end()
+    if AllureHandle._budget is not None:
+        # 后台写入模式下序列化后才计入字节数，先等待当前用例的附件写完
+        AllureHandle.flush()
+        AllureHandle._budget.end()
+
+
+@pytest.hookimpl(hookwrapper=True)
+def pytest_runtest_makereport(item, call):
+    report = (yield).get_result()
+    if item.nodeid not in _outcomes:
+        return
+    if report.failed or (report.skipped and _outcomes[item.nodeid] != "failed"):
+        _outcomes[item.nodeid] = report.outcome
+    if call.when == "teardown":
+        # 用例仍处于打开状态，teardown 阶段的日志也包含在内
+        _finish_logs(_outcomes.pop(item.nodeid))
+        if _session.get("attach_capture"):
+            _attach_captured_output(report)
+
+
+@pytest.hookimpl(hookwrapper=True)
+def pytest_runtest_teardown(item):
+    # 在 fixture 清理（fixture 容器写出）之前根据 setup/call 结果决定是否写出暂存的附件，
+    # teardown 阶段产生的附件直接写入；请求/响应包先于此写出，同样只在失败时保留
+    AllureHandle.add_consolidated_bundle()
+    _finish_capture(item.nodeid)
+    # 通过的用例暂存附件已被丢弃，此时统计的才是真正写出的附件文件数
+    AllureHandle.count_consolidated_files()
+    yield
+    # 用例结束前确保附件全部落盘
+    AllureHandle.flush()
+
+
+def _finish_capture(nodeid: str):
+    capture = AllureHandle._capture
+    outcome = _outcomes.get(nodeid)
+    if capture is None or outcome is None:
+        return
+    if outcome == "failed":
+        capture.commit(AllureHandle._writer, store=AllureHandle._store)
+        return
+    names = capture.discard()
+    if names:
+        AllureHandle.add_testdata_to_report(capture.summary(outcome, names), "附件摘要")
+
+
+def _finish_logs(outcome: str):
+    log_handler = AllureHandle._log_handler
+    if log_handler is None:
+        return
+    buffer = log_handler.take()
+    if buffer is None or (log_handler.mode == "failure" and outcome != "failed"):
+        return
+    AllureHandle.add_log_to_report(buffer, name="日志")
+
+
+def _attach_captured_output(report):
+    """代替 allure-pytest 内置的捕获附件：日志已由本插件附加，只附加 stdout/stderr"""
+    for name, text in (("stdout", report.capstdout), ("stderr", report.capstderr)):
+        if text:
+            allure.attach(text, name=name, attachment_type=allure.attachment_type.TEXT)
+
+
+def _configure_shards(config):
+    results_dir = _session["results_dir"]
+    if results_dir is None:
+        return
+    worker_id = os.environ.get("PYTEST_XDIST_WORKER")
+    if worker_id:
+        set_results_dir(shard_dir(results_dir, worker_id))
+    else:
+        # 主进程：清理上次运行遗留的分片，避免被合并进本次结果
+        shutil.rmtree(shards_root(results_dir), ignore_errors=True)
+        _session["merge_shards"] = not config.getoption("allure_shards_keep")
+
+
+def pytest_sessionfinish(session):
+    results_dir = _session.get("results_dir")
+    if results_dir is None:
+        return
+    writer = AllureHandle._writer
+    if writer is not None:
+        writer.flush(warn=False)
+        writer.take_errors()  # 由终端摘要统一报告，避免 unconfigure 时重复警告
+        _session["writer_errors"] = list(writer.errors)
+    if AllureHandle._latency is not None:
+        _finish_latency(session.config, results_dir)
+    if AllureHandle._overhead is not None:
+        _finish_overhead(session.config, results_dir)
+    if AllureHandle._budget is not None:
+        _finish_budget(results_dir)
+    if _session.pop("merge_shards", False):
+        _session["shards_stats"] = merge_shards(results_dir)
+
+
+def _gather(results_dir: Path, suffix: str, store, load) -> bool:
+    """
+    汇总各 xdist worker 的会话级统计
+
+    worker 把原始数据保存到 <alluredir><suffix>/<worker>.json 后返回 False；
+    主进程（或未使用 xdist 时）合并全部 worker 的数据并返回 True
+    """
+    parts_dir = results_dir.with_name(results_dir.name + suffix)
+    worker_id = os.environ.get("PYTEST_XDIST_WORKER")
+    if worker_id:
+        store.save(parts_dir / f"{worker_id}.json")
+        return False
+    if parts_dir.is_dir():
+        for part in sorted(parts_dir.glob("*.json")):
+            store.merge(load(part))
+        shutil.rmtree(parts_dir, ignore_errors=True)
+    return True
+
+
+def _finish_overhead(config, results_dir: Path):
+    overhead = AllureHandle._overhead
+    if not _gather(results_dir, ".overhead-parts", overhead, OverheadStats.load):
+        return
+    path = config.getoption("allure_overhead_json") or results_dir.with_name(results_dir.name + ".overhead.json")
+    overhead.save(path)
+    _session["overhead_json"] = path
+
+
+def _finish_latency(config, results_dir: Path):
+    store = AllureHandle._latency
+    if not _gather(results_dir, ".latency", store, LatencyStore.load) or not len(store):
+        return
+    export_path = config.getoption("allure_latency_export") or results_dir.with_name(results_dir.name + ".latency.json")
+    store.export(export_path)
+    _session["latency_export"] = export_path
+    encoder = AllureHandle._encoder
+    allure.global_attach(encoder.encode(store.report()), name="接口延迟分布 (JSON)",
+                         attachment_type=allure.attachment_type.JSON)
+    allure.global_attach(store.to_html(AllureHandle.description_stylesheet), name="接口延迟分布",
+                         attachment_type=allure.attachment_type.HTML)
+
+
+def _finish_budget(results_dir: Path):
+    budget = AllureHandle._budget
+    if not _gather(results_dir, ".budget-parts", budget, AttachmentBudget.load):
+        return
+    path = results_dir.with_name(results_dir.name + ".budget.json")
+    budget.save(path)
+    _session["budget_json"] = path
+    stats = budget.summary()
+    if stats["truncated"] + stats["summary"] + stats["dropped"]:
+        encoder = AllureHandle._encoder
+        allure.global_attach(encoder.encode(budget.to_dict()), name="附件预算 (JSON)",
+                             attachment_type=allure.attachment_type.JSON)
+        allure.global_attach(budget.to_html(AllureHandle.description_stylesheet), name="附件预算",
+                             attachment_type=allure.attachment_type.HTML)
+
+
+def pytest_terminal_summary(terminalreporter):
+    export_path = _session.pop("latency_export", None)
+    if export_path is not None:
+        terminalreporter.write_sep("-", "allure_handle 接口延迟")
+        for row in AllureHandle._latency.report()[:10]:
+            terminalreporter.write_line(
+                f"{row['endpoint']}: n={row['count']} p50={row['p50_ms']:.1f}ms "
+                f"p95={row['p95_ms']:.1f}ms p99={row['p99_ms']:.1f}ms max={row['max_ms']:.1f}ms"
+            )
+        terminalreporter.write_line(f"完整数据: {export_path}")
+    stats = _session.pop("shards_stats", None)
+    if stats is not None:
+        terminalreporter.write_sep("-", "allure_handle 分片合并")
+        terminalreporter.write_line(
+            f"{stats['shards']} 个分片, {stats['files']} 个文件; "
+            f"扫描 {stats['scan_seconds']:.3f}s, 移动 {stats['move_seconds']:.3f}s, "
+            f"元数据 {stats['metadata_seconds']:.3f}s, 清理 {stats['cleanup_seconds']:.3f}s"
+        )
+    _report_writer(terminalreporter)
+    _report_dedup(terminalreporter)
+    _report_policy(terminalreporter)
+    _report_memo(terminalreporter)
+    _report_redaction(terminalreporter)
+    _report_consolidated(terminalreporter)
+    _report_budget(terminalreporter)
+    _report_overhead(terminalreporter)
+
+
+def _report_overhead(terminalreporter):
+    path = _session.pop("overhead_json", None)
+    if path is None:
+        return
+    overhead = AllureHandle._overhead
+    top = terminalreporter.config.getoption("allure_overhead_top")
+    totals = overhead.to_dict()["totals"]
+    terminalreporter.write_sep("-", "allure_handle 报告开销")
+    terminalreporter.write_line(
+        f"总计: {totals['total_seconds']:.3f}s（序列化 {totals['serialize_seconds']:.3f}s, "
+        f"附件交付 {totals['attach_seconds']:.3f}s）, {totals['attachments']} 个附件, "
+        f"{totals['bytes'] / 1024 / 1024:.2f} MB"
+    )
+    for title, key, rows in (("开销最大的用例", "test", overhead.top_tests(top)),
+                             ("开销最大的方法", "method", overhead.top_methods(top))):
+        terminalreporter.write_line(f"{title}:")
+        for row in rows:
+            terminalreporter.write_line(
+                f"  {row['total_seconds']:8.3f}s  序列化 {row['serialize_seconds']:7.3f}s  "
+                f"交付 {row['attach_seconds']:7.3f}s  {row['attachments']:5d} 个附件  "
+                f"{row['bytes'] / 1024:10.1f} KB  {row[key]}"
+            )
+    terminalreporter.write_line(f"完整数据: {path}")
+
+
+def _report_policy(terminalreporter):
+    policy = AllureHandle._policy
+    if policy is None:
+        return
+    AllureHandle.flush()
+    stats = policy.summary()
+    terminalreporter.write_sep("-", "allure_handle 附件大小策略")
+    terminalreporter.write_line(
+        f"附件: {stats['attachments']}, 截断: {stats['truncated']}, 压缩: {stats['gzipped']}, "
+        f"节省: {stats['bytes_saved'] / 1024 / 1024:.2f} MB"
+    )
+
+
+def _report_memo(terminalreporter):
+    memo = AllureHandle._memo
+    if memo is None:
+        return
+    AllureHandle.flush()
+    stats = memo.summary()
+    terminalreporter.write_sep("-", "allure_handle 序列化缓存")
+    terminalreporter.write_line(
+        f"命中: {stats['hits']}, 未命中: {stats['misses']}, 淘汰: {stats['evictions']}, "
+        f"不可缓存: {stats['uncacheable']}, 跳过指纹: {stats['bypassed']}, 条目: {stats['entries']} ({stats['bytes'] / 1024 / 1024:.2f} MB)"
+    )
+
+
+def _report_redaction(terminalreporter):
+    redactor = AllureHandle._redactor
+    if redactor is None:
+        return
+    AllureHandle.flush()
+    stats = redactor.summary()
+    terminalreporter.write_sep("-", "allure_handle 敏感信息脱敏")
+    terminalreporter.write_line(
+        f"对象: {stats['objects']}（预检后无需遍历: {stats['prefiltered']}, 顶层字段预先脱敏: {stats['shallow']}）, "
+        f"按字段名: {stats['keys']}, "
+        f"按路径: {stats['paths']}, 按值规则: {stats['values']} 处（{stats['texts']} 个字符串）"
+    )
+
+
+def _report_consolidated(terminalreporter):
+    consolidated = AllureHandle._consolidated
+    if consolidated is None:
+        return
+    stats = consolidated.summary()
+    terminalreporter.write_sep("-", "allure_handle 合并步骤")
+    terminalreporter.write_line(
+        f"用例: {stats['tests']}, 步骤: {stats['steps']}, 步骤参数: {stats['parameters']}, "
+        f"打包: {stats['packed']}, 单独附件: {stats['spilled']}, 请求/响应包: {stats['bundles']}"
+    )
+    terminalreporter.write_line(
+        f"每个用例附件文件数: 平均 {stats['files_per_test']:.1f}, 最多 {stats['max_files']}"
+    )
+
+
+def _report_budget(terminalreporter):
+    path = _session.pop("budget_json", None)
+    if path is None:
+        return
+    report = AllureHandle._budget.to_dict()
+    stats = report["session"]
+    terminalreporter.write_sep("-", "allure_handle 附件预算")
+    terminalreporter.write_line(
+        f"附件: {stats['attachments']} ({stats['bytes'] / 1024 / 1024:.2f} MB), 完整: {stats['full']}, "
+        f"截断: {stats['truncated']}, 只写摘要: {stats['summary']}, 未写出: {stats['dropped']}, "
+        f"省略: {stats['bytes_dropped'] / 1024 / 1024:.2f} MB"
+    )
+    for row in report["tests"][:10]:
+        terminalreporter.write_line(
+            f"  截断 {row['truncated']:4d}  摘要 {row['summary']:4d}  未写出 {row['dropped']:4d}  "
+            f"{row['bytes_dropped'] / 1024:10.1f} KB  {row['test']}"
+        )
+    terminalreporter.write_line(f"完整数据: {path}")
+
+
+def _report_writer(terminalreporter):
+    errors = _session.pop("writer_errors", None)
+    if not errors:
+        return
+    terminalreporter.write_sep("-", "allure_handle 后台写入失败", red=True)
+    for name, e in errors[:20]:
+        terminalreporter.write_line(f"{name}: {type(e).__name__}: {e}", red=True)
+    if len(errors) > 20:
+        terminalreporter.write_line(f"... 共 {len(errors)} 个附件未写出", red=True)
+
+
+def _report_dedup(terminalreporter):
+    dedup = AllureHandle._dedup
+    if dedup is None:
+        return
+    AllureHandle.flush()
+    stats = dedup.summary()
+    terminalreporter.write_sep("-", "allure_handle 附件去重")
+    terminalreporter.write_line(
+        f"重复附件: {stats['hits']}, 节省: {stats['bytes_saved'] / 1024 / 1024:.2f} MB, "
+        f"索引条目: {stats['entries']}, 淘汰: {stats['evictions']}"
+    )
+
+
+def pytest_unconfigure(config):
+    _session.clear()
+    AllureHandle.disable_overhead_stats()
+    AllureHandle._active = None
+    AllureHandle.disable_async_writer()
+    AllureHandle.disable_failure_capture()
+    AllureHandle.disable_dedup()
+    AllureHandle.disable_payload_policy()
+    AllureHandle.disable_latency_stats()
+    AllureHandle.disable_log_capture()
+    AllureHandle.disable_serialization_cache()
+    AllureHandle.disable_consolidated_steps()
+    AllureHandle.disable_budget()
+    AllureHandle.disable_redaction()
+    AsyncAllureHandle.shutdown()
@@ -0,0 +1,301 @@
+# -*- coding:UTF-8 -*-
+"""
+附件大小策略
+按附件类型限制字节数（超出时保留头尾并插入省略标记）、截断 JSON 大数组（保留首尾 N 个元素）、
+超过阈值时 gzip 压缩；被截断或压缩的附件在名称中记录原始大小和处理方式。
+压缩结果不含时间戳，内容相同的附件压缩后仍然相同，可以去重
+"""
+import threading
+import zlib
+from typing import Dict, Iterable, Iterator, Optional, Union
+
+import allure
+
+GZIP_MIME_TYPE = 'application/gzip'
+
+# 可以按头尾截取的文本类 MIME 类型（图片等二进制附件截取后无法打开，只做压缩）
+_TEXT_MIME_PREFIXES = ('text/',)
+_TEXT_MIME_TYPES = {'application/json', 'application/xml', 'image/svg-xml', 'application/x-yaml'}
+
+
+def _human_size(size: int) -> str:
+    for unit in ('B', 'KB', 'MB'):
+        if size < 1024:
+            return f"{size:.0f} {unit}" if unit == 'B' else f"{size:.1f} {unit}"
+        size /= 1024
+    return f"{size:.1f} GB"
+
+
+def _is_text(mime_type: str) -> bool:
+    return mime_type in _TEXT_MIME_TYPES or mime_type.startswith(_TEXT_MIME_PREFIXES)
+
+
+def sample_bytes(head: bytes, tail: bytes, original_size: int) -> bytes:
+    """
+    拼接头尾并插入省略标记（切分点对齐到 UTF-8 字符边界），大小策略和附件预算截断内容时共用
+
+    Args:
+        head: 保留的开头部分
+        tail: 保留的结尾部分，不保留时传 b''
+        original_size: 原始内容的字节数
+    """
+    head = head.decode('utf-8', 'ignore').encode('utf-8')
+    tail = tail.decode('utf-8', 'ignore').encode('utf-8')
+    omitted = original_size - len(head) - len(tail)
+    marker = f"\n... 已省略 {omitted} 字节（原始大小 {original_size} 字节） ...\n".encode('utf-8')
+    return head + marker + tail
+
+
+class GzippedBytes(bytes):
+    """gzip 压缩后的附件内容；raw 为压缩前的内容，去重按压缩前的内容计算（高压缩比的内容压缩后可能低于去重下限）"""
+
+    raw: bytes = b''
+
+
+def _compressor():
+    """gzip 格式的压缩器：头部 mtime 为 0，相同内容的压缩结果逐字节相同"""
+    return zlib.compressobj(6, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+
+def _size_of(body, default: int = 0) -> int:
+    """str（按 UTF-8）/ bytes 类内容的字节数；其他对象（未序列化的对象、JsonStream、None）返回 default，不做序列化"""
+    if isinstance(body, (bytes, bytearray, memoryview)):
+        return len(body)
+    if isinstance(body, str):
+        return len(body.encode('utf-8'))
+    return default
+
+
+class PayloadPolicy:
+    """
+    附件大小策略
+
+    - max_bytes: 整数（所有类型共用）或 {类型名: 字节数}，类型名为 allure.attachment_type 成员名
+      （JSON / TEXT / HTML ...），'default' 为其他类型的上限
+    - json_array_keep: JSON 数组超过 2N+1 个元素时只保留首尾各 N 个，中间替换为省略标记（序列化之前完成）
+    - gzip_threshold: 截取后仍不小于该字节数的附件 gzip 压缩存储（附件类型变为 application/gzip）
+    """
+
+    def __init__(self, max_bytes: Union[int, Dict[str, int]] = None, head_ratio: float = 0.5,
+                 json_array_keep: int = None, gzip_threshold: int = None):
+        """
+        Args:
+            max_bytes: 字节上限，None 表示不限制
+            head_ratio: 超出上限时保留的内容中头部所占比例，其余保留尾部
+            json_array_keep: JSON 数组首尾各保留的元素数，None 表示不截断
+            gzip_threshold: gzip 压缩阈值（字节），None 表示不压缩
+        """
+        if not 0 <= head_ratio <= 1:
+            raise ValueError(f"head_ratio 必须在 0 到 1 之间: {head_ratio}")
+        limits = max_bytes if isinstance(max_bytes, dict) else {'default': max_bytes}
+        self._limits = {}
+        for type_name, limit in limits.items():
+            if type_name == 'default':
+                continue
+            try:
+                self._limits[allure.attachment_type[type_name.upper()].mime_type] = limit
+            except KeyError:
+                raise ValueError(f"未知的附件类型: {type_name}") from None
+        self._default_limit = limits.get('default')
+        self.head_ratio = head_ratio
+        self.json_array_keep = json_array_keep
+        self.gzip_threshold = gzip_threshold
+        self._lock = threading.Lock()
+        self.stats = {
+            "attachments": 0,
+            "truncated": 0,
+            "gzipped": 0,
+            "bytes_in": 0,
+            "bytes_out": 0,
+        }
+
+    def limit_for(self, mime_type: str) -> Optional[int]:
+        """返回指定 MIME 类型的字节上限，None 表示不限制"""
+        return self._limits.get(mime_type, self._default_limit)
+
+    def truncate_json(self, obj):
+        """
+        截断对象中的大数组（不修改原对象，只复制被保留的部分）
+
+        Returns:
+            截断后的对象；没有需要截断的数组时返回原对象
+        """
+        keep = self.json_array_keep
+        if keep is None:
+            return obj
+        return self._truncate(obj, keep)
+
+    def _truncate(self, obj, keep: int):
+        if isinstance(obj, dict):
+            items = {key: self._truncate(value, keep) for key, value in obj.items()}
+            return obj if all(items[key] is value for key, value in obj.items()) else items
+        if isinstance(obj, (list, tuple)):
+            if len(obj) > 2 * keep + 1:
+                omitted = len(obj) - 2 * keep
+                head = [self._truncate(value, keep) for value in obj[:keep]]
+                tail = [self._truncate(value, keep) for value in obj[len(obj) - keep:]] if keep else []
+                return head + [f"... 省略 {omitted} 个元素（共 {len(obj)} 个） ..."] + tail
+            items = [self._truncate(value, keep) for value in obj]
+            return obj if all(new is old for new, old in zip(items, obj)) else items
+        return obj
+
+    def wrap_encode(self, encode):
+        """返回先截断大数组再序列化的编码函数"""
+        if self.json_array_keep is None:
+            return encode
+        return lambda obj: encode(self.truncate_json(obj))
+
+    def apply(self, body, entry):
+        """
+        对序列化后的附件内容应用字节上限和压缩
+
+        Args:
+            body: 附件内容（str 或 bytes）
+            entry: reserve_attachment_entry 返回的 (文件名, 所属对象, Attachment)
+
+        Returns:
+            (新的附件内容, 新的 entry)；压缩时附件文件名增加 .gz 后缀
+        """
+        data = body.encode('utf-8') if isinstance(body, str) else bytes(body)
+        original_size = len(data)
+        truncated = self.exceeds(entry[2].type, original_size)
+        if truncated:
+            head_size, tail_size = self._split(self.limit_for(entry[2].type))
+            data = sample_bytes(data[:head_size], data[original_size - tail_size:] if tail_size else b'',
+                                original_size)
+        return self._finish(data, original_size, entry, truncated)
+
+    def apply_file(self, source: str, size: int, entry):
+        """
+        对超出上限的文本文件只读取头尾部分（内存占用不超过上限）
+
+        Args:
+            source: 文件路径
+            size: 文件大小
+            entry: reserve_attachment_entry 返回的 (文件名, 所属对象, Attachment)
+
+        Returns:
+            (附件内容, 新的 entry)
+        """
+        head_size, tail_size = self._split(self.limit_for(entry[2].type))
+        with open(source, 'rb') as f:
+            head = f.read(head_size)
+            tail = b''
+            if tail_size:
+                f.seek(size - tail_size)
+                tail = f.read(tail_size)
+        return self._finish(sample_bytes(head, tail, size), size, entry, True)
+
+    def apply_stream(self, chunks: Iterable[bytes], entry):
+        """
+        对流式序列化的附件应用字节上限和压缩，内存占用不超过字节上限（或 gzip 阈值）加一个块
+
+        Args:
+            chunks: 逐块产生 bytes 的可迭代对象（如 JsonStream）
+            entry: reserve_attachment_entry 返回的 (文件名, 所属对象, Attachment)
+
+        Returns:
+            (附件内容, 新的 entry)；内容为 bytes（已截取或总大小低于 gzip 阈值），
+            或逐块产生（压缩后）内容的迭代器，由调用方流式写出
+        """
+        limit = self.limit_for(entry[2].type)
+        if limit is not None and _is_text(entry[2].type):
+            head_size, tail_size = self._split(limit)
+            head, tail, size = bytearray(), bytearray(), 0
+            for chunk in chunks:
+                size += len(chunk)
+                if len(head) < head_size:
+                    take = head_size - len(head)
+                    head += chunk[:take]
+                    chunk = chunk[take:]
+                tail += chunk
+                if len(tail) > tail_size:
+                    del tail[:len(tail) - tail_size]
+            if size <= limit:
+                return self._finish(bytes(head + tail), size, entry, False)
+            return self._finish(sample_bytes(bytes(head), bytes(tail), size), size, entry, True)
+        chunks = iter(chunks)
+        if self.gzip_threshold is None:
+            return self._passthrough(chunks, entry[2]), entry
+        pending = bytearray()
+        for chunk in chunks:
+            pending += chunk
+            if len(pending) >= self.gzip_threshold:
+                entry = self._gzip_entry(entry)
+                return self._gzip_stream(bytes(pending), chunks, entry[2]), entry
+        return self._finish(bytes(pending), len(pending), entry, False)
+
+    def _passthrough(self, chunks: Iterator[bytes], attachment) -> Iterator[bytes]:
+        size = 0
+        for chunk in chunks:
+            size += len(chunk)
+            yield chunk
+        self._count(size, size, False, False)
+
+    def _gzip_stream(self, head: bytes, chunks: Iterator[bytes], attachment) -> Iterator[bytes]:
+        compressor = _compressor()
+        size, written = len(head), 0
+        data = compressor.compress(head)
+        for chunk in chunks:
+            size += len(chunk)
+            if data:
+                written += len(data)
+                yield data
+            data = compressor.compress(chunk)
+        data += compressor.flush()
+        written += len(data)
+        yield data
+        self._count(size, written, False, True)
+        attachment.name = self.label(attachment.name, size, ("gzip",))
+
+    def exceeds(self, mime_type: str, size: int) -> bool:
+        """指定类型、大小的内容是否需要截取"""
+        limit = self.limit_for(mime_type)
+        return limit is not None and size > limit and _is_text(mime_type)
+
+    def _split(self, limit: int):
+        head_size = int(limit * self.head_ratio)
+        return head_size, limit - head_size
+
+    def _finish(self, data: bytes, original_size: int, entry, truncated: bool):
+        attachment = entry[2]
+        gzipped = self.gzip_threshold is not None and len(data) >= self.gzip_threshold
+        if gzipped:
+            compressor = _compressor()
+            raw, data = data, GzippedBytes(compressor.compress(data) + compressor.flush())
+            data.raw = raw
+            entry = self._gzip_entry(entry)
+        self._count(original_size, len(data), truncated, gzipped)
+        notes = [note for note, flag in (("已截断", truncated), ("gzip", gzipped)) if flag]
+        if notes:
+            attachment.name = self.label(attachment.name, original_size, notes)
+        return data, entry
+
+    @staticmethod
+    def label(name: str, original_size: int, notes: Iterable[str] = ()) -> str:
+        """在附件名称后追加原始大小和处理方式，如「响应内容 [原始 12.3 MB, 已截断]」"""
+        return f"{name} [{', '.join((f'原始 {_human_size(original_size)}',) + tuple(notes))}]"
+
+    @staticmethod
+    def _gzip_entry(entry):
+        """附件改为 gzip 存储：文件名增加 .gz 后缀，类型改为 application/gzip"""
+        attachment = entry[2]
+        file_name = entry[0] + '.gz'
+        attachment.source = file_name
+        attachment.type = GZIP_MIME_TYPE
+        return file_name, entry[1], attachment
+
+    def _count(self, bytes_in: int, bytes_out: int, truncated: bool, gzipped: bool):
+        with self._lock:
+            self.stats["attachments"] += 1
+            self.stats["truncated"] += truncated
+            self.stats["gzipped"] += gzipped
+            self.stats["bytes_in"] += bytes_in
+            self.stats["bytes_out"] += bytes_out
+
+    def summary(self) -> Dict:
+        """返回累计统计：处理的附件数、截断数、压缩数和字节数"""
+        with self._lock:
+            stats = dict(self.stats)
+        stats["bytes_saved"] = stats["bytes_in"] - stats["bytes_out"]
+        return stats
@@ -0,0 +1,442 @@
+# -*- coding:UTF-8 -*-
+"""
+敏感信息脱敏
+规则在创建时编译一次：字段名集合 + 字段名通配符合并的正则、JSON 路径前缀树、所有值规则合并的一个正则，
+以及每条规则必然包含的字面量。序列化时先直接编码，在编码结果上用字面量预检（C 实现的子串查找）；
+绝大多数没有敏感信息的对象到此结束，不做任何 Python 层遍历。预检命中时再遍历一次对象，
+只复制包含敏感信息的那几层容器（其余子树与原对象共享）后重新编码。
+顶层两层的小字典中的敏感字段（如请求头里的 Authorization）在编码前就地脱敏，预检时扣除这些字段名本身的出现次数，
+因此只有这类字段命中时仍然只编码一次
+"""
+import fnmatch
+import re
+import threading
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Union
+
+# 默认脱敏的字段名（比较时忽略大小写、'-' 和 '_'），可使用 fnmatch 通配符
+DEFAULT_KEYS = (
+    'authorization', 'proxy-authorization', 'cookie', 'set-cookie', 'session_id',
+    '*token', '*secret', '*password', '*passwd', '*api_key', 'private_key',
+)
+
+# 内置值规则：名称 -> (正则, 匹配内容必然包含的字面量之一)；(?P<keep>...) 分组中的内容保留，其余匹配部分替换为掩码。
+# 字面量用于预检：文本中不含任何一个字面量时不执行该正则；为 None 时总是执行。单字符字面量的查找最快（memchr）
+PRESET_PATTERNS = {
+    'bearer': (r'(?P<keep>\b[Bb]earer\s+)[A-Za-z0-9\-._~+/]+=*', ('earer',)),
+    'basic': (r'(?P<keep>\b[Bb]asic\s+)[A-Za-z0-9+/]{8,}=*', ('asic',)),
+    'jwt': (r'\beyJ[A-Za-z0-9_-]+\.eyJ[A-Za-z0-9_-]+\.[A-Za-z0-9_-]*', ('eyJ',)),
+    'url_credentials': (r'(?P<keep>://)[^/\s:@"]+:[^/\s@"]+(?=@)', ('@',)),
+    # 参数前为 ? / & 或文本开头（urlencoded 表单正文），用后顾断言代替 ^，不影响字面量预检
+    'url_secret_params': (r'(?<![^?&])(?P<keep>(?:access_token|refresh_token|token|api_key|apikey|password|secret|'
+                          r'signature|sig)=)[^&#\s"]+',
+                          ('=',)),
+    'email': (r'(?<![A-Za-z0-9._%+-])[A-Za-z0-9._%+-]+@[A-Za-z0-9-]+(?:\.[A-Za-z0-9-]+)*\.[A-Za-z]{2,}\b', ('@',)),
+    # 以下规则容易误伤订单号等数字，需显式开启
+    'cn_mobile': (r'(?<!\d)1[3-9]\d{9}(?!\d)', None),
+    'cn_id_card': (r'(?<!\d)\d{17}[\dXx](?!\d)', None),
+    'card_number': (r'(?<!\d)(?:\d[ -]?){12,18}\d(?!\d)', None),
+}
+DEFAULT_PATTERNS = ('bearer', 'basic', 'jwt', 'url_credentials', 'url_secret_params', 'email')
+
+_KEEP_GROUP = re.compile(r'\(\?P<keep>')
+# 含锚点的正则在整段编码结果上预检不可靠（先去掉转义字符和字符类再查找 ^ $）
+_ANCHORS = re.compile(r'\^|\$|\\[AZ]')
+_ESCAPE_OR_CLASS = re.compile(r'\\[^AZ]|\[\^?\]?(?:\\.|[^\]\\])*\]')
+_WILDCARD_CLASS = re.compile(r'\[[^\]]*\]')
+_PATH_SEGMENT = re.compile(r'\.([^.\[\]]+)|\[(\*|\d+|"[^"]*"|\'[^\']*\')\]')
+_ASCII_LOWER = bytes.maketrans(bytes(range(65, 91)), bytes(range(97, 123)))
+# 前缀树中标记路径终点的键
+_END = object()
+# 字段名判定结果缓存的最大条目数
+_KEY_CACHE_SIZE = 4096
+# 编码前检查字段名的字典大小上限（顶层及其直接子字典），更大的字典交给预检
+_SHALLOW_KEYS = 64
+
+
+def _normalize(key: str) -> str:
+    return key.lower().replace('-', '').replace('_', '')
+
+
+def _normalize_bytes(data: bytes) -> bytes:
+    """_normalize 的 bytes 版本（只处理 ASCII 大小写），一次 translate 完成"""
+    return data.translate(_ASCII_LOWER, b'-_')
+
+
+def _literal(rule: str) -> Optional[str]:
+    """字段名规则（已规范化）中最长的字面量片段，规则全是通配符时返回 None"""
+    pieces = re.split(r'[*?]', _WILDCARD_CLASS.sub('*', rule))
+    return max(pieces, key=len) or None
+
+
+def _minimal(literals: Iterable[str]) -> tuple:
+    """去掉包含其他字面量的字面量（短的不出现时长的必然不出现），预检时少扫描几遍"""
+    literals = list(dict.fromkeys(literals))
+    return tuple(literal for literal in literals
+                 if not any(other != literal and other in literal for other in literals))
+
+
+def _parse_path(path: str) -> List[str]:
+    """解析 $.data[*].user.phone 形式的路径（$ 可省略），数组下标和 * 均作为字符串"""
+    text = path if path.startswith('$') else '$.' + path
+    segments, position = [], 1
+    for match in _PATH_SEGMENT.finditer(text, 1):
+        if match.start() != position:
+            break
+        name, index = match.groups()
+        segments.append(name if name is not None else index.strip('"\''))
+        position = match.end()
+    if position != len(text) or not segments:
+        raise ValueError(f"无法解析的脱敏路径: {path}")
+    return segments
+
+
+class Redactor:
+    """
+    敏感信息脱敏器
+
+    - keys: 字段名规则，命中的字段值整体替换为掩码（不论值是字符串、数字还是对象）
+    - paths: JSON 路径规则，如 '$.data[*].user.phone'，* 匹配任意字段名或数组下标
+    - patterns: 值规则，预置规则名称（见 PRESET_PATTERNS）或正则，所有字符串值中的匹配部分替换为掩码
+
+    redact() 不修改原对象：没有命中任何规则的容器原样返回，命中时只复制从根到命中位置这一条链上的容器。
+    encode() 先脱敏顶层两层小字典中的敏感字段，再编码并预检，只有编码结果中还出现规则字面量时才遍历对象。
+
+    Example:
+        redactor = Redactor(keys=DEFAULT_KEYS + ('phone',), paths=['$.data[*].id_card'])
+        redactor.redact({"headers": {"Authorization": "Bearer abc"}})  # {"headers": {"Authorization": "***"}}
+    """
+
+    def __init__(self, keys: Iterable[str] = DEFAULT_KEYS, paths: Iterable[str] = (),
+                 patterns: Iterable[str] = DEFAULT_PATTERNS, mask: str = '***'):
+        """
+        Args:
+            keys: 字段名规则（忽略大小写、'-' 和 '_'，支持 fnmatch 通配符）
+            paths: JSON 路径规则
+            patterns: 值规则：预置规则名称或正则表达式
+            mask: 替换敏感内容的掩码
+        """
+        self.mask = mask
+        # 预检用的字面量：字段名片段（规范化后）和值规则字面量；任一规则没有字面量时为 None，表示总是遍历
+        key_literals: Optional[Dict[str, None]] = {}
+        exact, wildcards = set(), []
+        for key in keys:
+            key = _normalize(key)
+            if any(char in key for char in '*?['):
+                wildcards.append(fnmatch.translate(key))
+            else:
+                exact.add(key)
+            literal = _literal(key)
+            if literal is None:
+                key_literals = None
+            elif key_literals is not None:
+                key_literals[literal] = None
+        self._exact_keys = frozenset(exact)
+        self._key_pattern = re.compile('|'.join(wildcards)) if wildcards else None
+        self._key_cache: Dict[str, bool] = {}
+
+        self._paths: Optional[Dict] = None
+        for path in paths:
+            node = self._paths = self._paths if self._paths is not None else {}
+            segments = _parse_path(path)
+            for segment in segments:
+                node = node.setdefault(segment, {})
+            node[_END] = True
+            literal = _normalize(segments[-1])
+            if segments[-1] == '*' or segments[-1].isdigit():
+                key_literals = None
+            elif key_literals is not None:
+                key_literals[literal] = None
+        self._key_literals = _minimal(key_literals) if key_literals is not None else None
+
+        self._alternatives, self._keep, self._pattern_literals = [], [], []
+        value_literals: Optional[Dict[str, None]] = {}
+        for index, pattern in enumerate(patterns):
+            pattern, literals = PRESET_PATTERNS.get(pattern, (pattern, None))
+            re.compile(pattern)  # 单独编译一次，出错时报告具体规则
+            if literals is None or _ANCHORS.search(_ESCAPE_OR_CLASS.sub('', pattern)):
+                value_literals = None
+            elif value_literals is not None:
+                value_literals.update(dict.fromkeys(literals))
+            self._pattern_literals.append(literals)
+            keep = f'k{index}'
+            self._keep.append(keep if _KEEP_GROUP.search(pattern) else None)
+            self._alternatives.append(f'(?P<p{index}>{_KEEP_GROUP.sub(f"(?P<{keep}>", pattern)})')
+        self._value_literals = _minimal(value_literals) if value_literals is not None else None
+        # 文本中只出现部分规则的字面量时只执行这些规则：规则下标元组 -> (str 正则, bytes 正则)
+        self._subsets: Dict[tuple, tuple] = {}
+        all_patterns = tuple(range(len(self._alternatives)))
+        if all_patterns:
+            self._subsets[all_patterns] = self._compile(all_patterns)
+            self._value_pattern, self._bytes_pattern = self._subsets[all_patterns]
+            self._search = self._value_pattern.search
+        else:
+            self._value_pattern = self._bytes_pattern = self._search = None
+
+        # 预检参数：编码结果类型 -> (字段名字面量, 值字面量, 反斜杠, 字段名规范化函数)
+        key_literals, value_literals = self._key_literals or (), self._value_literals or ()
+        self._probes = {str: (key_literals, value_literals, '\\', _normalize)}
+        if all(literal.isascii() for literal in key_literals):
+            self._probes[bytes] = (tuple(literal.encode('ascii') for literal in key_literals),
+                                   tuple(literal.encode('utf-8') for literal in value_literals),
+                                   b'\\', _normalize_bytes)
+
+        self._lock = threading.Lock()
+        self.stats = {
+            "objects": 0,
+            "prefiltered": 0,
+            "shallow": 0,
+            "keys": 0,
+            "paths": 0,
+            "values": 0,
+            "texts": 0,
+        }
+
+    def encode(self, obj, encode: Callable):
+        """
+        脱敏并序列化
+
+        先直接编码，编码结果中不含任何规则字面量时就是最终结果；否则遍历对象脱敏后重新编码。
+        顶层两层的小字典中的敏感字段在编码前先脱敏，预检时不计这些字段名本身，
+        请求头里的 Authorization 这类常见命中因此不需要遍历和重新编码。
+        编码结果为 JsonStream（流式序列化）时无法预检，直接遍历。
+
+        Args:
+            obj: 待序列化对象
+            encode: 序列化函数
+        """
+        if not isinstance(obj, (dict, list, tuple)):
+            return encode(self.redact(obj))
+        with self._lock:
+            self.stats["objects"] += 1
+        keys, values = self._key_literals is not None, self._value_literals is not None
+        masked = ()
+        if keys or values:
+            obj, masked = self._shallow_redact(obj)
+            data = encode(obj)
+            text, probe = data, self._probes.get(type(data))
+            if probe is None and isinstance(data, bytes):
+                # bytes 只能按 ASCII 转小写，字段名字面量含非 ASCII 字符时解码后按 str 比较
+                text, probe = data.decode('utf-8'), self._probes[str]
+            if probe is None:
+                keys = values = False
+            else:
+                key_literals, value_literals, backslash, normalize = probe
+                if backslash in text:
+                    keys = values = False  # 含转义字符时编码结果与原始字符串不一致，不能据此判断
+                else:
+                    if keys:
+                        folded = normalize(text)
+                        if masked:
+                            # 已脱敏字段的字段名本身也含字面量，只有出现次数多于这些字段名时才说明还有其他命中
+                            names = [normalize(key if isinstance(text, str) else key.encode('utf-8')) for key in masked]
+                            keys = not any(folded.count(literal) > sum(name.count(literal) for name in names)
+                                           for literal in key_literals)
+                        else:
+                            keys = not any(literal in folded for literal in key_literals)
+                    if values:
+                        values = not any(literal in text for literal in value_literals)
+                if keys and values:
+                    with self._lock:
+                        self.stats["prefiltered"] += 1
+                    return data
+        # keys / values 为 True 表示已确认不会命中该类规则，遍历时跳过
+        search = None if values else self._search
+        return encode(self._walk(obj, [self._paths] if self._paths is not None else None, not keys, search))
+
+    def redact(self, obj):
+        """
+        返回脱敏后的对象（不修改原对象）
+
+        Returns:
+            没有命中任何规则时返回原对象
+        """
+        if isinstance(obj, str):
+            return self.redact_text(obj) if self._search is not None else obj
+        if isinstance(obj, (dict, list, tuple)):
+            return self._walk(obj, [self._paths] if self._paths is not None else None, True, self._search)
+        return obj
+
+    def redact_text(self, text: Union[str, bytes]) -> Union[str, bytes]:
+        """对文本（或 UTF-8 字节）应用值规则，未命中时返回原对象"""
+        if self._value_pattern is None or not text:
+            return text
+        if self._value_literals is not None:
+            # 只执行文本中出现了字面量的那些规则
+            probe = text if isinstance(text, str) else text.decode('utf-8', 'replace')
+            present = tuple(index for index, literals in enumerate(self._pattern_literals)
+                            if any(literal in probe for literal in literals))
+            if not present:
+                return text
+            patterns = self._subsets.get(present)
+            if patterns is None:
+                patterns = self._subsets[present] = self._compile(present)
+        else:
+            patterns = self._value_pattern, self._bytes_pattern
+        if isinstance(text, str):
+            result, count = patterns[0].subn(self._replace, text)
+        else:
+            result, count = patterns[1].subn(self._replace_bytes, bytes(text))
+        if not count:
+            return text
+        with self._lock:
+            self.stats["texts"] += 1
+            self.stats["values"] += count
+        return result
+
+    def redact_chunks(self, chunks: Iterable, max_line: int = 64 * 1024) -> Iterator[bytes]:
+        """
+        对流式文本（逐块产生 str 或 bytes）应用值规则：按换行切分后逐段处理，敏感值跨块时也能命中；
+        超过 max_line 字节仍没有换行的内容直接处理后写出，内存占用与流的总长度无关
+        """
+        pending = b''
+        for chunk in chunks:
+            chunk = chunk.encode('utf-8') if isinstance(chunk, str) else bytes(chunk)
+            data = pending + chunk if pending else chunk
+            cut = data.rfind(b'\n') + 1
+            if not cut and len(data) > max_line:
+                cut = len(data)
+            pending = data[cut:]
+            if cut:
+                yield self.redact_text(data[:cut])
+        if pending:
+            yield self.redact_text(pending)
+
+    def wrap_encode(self, encode: Callable) -> Callable:
+        """返回脱敏并序列化的编码函数（见 encode）"""
+        return lambda obj: self.encode(obj, encode)
+
+    def summary(self) -> Dict:
+        """
+        返回累计统计：处理的对象数、预检即确认无需（继续）脱敏的对象数、编码前脱敏了顶层敏感字段的对象数，
+        按字段名、路径脱敏的字段数，值规则替换次数，被替换过内容的字符串数
+        """
+        with self._lock:
+            return dict(self.stats)
+
+    def _secret_key(self, key: str) -> bool:
+        hit = self._key_cache.get(key)
+        if hit is None:
+            normalized = _normalize(key)
+            hit = normalized in self._exact_keys or (
+                self._key_pattern is not None and self._key_pattern.match(normalized) is not None)
+            if len(self._key_cache) >= _KEY_CACHE_SIZE:
+                self._key_cache.clear()
+            self._key_cache[key] = hit
+        return hit
+
+    def _shallow_redact(self, obj) -> tuple:
+        """
+        脱敏顶层字典及其直接子字典（均不超过 _SHALLOW_KEYS 个字段）中的敏感字段
+
+        Returns:
+            (脱敏后的对象, 脱敏的字段名列表)；没有命中时返回原对象和空元组
+        """
+        if not isinstance(obj, dict) or len(obj) > _SHALLOW_KEYS:
+            return obj, ()
+        cache, masked, result = self._key_cache, [], None
+        for key, value in obj.items():
+            secret = cache.get(key)
+            if secret is None:
+                secret = isinstance(key, str) and self._secret_key(key)
+            if secret:
+                masked.append(key)
+                new = self._masked(value, "keys")
+            elif isinstance(value, dict) and len(value) <= _SHALLOW_KEYS:
+                new = None
+                for child, item in value.items():
+                    secret = cache.get(child)
+                    if secret is None:
+                        secret = isinstance(child, str) and self._secret_key(child)
+                    if secret:
+                        masked.append(child)
+                        new = _assign(new, value, child, self._masked(item, "keys"), True)
+                if new is None:
+                    continue
+            else:
+                continue
+            if new is not value:
+                result = _assign(result, obj, key, new, True)
+        if not masked:
+            return obj, ()
+        with self._lock:
+            self.stats["shallow"] += 1
+        return (obj if result is None else result), masked
+
+    def _walk(self, obj, nodes: Optional[List[Dict]], keys: bool, search: Optional[Callable]):
+        """
+        遍历一个容器，返回脱敏后的容器（未命中时为原对象）
+
+        Args:
+            nodes: 当前位置在路径前缀树中的节点列表，没有路径规则（或已离开所有路径）时为 None
+            keys: 是否检查字段名规则
+            search: 值规则的 search 函数，None 表示不检查字符串
+        """
+        is_dict = isinstance(obj, dict)
+        cache = self._key_cache
+        result = None
+        for position, item in enumerate(obj.items() if is_dict else obj):
+            if is_dict:
+                key, value = item
+            else:
+                key, value = position, item
+            children = None
+            if nodes is not None:
+                segment = key if isinstance(key, str) else str(key)
+                children = [child for node in nodes for child in (node.get(segment), node.get('*'))
+                            if child is not None]
+                if any(_END in child for child in children):
+                    new = self._masked(value, "paths")
+                    if new is not value:
+                        result = _assign(result, obj, key, new, is_dict)
+                    continue
+                children = children or None
+            if keys and is_dict:
+                secret = cache.get(key)
+                if secret is None:
+                    secret = isinstance(key, str) and self._secret_key(key)
+                if secret:
+                    new = self._masked(value, "keys")
+                    if new is not value:
+                        result = _assign(result, obj, key, new, is_dict)
+                    continue
+            if isinstance(value, str):
+                if search is None or search(value) is None:
+                    continue
+                new = self.redact_text(value)
+            elif isinstance(value, (dict, list, tuple)):
+                if not value:
+                    continue
+                new = self._walk(value, children, keys, search)
+            else:
+                continue
+            if new is not value:
+                result = _assign(result, obj, key, new, is_dict)
+        return obj if result is None else result
+
+    def _compile(self, indexes: tuple) -> tuple:
+        combined = '|'.join(self._alternatives[index] for index in indexes)
+        return re.compile(combined), re.compile(combined.encode('utf-8'))
+
+    def _masked(self, value, counter: str):
+        if value is None or value == '' or value is self.mask:
+            return value
+        with self._lock:
+            self.stats[counter] += 1
+        return self.mask
+
+    def _replace(self, match) -> str:
+        keep = self._keep[int(match.lastgroup[1:])]
+        return (match.group(keep) or '') + self.mask if keep else self.mask
+
+    def _replace_bytes(self, match) -> bytes:
+        keep = self._keep[int(match.lastgroup[1:])]
+        mask = self.mask.encode('utf-8')
+        return (match.group(keep) or b'') + mask if keep else mask
+
+
+def _assign(result, obj, key, value, is_dict: bool):
+    """写时复制：第一次修改时复制容器（元组复制为列表），返回复制后的容器"""
+    if result is None:
+        result = dict(obj) if is_dict else list(obj)
+    result[key] = value
+    return result
@@ -0,0 +1,146 @@
+# -*- coding:UTF-8 -*-
+"""
+xdist 分片结果目录
+每个 xdist worker 写入自己的分片目录，会话结束后并行合并到最终的 allure-results 目录
+"""
+import argparse
+import json
+import os
+import shutil
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional
+
+# 每个分片都可能写出、合并时需要去重的元数据文件
+ENVIRONMENT_FILE = 'environment.properties'
+CATEGORIES_FILE = 'categories.json'
+EXECUTOR_FILE = 'executor.json'
+METADATA_FILES = (ENVIRONMENT_FILE, CATEGORIES_FILE, EXECUTOR_FILE)
+
+
+def shards_root(results_dir) -> Path:
+    """分片根目录：与结果目录同级的 <results_dir>.shards"""
+    results_dir = Path(results_dir)
+    return results_dir.with_name(results_dir.name + '.shards')
+
+
+def shard_dir(results_dir, worker_id: str) -> Path:
+    """指定 worker 的分片目录"""
+    return shards_root(results_dir) / worker_id
+
+
+def merge_shards(results_dir, shards: Optional[List] = None, workers: int = None,
+                 clean: bool = True) -> Dict:
+    """
+    把分片目录合并到最终结果目录
+
+    Args:
+        results_dir: 最终结果目录
+        shards: 分片目录列表，默认为 <results_dir>.shards 下的全部子目录
+        workers: 并行移动文件的线程数，默认 min(32, CPU 数 * 4)
+        clean: 合并后是否删除分片目录
+
+    Returns:
+        统计信息，包含各阶段耗时（秒）和文件数量
+    """
+    results_dir = Path(results_dir)
+    results_dir.mkdir(parents=True, exist_ok=True)
+    root = shards_root(results_dir)
+    if shards is None:
+        shards = sorted(p for p in root.iterdir() if p.is_dir()) if root.is_dir() else []
+    shards = [Path(p) for p in shards]
+    stats = {"shards": len(shards), "files": 0, "metadata_files": 0}
+
+    started = time.perf_counter()
+    moves = []
+    metadata = {name: [] for name in METADATA_FILES}
+    for shard in shards:
+        with os.scandir(shard) as entries:
+            for entry in entries:
+                if entry.name in metadata:
+                    metadata[entry.name].append(Path(entry.path))
+                elif entry.is_file():
+                    moves.append((entry.path, results_dir / entry.name))
+    stats["scan_seconds"] = time.perf_counter() - started
+
+    started = time.perf_counter()
+    workers = workers or min(32, (os.cpu_count() or 1) * 4)
+    if moves:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            for _ in pool.map(_move, moves, chunksize=256):
+                pass
+    stats["files"] = len(moves)
+    stats["move_seconds"] = time.perf_counter() - started
+
+    started = time.perf_counter()
+    for name, paths in metadata.items():
+        if paths:
+            _merge_metadata(name, paths, results_dir / name)
+            stats["metadata_files"] += len(paths)
+    stats["metadata_seconds"] = time.perf_counter() - started
+
+    started = time.perf_counter()
+    if clean:
+        for shard in shards:
+            shutil.rmtree(shard, ignore_errors=True)
+        if root.is_dir() and not any(root.iterdir()):
+            root.rmdir()
+    stats["cleanup_seconds"] = time.perf_counter() - started
+    return stats
+
+
+def _move(job):
+    source, dest = job
+    try:
+        os.replace(source, dest)
+    except OSError:
+        shutil.move(source, dest)
+
+
+def _merge_metadata(name: str, paths: List[Path], dest: Path):
+    """合并元数据文件：environment 按 key 合并，categories 按 name 合并，executor 保留第一个"""
+    if dest.exists():
+        paths = [dest] + paths
+    if name == ENVIRONMENT_FILE:
+        merged = {}
+        for path in paths:
+            for line in path.read_text(encoding='utf-8').splitlines():
+                key, sep, _ = line.partition('=')
+                if sep and key.strip() not in merged:
+                    merged[key.strip()] = line
+        content = '\n'.join(merged.values()) + '\n'
+    elif name == CATEGORIES_FILE:
+        merged = {}
+        for path in paths:
+            for category in json.loads(path.read_text(encoding='utf-8')):
+                merged.setdefault(category.get('name'), category)
+        content = json.dumps(list(merged.values()), indent=2, ensure_ascii=False)
+    else:
+        content = paths[0].read_text(encoding='utf-8')
+    tmp = dest.with_name(dest.name + '.tmp')
+    tmp.write_text(content, encoding='utf-8')
+    os.replace(tmp, dest)
+
+
+def main(argv=None):
+    """命令行入口：allure-handle-merge <results_dir>"""
+    parser = argparse.ArgumentParser(
+        prog='allure-handle-merge',
+        description='把 xdist 分片结果目录合并到最终的 allure-results 目录'
+    )
+    parser.add_argument('results_dir', help='最终结果目录（分片位于 <results_dir>.shards）')
+    parser.add_argument('--workers', type=int, default=None, help='并行移动文件的线程数')
+    parser.add_argument('--keep-shards', action='store_true', help='合并后保留分片目录')
+    args = parser.parse_args(argv)
+
+    stats = merge_shards(args.results_dir, workers=args.workers, clean=not args.keep_shards)
+    print(f"合并完成: {stats['shards']} 个分片, {stats['files']} 个文件, {stats['metadata_files']} 个元数据文件")
+    for phase in ('scan', 'move', 'metadata', 'cleanup'):
+        print(f"  {phase:<9} {stats[phase + '_seconds']:.3f}s")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
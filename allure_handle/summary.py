@@ -0,0 +1,326 @@
+# -*- coding:UTF-8 -*-
+"""
+结果摘要
+不依赖 Allure CLI（Java），直接解析 *-result.json / *-container.json，
+几秒内生成通过/失败/异常统计、最慢用例、各套件耗时，输出 Markdown 或单页 HTML
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from allure_handle.templates import HtmlTemplate, escape_html, html_head
+
+RESULT_SUFFIX = '-result.json'
+CONTAINER_SUFFIX = '-container.json'
+STATUSES = ('passed', 'failed', 'broken', 'skipped', 'unknown')
+# 文件数少于该值时在当前进程中解析，避免进程池启动开销
+PARALLEL_THRESHOLD = 500
+CACHE_VERSION = 1
+
+SLOWEST_TEMPLATE = HtmlTemplate(
+    columns=[('name', '用例'), ('suite', '套件'), ('status', '结果'), ('duration', '耗时 (s)')],
+    title="最慢用例",
+)
+SUITE_TEMPLATE = HtmlTemplate(
+    columns=[('suite', '套件'), ('tests', '用例数'), ('failed', '失败'), ('broken', '异常'),
+             ('duration', '总耗时 (s)')],
+    title="套件耗时",
+)
+FIXTURE_TEMPLATE = HtmlTemplate(
+    columns=[('name', 'Fixture'), ('status', '结果'), ('duration', '耗时 (s)')],
+    title="最慢 Fixture",
+)
+
+
+def parse_file(path: str) -> Optional[Dict]:
+    """
+    解析单个结果文件，只保留摘要需要的字段
+
+    Args:
+        path: *-result.json 或 *-container.json 路径
+
+    Returns:
+        精简后的记录；文件损坏时返回 None
+    """
+    try:
+        with open(path, 'rb') as f:
+            data = json.loads(f.read())
+    except (OSError, ValueError):
+        return None
+    if path.endswith(RESULT_SUFFIX):
+        labels = {label.get('name'): label.get('value') for label in data.get('labels', ())}
+        return {
+            'kind': 'result',
+            'name': data.get('name'),
+            'history_id': data.get('historyId') or data.get('uuid'),
+            'status': data.get('status') or 'unknown',
+            'suite': labels.get('suite') or labels.get('parentSuite') or '',
+            'start': data.get('start') or 0,
+            'stop': data.get('stop') or 0,
+        }
+    fixtures = []
+    for fixture in list(data.get('befores', ())) + list(data.get('afters', ())):
+        fixtures.append({
+            'name': fixture.get('name'),
+            'status': fixture.get('status') or 'unknown',
+            'duration': max(0, (fixture.get('stop') or 0) - (fixture.get('start') or 0)),
+        })
+    return {'kind': 'container', 'name': data.get('name'), 'fixtures': fixtures}
+
+
+class ResultCache:
+    """按 (文件名, mtime, size) 缓存已解析的记录，未变化的文件不再重复解析"""
+
+    def __init__(self, path: Optional[Path]):
+        self.path = path
+        self._entries = {}
+        if path is not None and path.is_file():
+            try:
+                data = json.loads(path.read_text(encoding='utf-8'))
+                if data.get('version') == CACHE_VERSION:
+                    self._entries = data.get('entries', {})
+            except (OSError, ValueError):
+                self._entries = {}
+
+    def get(self, name: str, stat) -> Optional[Dict]:
+        entry = self._entries.get(name)
+        if entry and entry[0] == stat.st_mtime_ns and entry[1] == stat.st_size:
+            return entry[2]
+        return None
+
+    def put(self, name: str, stat, record: Dict):
+        self._entries[name] = [stat.st_mtime_ns, stat.st_size, record]
+
+    def save(self, names):
+        if self.path is None:
+            return
+        entries = {name: self._entries[name] for name in names if name in self._entries}
+        tmp = self.path.with_name(self.path.name + '.tmp')
+        tmp.write_text(json.dumps({'version': CACHE_VERSION, 'entries': entries}), encoding='utf-8')
+        os.replace(tmp, self.path)
+
+
+def default_cache_path(results_dir) -> Path:
+    """默认缓存文件：与结果目录同级的 <results_dir>.summary-cache.json"""
+    results_dir = Path(results_dir)
+    return results_dir.with_name(results_dir.name + '.summary-cache.json')
+
+
+def load_records(results_dir, processes: int = None, cache_path=None, use_cache: bool = True):
+    """
+    增量加载结果目录中的全部记录
+
+    Args:
+        results_dir: allure-results 目录
+        processes: 解析进程数，默认为 CPU 数
+        cache_path: 缓存文件路径，默认为 default_cache_path(results_dir)
+        use_cache: 是否使用缓存
+
+    Returns:
+        (记录列表, 统计信息)
+    """
+    results_dir = Path(results_dir)
+    cache = ResultCache(Path(cache_path or default_cache_path(results_dir)) if use_cache else None)
+    records, pending, names = [], [], []
+    with os.scandir(results_dir) as entries:
+        for entry in entries:
+            if not (entry.name.endswith(RESULT_SUFFIX) or entry.name.endswith(CONTAINER_SUFFIX)):
+                continue
+            stat = entry.stat()
+            names.append(entry.name)
+            record = cache.get(entry.name, stat)
+            if record is not None:
+                records.append(record)
+            else:
+                pending.append((entry.name, entry.path, stat))
+
+    paths = [path for _, path, _ in pending]
+    if len(paths) >= PARALLEL_THRESHOLD and processes != 1:
+        processes = processes or os.cpu_count() or 1
+        chunksize = max(1, len(paths) // (processes * 4))
+        with ProcessPoolExecutor(max_workers=processes) as pool:
+            parsed = list(pool.map(parse_file, paths, chunksize=chunksize))
+    else:
+        parsed = [parse_file(path) for path in paths]
+    for (name, _, stat), record in zip(pending, parsed):
+        if record is not None:
+            cache.put(name, stat, record)
+            records.append(record)
+    cache.save(names)
+    return records, {'files': len(names), 'parsed': len(pending), 'cached': len(names) - len(pending)}
+
+
+def summarize(results_dir, top: int = 10, processes: int = None, cache_path=None,
+              use_cache: bool = True) -> Dict:
+    """
+    生成结果摘要
+
+    Args:
+        results_dir: allure-results 目录
+        top: 最慢用例 / Fixture 的数量
+        processes: 解析进程数
+        cache_path: 缓存文件路径
+        use_cache: 是否使用增量缓存
+
+    Returns:
+        摘要字典
+    """
+    started = time.perf_counter()
+    records, stats = load_records(results_dir, processes=processes, cache_path=cache_path, use_cache=use_cache)
+
+    # 重试会产生多个 historyId 相同的结果，只保留最后一次
+    latest = {}
+    fixtures = []
+    for record in records:
+        if record['kind'] == 'container':
+            fixtures.extend(record['fixtures'])
+            continue
+        current = latest.get(record['history_id'])
+        if current is None or record['stop'] >= current['stop']:
+            latest[record['history_id']] = record
+    tests = list(latest.values())
+
+    statuses = dict.fromkeys(STATUSES, 0)
+    suites = {}
+    for test in tests:
+        status = test['status'] if test['status'] in statuses else 'unknown'
+        statuses[status] += 1
+        suite = suites.setdefault(test['suite'], {'suite': test['suite'], 'tests': 0, 'failed': 0,
+                                                  'broken': 0, 'duration_ms': 0})
+        suite['tests'] += 1
+        suite['duration_ms'] += _duration(test)
+        if status in ('failed', 'broken'):
+            suite[status] += 1
+
+    starts = [test['start'] for test in tests if test['start']]
+    stops = [test['stop'] for test in tests if test['stop']]
+    slowest = sorted(tests, key=_duration, reverse=True)[:top]
+    return dict(
+        stats,
+        total=len(tests),
+        retries=sum(1 for r in records if r['kind'] == 'result') - len(tests),
+        statuses=statuses,
+        duration_ms=sum(_duration(test) for test in tests),
+        wall_ms=(max(stops) - min(starts)) if starts and stops else 0,
+        slowest=[{'name': t['name'], 'suite': t['suite'], 'status': t['status'],
+                  'duration_ms': _duration(t)} for t in slowest],
+        suites=sorted(suites.values(), key=lambda s: s['duration_ms'], reverse=True),
+        slowest_fixtures=sorted(fixtures, key=lambda f: f['duration'], reverse=True)[:top],
+        elapsed_seconds=time.perf_counter() - started,
+    )
+
+
+def _duration(test: Dict) -> int:
+    return max(0, test['stop'] - test['start'])
+
+
+def _seconds(ms) -> str:
+    return f"{ms / 1000:.3f}"
+
+
+def to_markdown(summary: Dict) -> str:
+    """把摘要渲染为 Markdown（适合 CI 日志和 PR 评论）"""
+    statuses = summary['statuses']
+    lines = [
+        "## 测试结果摘要",
+        "",
+        "| 总数 | 通过 | 失败 | 异常 | 跳过 | 未知 | 总耗时 (s) | 墙钟时间 (s) |",
+        "|---|---|---|---|---|---|---|---|",
+        f"| {summary['total']} | {statuses['passed']} | {statuses['failed']} | {statuses['broken']} "
+        f"| {statuses['skipped']} | {statuses['unknown']} | {_seconds(summary['duration_ms'])} "
+        f"| {_seconds(summary['wall_ms'])} |",
+        "",
+        "### 最慢用例",
+        "",
+        "| 用例 | 套件 | 结果 | 耗时 (s) |",
+        "|---|---|---|---|",
+    ]
+    for test in summary['slowest']:
+        lines.append(f"| {_md(test['name'])} | {_md(test['suite'])} | {test['status']} "
+                     f"| {_seconds(test['duration_ms'])} |")
+    lines += ["", "### 套件耗时", "", "| 套件 | 用例数 | 失败 | 异常 | 总耗时 (s) |", "|---|---|---|---|---|"]
+    for suite in summary['suites']:
+        lines.append(f"| {_md(suite['suite'])} | {suite['tests']} | {suite['failed']} | {suite['broken']} "
+                     f"| {_seconds(suite['duration_ms'])} |")
+    if summary['slowest_fixtures']:
+        lines += ["", "### 最慢 Fixture", "", "| Fixture | 结果 | 耗时 (s) |", "|---|---|---|"]
+        for fixture in summary['slowest_fixtures']:
+            lines.append(f"| {_md(fixture['name'])} | {fixture['status']} | {_seconds(fixture['duration'])} |")
+    lines += ["", f"_{summary['files']} 个文件（新解析 {summary['parsed']}），"
+                  f"用时 {summary['elapsed_seconds']:.2f}s_", ""]
+    return '\n'.join(lines)
+
+
+def _md(value) -> str:
+    return str(value).replace('|', '\\|')
+
+
+def to_html(summary: Dict) -> str:
+    """把摘要渲染为单页静态 HTML"""
+    statuses = summary['statuses']
+    overview = HtmlTemplate(
+        columns=[('total', '总数')] + [(status, status) for status in STATUSES]
+                + [('duration', '总耗时 (s)'), ('wall', '墙钟时间 (s)')],
+    )
+    parts = [
+        html_head("测试结果摘要"),
+        "    <h2>测试结果摘要</h2>\n",
+        overview.render_table(dict(statuses, total=summary['total'], duration=_seconds(summary['duration_ms']),
+                                   wall=_seconds(summary['wall_ms']))),
+        "    <h3>最慢用例</h3>\n",
+        SLOWEST_TEMPLATE.render_table(
+            [dict(test, duration=_seconds(test['duration_ms'])) for test in summary['slowest']]),
+        "    <h3>套件耗时</h3>\n",
+        SUITE_TEMPLATE.render_table(
+            [dict(suite, duration=_seconds(suite['duration_ms'])) for suite in summary['suites']]),
+    ]
+    if summary['slowest_fixtures']:
+        parts += [
+            "    <h3>最慢 Fixture</h3>\n",
+            FIXTURE_TEMPLATE.render_table(
+                [dict(fixture, duration=_seconds(fixture['duration'])) for fixture in summary['slowest_fixtures']]),
+        ]
+    parts.append(f"    <p>{escape_html(summary['files'])} 个文件（新解析 {escape_html(summary['parsed'])}），"
+                 f"用时 {summary['elapsed_seconds']:.2f}s</p>\n</body>\n</html>")
+    return ''.join(parts)
+
+
+def main(argv: List[str] = None):
+    """命令行入口：allure-handle-summary <results_dir>"""
+    parser = argparse.ArgumentParser(
+        prog='allure-handle-summary',
+        description='不依赖 Allure CLI，快速生成 allure-results 的结果摘要'
+    )
+    parser.add_argument('results_dir', help='allure-results 目录')
+    parser.add_argument('--format', choices=('md', 'html', 'json'), default='md', help='输出格式（默认 md）')
+    parser.add_argument('-o', '--output', help='输出文件，默认输出到标准输出')
+    parser.add_argument('--top', type=int, default=10, help='最慢用例数量（默认 10）')
+    parser.add_argument('--processes', type=int, default=None, help='解析进程数（默认 CPU 数）')
+    parser.add_argument('--cache', default=None, help='增量缓存文件路径')
+    parser.add_argument('--no-cache', action='store_true', help='不使用增量缓存')
+    args = parser.parse_args(argv)
+
+    if not os.path.isdir(args.results_dir):
+        parser.error(f"结果目录不存在: {args.results_dir}")
+    summary = summarize(args.results_dir, top=args.top, processes=args.processes,
+                        cache_path=args.cache, use_cache=not args.no_cache)
+    if args.format == 'html':
+        content = to_html(summary)
+    elif args.format == 'json':
+        content = json.dumps(summary, indent=2, ensure_ascii=False)
+    else:
+        content = to_markdown(summary)
+    if args.output:
+        Path(args.output).write_text(content, encoding='utf-8')
+    else:
+        print(content)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,189 @@
+# -*- coding:UTF-8 -*-
+"""
+HTML 描述模板
+模板在注册时编译一次并按名称缓存，渲染时单遍转义、不修改调用方传入的数据，支持多行表格
+"""
+from typing import Dict, Iterable, Optional, Sequence, Tuple, Union
+
+# 单遍 HTML 转义表（str.translate 只扫描一次字符串）
+_ESCAPE_TABLE = str.maketrans({
+    '&': '&amp;',
+    '<': '&lt;',
+    '>': '&gt;',
+    '"': '&quot;',
+    "'": '&#x27;',
+})
+
+DEFAULT_CSS = '''        table {
+            font-size: 12px;
+            color: #333;
+            width: 100%;
+            border-width: 1px;
+            border-color: #000;
+            border-collapse: collapse;
+        }
+        th {
+            font-size: 12px;
+            border-width: 1px;
+            padding: 8px;
+            border-style: solid;
+            border-color: #000;
+            text-align: left;
+            background-color: #b1cfea;
+        }
+        td {
+            font-size: 12px;
+            border-width: 1px;
+            padding: 8px;
+            border-style: solid;
+            border-color: #000;
+        }
+        tr:nth-child(even) {
+            background-color: #f2f2f2;
+        }'''
+
+
+def escape_html(value) -> str:
+    """单遍转义 HTML 特殊字符"""
+    return str(value).translate(_ESCAPE_TABLE)
+
+
+def html_head(title: str, style: str = None) -> str:
+    """
+    生成页面开头（到 <body> 为止）
+
+    Args:
+        title: 页面标题
+        style: <head> 中的样式片段，None 表示内联默认 CSS
+    """
+    if style is None:
+        style = f"    <style>\n{DEFAULT_CSS}\n    </style>\n"
+    return (
+        '<!doctype html>\n<html lang="zh-CN">\n<head>\n    <meta charset="utf-8">\n'
+        f"    <title>{escape_html(title)}</title>\n{style}</head>\n<body>\n"
+    )
+
+
+class HtmlTemplate:
+    """
+    编译后的 HTML 表格模板
+
+    - columns: [(字段名, 表头), ...]，决定列顺序
+    - value_maps: {字段名: {原始值: 显示值}}，例如优先级 1/2/3 → 低/中/高
+    - defaults: {字段名: 缺失时的显示值}，未指定时为空字符串
+    """
+
+    def __init__(self, columns: Sequence[Tuple[str, str]], title: str = "用例详情",
+                 value_maps: Dict[str, Dict] = None, defaults: Dict[str, str] = None):
+        """
+        Args:
+            columns: 列定义 [(字段名, 表头), ...]
+            title: 页面标题
+            value_maps: 字段值映射
+            defaults: 字段缺失时的显示值
+        """
+        self.columns = list(columns)
+        self.title = title
+        self._keys = [key for key, _ in self.columns]
+        self._value_maps = value_maps or {}
+        self._defaults = defaults or {}
+        self._prefixes = {}
+        header_cells = ''.join(f"\n            <th>{escape_html(header)}</th>" for _, header in self.columns)
+        self._header_row = f"        <tr>{header_cells}\n        </tr>\n"
+        self._row_format = "        <tr>" + "\n            <td>{}</td>" * len(self.columns) + "\n        </tr>\n"
+        self._suffix = "</body>\n</html>"
+
+    def render(self, rows: Union[Dict, Iterable[Dict]], stylesheet: Optional[str] = None) -> str:
+        """
+        渲染模板
+
+        Args:
+            rows: 单行数据字典或多行数据字典列表（不会被修改）
+            stylesheet: 共享样式表地址；None 表示内联默认 CSS
+
+        Returns:
+            HTML 字符串
+        """
+        return f"{self._prefix(stylesheet)}{self.render_table(rows)}{self._suffix}"
+
+    def render_table(self, rows: Union[Dict, Iterable[Dict]]) -> str:
+        """
+        只渲染 <table> 部分，用于把多个表格组合到同一个页面
+
+        Args:
+            rows: 单行数据字典或多行数据字典列表（不会被修改）
+        """
+        if isinstance(rows, dict):
+            rows = (rows,)
+        parts = ["    <table>\n", self._header_row]
+        row_format = self._row_format
+        for row in rows:
+            parts.append(row_format.format(*[escape_html(self._value(row, key)) for key in self._keys]))
+        parts.append("    </table>\n")
+        return ''.join(parts)
+
+    def _value(self, row: Dict, key: str):
+        if key not in row:
+            return self._defaults.get(key, '')
+        value = row[key]
+        value_map = self._value_maps.get(key)
+        if value_map is not None:
+            try:
+                return value_map.get(value, value)
+            except TypeError:  # 不可哈希的值原样输出
+                return value
+        return value
+
+    def _prefix(self, stylesheet: Optional[str]) -> str:
+        prefix = self._prefixes.get(stylesheet)
+        if prefix is None:
+            style = None
+            if stylesheet is not None:
+                style = f'    <link rel="stylesheet" href="{escape_html(stylesheet)}">\n'
+            prefix = html_head(self.title, style)
+            self._prefixes[stylesheet] = prefix
+        return prefix
+
+
+CASE_TEMPLATE = HtmlTemplate(
+    columns=[
+        ('case_id', 'ID'),
+        ('case_module', '模块'),
+        ('case_name', '用例名称'),
+        ('case_priority', '优先级'),
+        ('case_setup', '前置条件'),
+        ('case_step', '测试步骤'),
+        ('case_expect_result', '预期结果'),
+        ('case_result', '测试结果'),
+    ],
+    value_maps={'case_priority': {1: '低', 2: '中', 3: '高'}},
+    defaults={'case_priority': '未知'},
+)
+
+# 已注册的模板，按名称缓存
+_templates: Dict[str, HtmlTemplate] = {'case': CASE_TEMPLATE}
+
+
+def register_template(name: str, template: HtmlTemplate):
+    """
+    注册（或覆盖）模板
+
+    Args:
+        name: 模板名称
+        template: HtmlTemplate 实例
+    """
+    _templates[name] = template
+
+
+def get_template(name: str) -> HtmlTemplate:
+    """
+    按名称获取模板
+
+    Raises:
+        KeyError: 模板未注册
+    """
+    try:
+        return _templates[name]
+    except KeyError:
+        raise KeyError(f"未注册的 HTML 模板: {name}，已注册: {', '.join(_templates)}") from None
+
@@ -0,0 +1,131 @@
+# -*- coding:UTF-8 -*-
+"""
+后台附件写入器
+把附件的序列化和落盘放到有界队列 + 工作线程中执行，测试线程只负责登记附件
+"""
+import queue
+import threading
+import warnings
+from typing import Callable, List, Optional, Tuple
+
+from allure_handle._lifecycle import reserve_attachment_entry, write_entry
+
+
+class AttachmentWriter:
+    """
+    后台附件写入器
+
+    - 附件元数据在测试线程中按调用顺序登记，因此同一步骤内的附件顺序与同步模式一致
+    - 序列化和写文件在工作线程中完成
+    - 队列已满时 submit 会阻塞（背压），避免内存无限增长
+    - 写入失败的附件记录在 errors 中，flush/close 时以 RuntimeWarning 报告
+    """
+
+    def __init__(self, workers: int = 2, max_queue: int = 256, store: Callable = write_entry):
+        """
+        Args:
+            workers: 工作线程数
+            max_queue: 队列最大长度，超过后调用方阻塞等待
+            store: 写出函数 store(body, entry)，在工作线程中调用
+        """
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._store = store
+        self._threads = []
+        self._lock = threading.Lock()
+        self.errors: List[Tuple[str, Exception]] = []  # (附件名称, 异常)
+        self._reported = 0
+        for index in range(max(1, workers)):
+            thread = threading.Thread(
+                target=self._run,
+                name=f"allure-handle-writer-{index}",
+                daemon=True
+            )
+            thread.start()
+            self._threads.append(thread)
+
+    def submit(self, payload, name: str, attachment_type, encode: Optional[Callable] = None,
+               extension: str = None) -> Optional[str]:
+        """
+        登记附件并把写入任务放入队列
+
+        Args:
+            payload: 附件内容；指定 encode 时为待序列化对象（入队后请勿再修改）
+            name: 附件名称
+            attachment_type: allure.attachment_type 枚举
+            encode: 序列化函数，在工作线程中调用
+            extension: 自定义扩展名
+
+        Returns:
+            附件文件名；没有用例上下文时返回 None
+        """
+        entry = reserve_attachment_entry(name, attachment_type, extension)
+        if entry is None:
+            return None
+        self.enqueue(payload, entry, encode)
+        return entry[0]
+
+    def enqueue(self, payload, entry, encode: Optional[Callable] = None):
+        """
+        把已登记附件的写入任务放入队列
+
+        Args:
+            payload: 附件内容或待序列化对象
+            entry: reserve_attachment_entry 返回的 (文件名, 所属对象, Attachment)
+            encode: 序列化函数，在工作线程中调用
+        """
+        self._queue.put((payload, encode, entry))
+
+    def flush(self, warn: bool = True):
+        """
+        等待队列中已提交的任务全部写完
+
+        Args:
+            warn: 是否对上次报告以来新出现的写入失败发出 RuntimeWarning；
+                  为 False 时由调用方通过 take_errors 自行报告
+        """
+        self._queue.join()
+        if not warn:
+            return
+        errors = self.take_errors()
+        if errors:
+            lost = ", ".join(f"{name!r} ({type(e).__name__}: {e})" for name, e in errors[:5])
+            more = f" 等 {len(errors)} 个" if len(errors) > 5 else ""
+            warnings.warn(f"allure_handle 后台写入失败，附件未写出: {lost}{more}", RuntimeWarning, stacklevel=3)
+
+    def take_errors(self) -> List[Tuple[str, Exception]]:
+        """
+        取出上次调用以来新增的写入失败记录（errors 本身保留全部记录）
+
+        Returns:
+            [(附件名称, 异常)]
+        """
+        with self._lock:
+            errors = self.errors[self._reported:]
+            self._reported = len(self.errors)
+        return errors
+
+    def close(self):
+        """写完剩余任务并停止工作线程"""
+        self.flush()
+        for _ in self._threads:
+            self._queue.put(None)
+        for thread in self._threads:
+            thread.join()
+        self._threads = []
+
+    def _run(self):
+        while True:
+            job = self._queue.get()
+            entry = (None, None, None)
+            try:
+                if job is None:
+                    return
+                payload, encode, entry = job
+                body = encode(payload) if encode else payload
+                self._store(body, entry)
+            except Exception as e:
+                attachment = entry[2]
+                with self._lock:
+                    self.errors.append((getattr(attachment, "name", None) or entry[0], e))
+            finally:
+                self._queue.task_done()
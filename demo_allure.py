@@ -10,6 +10,7 @@ import pytest
 import allure
 from pathlib import Path
 from allure_handle import AllureHandle
+from allure_handle.summary import summarize, to_markdown
 
 # 设置报告目录
 BASE_DIR = Path(__file__).parent
@@ -266,6 +267,9 @@ if __name__ == "__main__":
         print("[WARN] 部分测试失败")
     print("=" * 60)
     
+    # 不依赖 Allure CLI 的快速摘要
+    print(to_markdown(summarize(RESULTS_DIR)))
+    
     generate_allure_report()
     
     print("\n" + "=" * 60)
@@ -31,8 +31,13 @@ setup(
     include_package_data=False,  # 不需要包含额外文件
     python_requires='>=3.7',
     install_requires=[
-        'allure-pytest>=2.13.0',  # 只需要 allure-pytest
+        'allure-pytest>=2.15.0',  # 只需要 allure-pytest
     ],
+    extras_require={
+        'fast': ['orjson>=3.6'],  # 可选：更快的 JSON 编码
+        'requests': ['requests>=2.20'],  # 可选：requests 自动记录适配器
+        'httpx': ['httpx>=0.23'],  # 可选：httpx 自动记录传输层
+    },
     classifiers=[
         'Development Status :: 4 - Beta',
         'Intended Audience :: Developers',
@@ -46,4 +51,16 @@ setup(
         'Programming Language :: Python :: 3.11',
     ],
     keywords='allure pytest testing report',
+    entry_points={
+        'pytest11': [
+            'allure_handle = allure_handle.plugin',
+        ],
+        'console_scripts': [
+            'allure-handle-merge = allure_handle.shards:main',
+            'allure-handle-summary = allure_handle.summary:main',
+            'allure-handle-bench = allure_handle.bench:main',
+            'allure-handle-history = allure_handle.history:main',
+            'allure-handle-archive = allure_handle.archive:main',
+        ],
+    },
 )
@@ -0,0 +1,53 @@
+# -*- coding:UTF-8 -*-
+import json
+from importlib import metadata
+from pathlib import Path
+
+import pytest
+
+pytest_plugins = ["pytester"]
+
+
+def _plugin_args() -> list:
+    """未通过 pytest11 入口安装时显式加载插件"""
+    try:
+        installed = any(ep.name == "allure_handle" for ep in metadata.entry_points(group="pytest11"))
+    except TypeError:  # Python < 3.10
+        installed = any(ep.name == "allure_handle" for ep in metadata.entry_points().get("pytest11", ()))
+    return [] if installed else ["-p", "allure_handle.plugin"]
+
+
+@pytest.fixture
+def run_allure(pytester):
+    """
+    在临时目录中运行 pytest（开启 --alluredir），返回 {用例名: [(附件名称, 附件内容), ...]}
+
+    Example:
+        results = run_allure(test_code, "--allure-redact")
+    """
+    def run(source: str, *args, passed: int = None):
+        pytester.makepyfile(source)
+        results_dir = pytester.path / "allure-results"
+        outcome = pytester.runpytest("-p", "no:cacheprovider", *_plugin_args(),
+                                     f"--alluredir={results_dir}", *args)
+        if passed is not None:
+            outcome.assert_outcomes(passed=passed)
+        return _read_results(results_dir)
+    return run
+
+
+def _read_results(results_dir: Path) -> dict:
+    tests = {}
+    for path in results_dir.glob("*-result.json"):
+        result = json.loads(path.read_text(encoding="utf-8"))
+        tests[result["name"]] = [(name, (results_dir / source).read_bytes())
+                                 for name, source in _attachments(result)]
+    return tests
+
+
+def _attachments(node: dict):
+    """按报告顺序遍历用例及其步骤中的附件"""
+    for step in node.get("steps", []):
+        yield from _attachments(step)
+    for attachment in node.get("attachments", []):
+        yield attachment["name"], attachment["source"]
@@ -0,0 +1,46 @@
+# -*- coding:UTF-8 -*-
+"""asyncio API：在 pytest 插件下检查协程写出的附件"""
+import json
+
+
+def test_step_attachment_is_redacted(run_allure):
+    results = run_allure('''
+import asyncio
+
+from allure_handle.aio import AsyncAllureHandle
+
+
+def test_step():
+    asyncio.run(AsyncAllureHandle.add_step_with_attachment("请求头", "Authorization: Bearer asyncsecret"))
+''', "--allure-redact", passed=1)
+    assert results["test_step"] == [("请求头", b"Authorization: Bearer ***")]
+
+
+def test_request_and_response_follow_consolidated_mode(run_allure, pytester):
+    results = run_allure('''
+import asyncio
+
+from allure_handle import AllureHandle
+from allure_handle.aio import AsyncAllureHandle
+
+
+async def calls():
+    await AsyncAllureHandle.add_request_to_report("POST", "/orders", json_data={"id": 1})
+    await AsyncAllureHandle.add_response_to_report(200, response_json={"rows": ["x" * 100] * 10})
+
+
+def test_async():
+    asyncio.run(calls())
+
+
+def test_sync():
+    AllureHandle.add_request_to_report("POST", "/orders", json_data={"id": 1})
+    AllureHandle.add_response_to_report(200, response_json={"rows": ["x" * 100] * 10})
+''', "--allure-consolidate", passed=2)
+    assert [name for name, _ in results["test_async"]] == [name for name, _ in results["test_sync"]]
+    assert all("请求信息" != name and not name.startswith("响应内容") for name, _ in results["test_async"])
+    for path in (pytester.path / "allure-results").glob("*-result.json"):
+        result = json.loads(path.read_text(encoding="utf-8"))
+        parameters = {parameter["name"]: parameter["value"]
+                      for step in result["steps"] for parameter in step.get("parameters", [])}
+        assert parameters["Method"] == "POST" and parameters["Status Code"] == "200"
@@ -0,0 +1,67 @@
+# -*- coding:UTF-8 -*-
+"""结果目录归档：打包后流式解包、随机读取和按通配符解出都能还原原始文件"""
+import io
+import os
+
+import pytest
+
+from allure_handle.archive import ArchiveError, ResultsArchive, pack_results, unpack_archive
+
+
+@pytest.fixture
+def results_dir(tmp_path):
+    path = tmp_path / "allure-results"
+    path.mkdir()
+    files = {f"{i}-result.json": (f'{{"name": "test_{i}"}}' * 50).encode() for i in range(30)}
+    files["big-attachment.txt"] = os.urandom(300 * 1024)
+    files["log-attachment.txt"] = b"line\n" * 100000
+    files["empty-attachment.txt"] = b""
+    for name, data in files.items():
+        (path / name).write_bytes(data)
+    return path, files
+
+
+def _tree(path) -> dict:
+    return {child.name: child.read_bytes() for child in path.iterdir()}
+
+
+@pytest.mark.parametrize("codec", ["zlib", "lzma", "none"])
+def test_pack_and_stream_unpack_round_trip(tmp_path, results_dir, codec):
+    source, files = results_dir
+    archive = tmp_path / "results.ahpk"
+    stats = pack_results(source, archive, workers=2, block_size="64KB", codec=codec)
+    assert stats["files"] == len(files) and stats["blocks"] > 1
+    unpack_archive(archive, tmp_path / "out", workers=2)
+    assert _tree(tmp_path / "out") == files
+
+
+def test_unpack_from_pipe(tmp_path, results_dir):
+    source, files = results_dir
+    buffer = io.BytesIO()
+    pack_results(source, buffer, block_size="64KB")
+    buffer.seek(0)
+    unpack_archive(buffer, tmp_path / "out", patterns=["*-result.json"])
+    assert _tree(tmp_path / "out") == {name: data for name, data in files.items() if name.endswith("-result.json")}
+
+
+def test_random_access_reads_single_files(tmp_path, results_dir):
+    source, files = results_dir
+    archive = tmp_path / "results.ahpk"
+    pack_results(source, archive, block_size="64KB")
+    with ResultsArchive(archive) as reader:
+        assert len(reader) == len(files) and "big-attachment.txt" in reader
+        assert len(reader.info("big-attachment.txt")["blocks"]) > 1
+        for name, data in files.items():
+            assert reader.read(name) == data
+        assert sorted(reader.names("*-result.json")) == sorted(n for n in files if n.endswith("-result.json"))
+        reader.extract(tmp_path / "out", patterns=["*-attachment.txt"])
+    assert _tree(tmp_path / "out") == {name: data for name, data in files.items() if name.endswith("-attachment.txt")}
+
+
+def test_truncated_archive_is_rejected(tmp_path, results_dir):
+    source, _ = results_dir
+    archive = tmp_path / "results.ahpk"
+    pack_results(source, archive)
+    archive.write_bytes(archive.read_bytes()[:-8])
+    with pytest.raises(ArchiveError):
+        ResultsArchive(archive)
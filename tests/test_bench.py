@@ -0,0 +1,27 @@
+# -*- coding:UTF-8 -*-
+"""基准对比：相对阈值之外还要求最小绝对增长，避免亚微秒级路径的抖动被判为回归"""
+from allure_handle.bench import compare
+
+
+def _result(wall_us: float, peak: int = 1024, mode: str = "disabled") -> dict:
+    return {"results": [{"method": "add_log_to_report", "size": 1024, "mode": mode,
+                         "wall_us": wall_us, "peak_alloc_bytes": peak, "bytes_written": 0}]}
+
+
+def test_sub_microsecond_jitter_is_not_a_regression():
+    assert compare(_result(0.317), _result(0.199)) == []
+    assert compare(_result(2.0, peak=2048), _result(1.0, peak=1024)) == []
+
+
+def test_large_relative_and_absolute_growth_is_a_regression():
+    regressions = compare(_result(150.0), _result(100.0))
+    assert [(item["metric"], item["ratio"]) for item in regressions] == [("wall_us", 1.5)]
+
+
+def test_min_delta_overrides_default_floor():
+    assert compare(_result(150.0), _result(100.0), min_delta={"wall_us": 100}) == []
+    assert len(compare(_result(0.317), _result(0.199), min_delta={"wall_us": 0})) == 1
+
+
+def test_rows_missing_from_baseline_are_skipped():
+    assert compare(_result(500.0, mode="enabled"), _result(1.0)) == []
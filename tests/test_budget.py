@@ -0,0 +1,88 @@
+# -*- coding:UTF-8 -*-
+"""附件预算：降级级别、截断长度，以及超大附件不会耗尽同一用例的剩余预算"""
+import json
+
+import allure
+
+from allure_handle.budget import FULL, TRUNCATED, AttachmentBudget, BudgetStream, TruncatedBytes
+
+TEXT = allure.attachment_type.TEXT
+
+
+def _budget(**kwargs) -> AttachmentBudget:
+    budget = AttachmentBudget(**kwargs)
+    budget.begin("test")
+    return budget
+
+
+def _write(admitted):
+    body, name, attachment_type, encode = admitted
+    return name, encode(body)
+
+
+def test_small_text_at_truncate_level_is_written_in_full():
+    budget = _budget(test_bytes=10000, truncate_bytes=1000)
+    budget.charge(budget._current, 6000)
+    name, data = _write(budget.admit("x" * 100, "small", TEXT))
+    assert data == "x" * 100 and not getattr(data, "truncated", False)
+    assert budget._current.levels[FULL] == 1 and budget._current.levels[TRUNCATED] == 0
+
+
+def test_truncation_includes_marker_and_remaining_budget():
+    budget = _budget(test_bytes=10000, truncate_bytes=1000)
+    budget.charge(budget._current, 9500)
+    budget.summary_at = 1.0
+    _, data = _write(budget.admit("x" * 5000, "big", TEXT))
+    assert isinstance(data, TruncatedBytes)
+    assert len(data) <= 500
+    assert budget._current.bytes <= 10000
+
+
+def test_truncate_limit_is_clamped_to_remaining_budget():
+    budget = _budget(test_bytes=10000, truncate_at=0.5, summary_at=1.0, truncate_bytes=4096)
+    budget.charge(budget._current, 9990)
+    level, _, limit = budget.admit_size("text/plain", 5000)
+    assert level == TRUNCATED and limit == 10
+    assert budget.admit_size("text/plain", 8)[0] == FULL
+
+
+def test_oversized_full_attachment_is_clipped_to_truncate_bytes():
+    budget = _budget(test_bytes=100000, truncate_bytes=1000)
+    name, data = _write(budget.admit("x" * 300000, "huge", TEXT))
+    assert isinstance(data, TruncatedBytes) and len(data) <= 1000
+    assert budget._current.bytes <= 1000
+
+
+def test_budget_stream_clips_and_rewrites():
+    stream = BudgetStream(iter([b"a" * 700] * 10), keep=1000, limit=5000)
+    assert len(b"".join(stream)) <= 5000
+    assert stream.truncated and len(stream.clipped()) <= 1000 and stream.written == len(stream.clipped())
+
+    stream = BudgetStream(iter([b"a" * 2500, b"a" * 2500]), keep=1000, limit=5000)
+    assert b"".join(stream) == b"a" * 5000 and not stream.truncated and stream.clipped() is None
+
+
+def test_later_attachments_degrade_instead_of_dropping(run_allure, pytester):
+    results = run_allure('''
+from allure_handle import AllureHandle
+
+
+def test_calls():
+    AllureHandle.add_response_to_report(200, response_json={"rows": [{"id": i, "text": "x" * 100} for i in range(20000)]})
+    AllureHandle.add_log_to_report(iter([b"log line\\n"] * 50000), name="streamed")
+    for index in range(40):
+        AllureHandle.add_request_to_report("GET", f"/orders/{index}")
+        AllureHandle.add_testdata_to_report({"index": index, "payload": "y" * 3000})
+''', "--allure-budget", "test_bytes=100KB", "--allure-budget-truncate-bytes", "2KB", passed=1)
+    attachments = results["test_calls"]
+    names = [name for name, _ in attachments]
+    assert "响应内容 (JSON) [预算: 已截断]" in names
+    assert "streamed [预算: 已截断]" in names
+    for name, body in attachments:
+        if name.endswith("[预算: 已截断]"):
+            assert len(body) <= 2048
+    report = json.loads((pytester.path / "allure-results.budget.json").read_text(encoding="utf-8"))
+    session = report["session"]
+    assert session["dropped"] == 0
+    assert session["truncated"] + session["summary"] > 2
+    assert session["bytes"] <= 100 * 1024
@@ -0,0 +1,48 @@
+# -*- coding:UTF-8 -*-
+"""附件去重：内容相同的附件只写一次，与 gzip 压缩同时开启时仍然有效"""
+import json
+
+import pytest
+
+SOURCE = '''
+import pytest
+
+from allure_handle import AllureHandle
+
+
+@pytest.mark.parametrize("index", range(5))
+def test_logs(index, tmp_path):
+    AllureHandle.add_log_to_report("same line\\n" * 10000, name="重复日志")
+    AllureHandle.add_log_to_report(f"unique {index}\\n" * 1000, name="不同日志")
+    path = tmp_path / "app.log"
+    path.write_text("file line\\n" * 1000)
+    AllureHandle.add_file_to_report(str(path), name="日志文件")
+'''
+
+
+def _sources(results_dir, name: str) -> list:
+    sources = []
+    for path in results_dir.glob("*-result.json"):
+        result = json.loads(path.read_text(encoding="utf-8"))
+        sources += [attachment["source"] for attachment in result.get("attachments", [])
+                    if attachment["name"].startswith(name)]
+    return sources
+
+
+@pytest.mark.parametrize("extra", [(), ("--allure-gzip-threshold", "1024")])
+def test_identical_attachments_share_one_file(pytester, run_allure, extra):
+    results = run_allure(SOURCE, "--allure-dedup", "reference", *extra, passed=5)
+    results_dir = pytester.path / "allure-results"
+    for name in ("重复日志", "日志文件"):
+        sources = _sources(results_dir, name)
+        assert len(sources) == 5 and len(set(sources)) == 1
+    assert len(set(_sources(results_dir, "不同日志"))) == 5
+    assert all(len(attachments) == 3 for attachments in results.values())
+
+
+def test_gzip_without_dedup_writes_identical_files(pytester, run_allure):
+    run_allure(SOURCE, "--allure-gzip-threshold", "1024", passed=5)
+    results_dir = pytester.path / "allure-results"
+    sources = _sources(results_dir, "重复日志")
+    assert all(source.endswith(".gz") for source in sources)
+    assert len({(results_dir / source).read_bytes() for source in sources}) == 1
@@ -0,0 +1,40 @@
+# -*- coding:UTF-8 -*-
+"""流式 JSON 编码：iterencode 的输出与一次性 encode 逐字节相同"""
+import json
+
+import pytest
+
+from allure_handle.encoder import JsonEncoder, JsonStream, orjson
+
+BACKENDS = ["stdlib"] + (["orjson"] if orjson is not None else [])
+
+PAYLOADS = [
+    {"rows": [{"id": i, "name": f"名称 {i}", "tags": ["a", "b"], "meta": {}} for i in range(2000)]},
+    [[i, str(i) * 20, None, True, 1.5] for i in range(3000)],
+    {"nested": {"level": {"deep": [{"k": "v" * 500}] * 300}}, "empty": [], "text": "x" * 200000},
+    {str(i): {"value": i, "items": list(range(50))} for i in range(500)},
+]
+
+
+def _bytes(data) -> bytes:
+    return data.encode("utf-8") if isinstance(data, str) else data
+
+
+@pytest.mark.parametrize("compact", [False, True])
+@pytest.mark.parametrize("backend", BACKENDS)
+@pytest.mark.parametrize("payload", PAYLOADS)
+def test_iterencode_matches_encode(payload, backend, compact):
+    encoder = JsonEncoder(backend=backend, compact=compact)
+    chunks = list(encoder.iterencode(payload, chunk_size=4096))
+    assert b"".join(chunks) == _bytes(encoder.encode(payload))
+    assert len(chunks) > 1
+
+
+def test_encode_large_streams_only_above_threshold():
+    encoder = JsonEncoder(backend="stdlib")
+    payload = {"rows": list(range(10000))}
+    assert not isinstance(encoder.encode_large(payload, threshold=1024 * 1024), JsonStream)
+    stream = encoder.encode_large(payload, threshold=1024)
+    assert isinstance(stream, JsonStream)
+    data = b"".join(stream)
+    assert json.loads(data) == payload and stream.size == len(data)
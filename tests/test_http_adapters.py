@@ -0,0 +1,200 @@
+# -*- coding:UTF-8 -*-
+"""HTTP 客户端适配器：在本地 http.server / httpx.MockTransport 上检查记录的请求和响应附件"""
+import pytest
+
+SERVER = '''
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+
+class Handler(BaseHTTPRequestHandler):
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        payload = json.dumps({"user": body["user"], "access_token": "tok-from-server"}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def do_GET(self):
+        # 分块传输，不带 Content-Length
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        for index in range(3):
+            chunk = f"line {index}\\n".encode()
+            self.wfile.write(b"%x\\r\\n%s\\r\\n" % (len(chunk), chunk))
+        self.wfile.write(b"0\\r\\n\\r\\n")
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{httpd.server_port}"
+    httpd.shutdown()
+    httpd.server_close()
+'''
+
+
+def _by_name(attachments):
+    return {name: body for name, body in attachments}
+
+
+def test_requests_adapter_records_exchange(run_allure):
+    pytest.importorskip("requests")
+    results = run_allure(SERVER + '''
+import requests
+from allure_handle.http_adapters import instrument_session
+
+
+def test_login(server):
+    session = instrument_session(requests.Session())
+    resp = session.post(server + "/login", json={"user": "alice", "password": "p4ssw0rd"},
+                        headers={"Authorization": "Bearer abc.def.ghi"})
+    assert resp.json()["user"] == "alice"
+''', "--allure-redact", passed=1)
+    attachments = results["test_login"]
+    assert [name for name, _ in attachments] == ["请求信息", "请求体", "响应信息", "响应内容"]
+    parts = _by_name(attachments)
+    assert b"/login" in parts["请求信息"]
+    assert b"alice" in parts["请求体"] and b"alice" in parts["响应内容"]
+    everything = b"".join(parts.values())
+    for secret in (b"p4ssw0rd", b"abc.def.ghi", b"tok-from-server"):
+        assert secret not in everything
+
+
+def test_requests_adapter_does_not_read_unsized_stream(run_allure):
+    pytest.importorskip("requests")
+    results = run_allure(SERVER + '''
+import requests
+from allure_handle.http_adapters import instrument_session
+
+
+def test_stream(server):
+    session = instrument_session(requests.Session())
+    with session.get(server + "/log", stream=True) as resp:
+        assert b"".join(resp.iter_content(4)) == b"line 0\\nline 1\\nline 2\\n"
+''', passed=1)
+    parts = _by_name(results["test_stream"])
+    assert "响应内容" not in parts
+    assert "未声明 Content-Length".encode() in parts["响应信息"]
+
+
+def test_httpx_transport_records_exchange(run_allure):
+    pytest.importorskip("httpx")
+    results = run_allure('''
+import httpx
+from allure_handle.http_adapters import AllureTransport
+
+
+def handler(request):
+    return httpx.Response(200, json={"id": 7, "password": "hunter2"})
+
+
+def test_get():
+    client = httpx.Client(transport=AllureTransport(httpx.MockTransport(handler)))
+    resp = client.get("https://api.example.com/orders/7?token=qs-secret")
+    assert resp.json()["id"] == 7
+''', "--allure-redact", passed=1)
+    parts = _by_name(results["test_get"])
+    assert list(parts) == ["请求信息", "响应信息", "响应内容"]
+    assert b'"id": 7' in parts["响应内容"]
+    everything = b"".join(parts.values())
+    assert b"hunter2" not in everything and b"qs-secret" not in everything
+
+
+def test_httpx_transport_redacts_large_json(run_allure):
+    pytest.importorskip("httpx")
+    results = run_allure('''
+import httpx
+from allure_handle.http_adapters import AllureTransport
+
+
+def handler(request):
+    if request.url.path == "/broken":
+        return httpx.Response(200, headers={"Content-Type": "application/json"},
+                              content=b'{"password": "raw-secret", ' + b"x" * 200)
+    return httpx.Response(200, json={"items": list(range(100)), "password": "hunter2"})
+
+
+def test_large():
+    client = httpx.Client(transport=AllureTransport(httpx.MockTransport(handler), pretty_threshold=64))
+    assert client.get("https://api.example.com/orders").json()["password"] == "hunter2"
+    client.get("https://api.example.com/broken")
+''', "--allure-redact", passed=1)
+    bodies = [body for name, body in results["test_large"] if name == "响应内容"]
+    assert len(bodies) == 2
+    assert b'"items":[0,1,2' in bodies[0]
+    everything = b"".join(body for _, body in results["test_large"])
+    assert b"hunter2" not in everything and b"raw-secret" not in everything
+
+
+def test_httpx_transport_tees_streamed_body(run_allure):
+    pytest.importorskip("httpx")
+    results = run_allure('''
+import httpx
+from allure_handle.http_adapters import AllureTransport
+
+
+class Chunks(httpx.SyncByteStream):
+    def __iter__(self):
+        for index in range(4):
+            yield b"chunk %d\\n" % index
+
+
+def handler(request):
+    # 不带 Content-Length 的分块响应
+    return httpx.Response(200, headers={"Content-Type": "text/plain"}, stream=Chunks())
+
+
+def test_stream():
+    client = httpx.Client(transport=AllureTransport(httpx.MockTransport(handler)))
+    with client.stream("GET", "https://api.example.com/log") as resp:
+        assert not resp.is_stream_consumed
+        assert b"".join(resp.iter_bytes()) == b"chunk 0\\nchunk 1\\nchunk 2\\nchunk 3\\n"
+
+
+def test_stream_over_limit():
+    client = httpx.Client(transport=AllureTransport(httpx.MockTransport(handler), max_body_bytes=10))
+    with client.stream("GET", "https://api.example.com/log") as resp:
+        assert len(resp.read()) == 32
+''', passed=2)
+    parts = _by_name(results["test_stream"])
+    assert parts["响应内容"] == b"chunk 0\nchunk 1\nchunk 2\nchunk 3\n"
+    parts = _by_name(results["test_stream_over_limit"])
+    assert "响应内容" not in parts
+    assert "超过 10 字节".encode() in parts["响应信息"]
+
+
+def test_httpx_async_transport_records_exchange(run_allure):
+    pytest.importorskip("httpx")
+    results = run_allure('''
+import asyncio
+
+import httpx
+from allure_handle.http_adapters import AllureAsyncTransport
+
+
+def handler(request):
+    return httpx.Response(200, json={"path": request.url.path})
+
+
+def test_gather():
+    async def main():
+        transport = AllureAsyncTransport(httpx.MockTransport(handler))
+        async with httpx.AsyncClient(transport=transport) as client:
+            return await asyncio.gather(*(client.get(f"https://api.example.com/items/{i}") for i in range(3)))
+    assert [resp.json()["path"] for resp in asyncio.run(main())] == [f"/items/{i}" for i in range(3)]
+''', passed=1)
+    names = [name for name, _ in results["test_gather"]]
+    assert names.count("响应内容") == 3
@@ -0,0 +1,70 @@
+# -*- coding:UTF-8 -*-
+"""JSON 结构差异：按键匹配、无键数组的移动/平移、哈希碰撞和差异上限"""
+from allure_handle.jsondiff import JsonDiff, json_diff, render_html
+
+
+def _ops(diff) -> list:
+    return [(change['path'], change['op']) for change in diff['changes']]
+
+
+def test_equal_objects():
+    diff = json_diff({"a": [1, {"b": 2}]}, {"a": [1, {"b": 2}]})
+    assert diff['equal'] and diff['changes'] == []
+
+
+def test_dict_changes():
+    diff = json_diff({"a": 1, "b": 2, "c": {"d": 3}}, {"a": 1, "c": {"d": 4}, "e": 5})
+    assert sorted(_ops(diff)) == [('$.b', 'removed'), ('$.c.d', 'changed'), ('$.e', 'added')]
+    assert diff['counts'] == {'changed': 1, 'added': 1, 'removed': 1, 'moved': 0}
+
+
+def test_keyed_array_matches_by_id():
+    expected = {"orders": [{"id": 1, "amount": 10}, {"id": 2, "amount": 20}, {"id": 3, "amount": 30}]}
+    actual = {"orders": [{"id": 3, "amount": 30}, {"id": 1, "amount": 12}, {"id": 4, "amount": 40}]}
+    diff = json_diff(expected, actual)
+    assert sorted(_ops(diff)) == [('$.orders[id=1].amount', 'changed'), ('$.orders[id=2]', 'removed'),
+                                  ('$.orders[id=4]', 'added')]
+
+
+def test_unkeyed_reorder_is_reported_as_moved():
+    diff = json_diff([1, 2, 3], [3, 2, 1])
+    assert not diff['equal']
+    moved = [change for change in diff['changes'] if change['op'] == 'moved']
+    assert moved and all(change['from'] != change['to'] for change in moved)
+    assert diff['counts']['changed'] == diff['counts']['added'] == diff['counts']['removed'] == 0
+
+    diff = json_diff({"items": ["a", "b"]}, {"items": ["b", "a"]})
+    assert not diff['equal'] and diff['counts']['moved'] == 1
+
+
+def test_unkeyed_shift_reports_both_ends():
+    diff = json_diff(list(range(0, 1000)), list(range(1, 1001)))
+    assert _ops(diff) == [('$[0]', 'removed'), ('$[999]', 'added')]
+
+
+def test_insert_in_the_middle_is_not_a_move():
+    diff = json_diff(["a", "b", "c", "d"], ["a", "b", "x", "c", "d"])
+    assert _ops(diff) == [('$[2]', 'added')]
+
+
+def test_changed_element_between_equal_neighbours():
+    diff = json_diff([{"v": 1}, {"v": 2}, {"v": 3}], [{"v": 1}, {"v": 9}, {"v": 3}])
+    assert _ops(diff) == [('$[1].v', 'changed')]
+
+
+def test_hash_collision_does_not_hide_difference():
+    differ = JsonDiff()
+    differ._hash = lambda obj: 0
+    diff = differ.diff([5, 1, 2], [6, 2, 1])
+    assert not diff['equal']
+    assert ('$[0]', 'changed') in _ops(diff)
+
+
+def test_max_changes_truncates():
+    diff = JsonDiff(max_changes=3).diff({str(i): i for i in range(10)}, {str(i): -i - 1 for i in range(10)})
+    assert diff['truncated'] and len(diff['changes']) == 3 and not diff['equal']
+
+
+def test_render_html_lists_moves():
+    html = render_html(json_diff(["a", "b"], ["b", "a"]))
+    assert '移动' in html
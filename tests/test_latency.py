@@ -0,0 +1,54 @@
+# -*- coding:UTF-8 -*-
+"""接口延迟直方图：分桶误差、百分位数、URL 模板归一化和跨 worker 合并"""
+import pytest
+
+from allure_handle.latency import (MAX_VALUE_US, OVERFLOW_ENDPOINT, LatencyHistogram, LatencyStore,
+                                   _bucket_index, _bucket_value, url_template)
+
+
+@pytest.mark.parametrize("value", [0, 1, 31, 32, 33, 63, 64, 1000, 123456, 10 ** 8, MAX_VALUE_US])
+def test_bucket_bounds_value_within_relative_error(value):
+    upper = _bucket_value(_bucket_index(value))
+    assert value <= upper <= value + max(1, value // 16)
+    if value:
+        assert _bucket_value(_bucket_index(value) - 1) < value
+
+
+def test_bucket_index_is_monotonic():
+    indexes = [_bucket_index(value) for value in range(0, 100000, 7)]
+    assert indexes == sorted(indexes)
+
+
+def test_percentiles():
+    histogram = LatencyHistogram()
+    for ms in range(1, 101):
+        histogram.record(ms / 1000)
+    assert histogram.count == 100 and histogram.max_us == 100000
+    for percent in (50, 95, 99):
+        expected = percent * 1000
+        assert expected <= histogram.percentile(percent) <= expected * 1.04
+    assert histogram.percentile(100) == 100000
+    assert LatencyHistogram().percentile(99) == 0
+
+
+def test_url_template():
+    assert url_template("https://api.example.com/users/123/orders?page=2") == "/users/{id}/orders"
+    assert url_template("/items/3f2504e0-4f89-11d3-9a0c-0305e82c3301") == "/items/{id}"
+    assert url_template("/v2/health") == "/v2/health"
+
+
+def test_store_merges_workers_and_caps_endpoints(tmp_path):
+    first, second = LatencyStore(max_endpoints=2), LatencyStore()
+    first.record("get", "/users/1", 0.010)
+    first.record("GET", "/users/2", 0.020)
+    second.record("GET", "/users/3", 0.030)
+    second.save(tmp_path / "worker.json")
+    first.merge(LatencyStore.load(tmp_path / "worker.json"))
+    row, = first.report()
+    assert row["endpoint"] == "GET /users/{id}" and row["count"] == 3 and row["max_ms"] == 30
+
+    first.record("POST", "/orders", 0.001)
+    first.record("DELETE", "/orders/1", 0.001)
+    first.record("PUT", "/orders/2", 0.001)
+    assert {row["endpoint"]: row["count"] for row in first.report()} == {
+        "GET /users/{id}": 3, "POST /orders": 1, OVERFLOW_ENDPOINT: 2}
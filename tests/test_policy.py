@@ -0,0 +1,66 @@
+# -*- coding:UTF-8 -*-
+"""附件大小策略：头尾截取、JSON 数组截断、gzip 压缩和名称标注"""
+import gzip
+
+import allure
+from allure_commons.model2 import Attachment
+
+from allure_handle.policy import GzippedBytes, PayloadPolicy
+
+
+def _entry(name: str = "日志", attachment_type=allure.attachment_type.TEXT):
+    file_name = f"0-attachment.{attachment_type.extension}"
+    return file_name, None, Attachment(name=name, source=file_name, type=attachment_type.mime_type)
+
+
+def test_unmodified_attachment_keeps_its_name():
+    policy = PayloadPolicy(max_bytes=1000, gzip_threshold=10000)
+    data, entry = policy.apply("x" * 500, _entry())
+    assert data == b"x" * 500
+    assert entry[2].name == "日志"
+
+
+def test_oversized_text_keeps_head_and_tail():
+    policy = PayloadPolicy(max_bytes=1000)
+    body = b"H" * 5000 + b"T" * 5000
+    data, entry = policy.apply(body, _entry())
+    assert data.startswith(b"H" * 500) and data.endswith(b"T" * 500)
+    assert "已省略".encode("utf-8") in data
+    assert entry[2].name == "日志 [原始 9.8 KB, 已截断]"
+
+
+def test_gzip_output_is_deterministic():
+    policy = PayloadPolicy(gzip_threshold=1024)
+    first, entry = policy.apply("line\n" * 10000, _entry())
+    second, _ = policy.apply("line\n" * 10000, _entry())
+    assert isinstance(first, GzippedBytes) and first == second
+    assert gzip.decompress(first) == first.raw == b"line\n" * 10000
+    assert entry[0].endswith(".gz") and entry[2].type == "application/gzip"
+    assert entry[2].name == "日志 [原始 48.8 KB, gzip]"
+
+
+def test_streamed_gzip_matches_header_without_timestamp():
+    policy = PayloadPolicy(gzip_threshold=1024)
+    chunks, entry = policy.apply_stream(iter([b"a" * 4096] * 4), _entry())
+    data = b"".join(chunks)
+    assert data[4:8] == b"\0\0\0\0"
+    assert gzip.decompress(data) == b"a" * 16384
+    assert entry[2].name.endswith("gzip]")
+
+
+def test_streamed_passthrough_keeps_its_name():
+    policy = PayloadPolicy(max_bytes={"JSON": 1000})
+    chunks, entry = policy.apply_stream(iter([b"a" * 4096]), _entry())
+    assert b"".join(chunks) == b"a" * 4096
+    assert entry[2].name == "日志"
+
+
+def test_truncate_json_keeps_array_ends_without_copying_untouched_branches():
+    policy = PayloadPolicy(json_array_keep=2)
+    small = {"ids": [1, 2, 3]}
+    assert policy.truncate_json(small) is small
+    data = {"rows": list(range(10)), "meta": {"page": 1}}
+    result = policy.truncate_json(data)
+    assert result["rows"][:2] == [0, 1] and result["rows"][-2:] == [8, 9] and len(result["rows"]) == 5
+    assert result["meta"] is data["meta"]
+    assert len(data["rows"]) == 10
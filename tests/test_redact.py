@@ -0,0 +1,90 @@
+# -*- coding:UTF-8 -*-
+"""脱敏：字段名、路径、值规则，以及编码结果预检的命中/未命中路径"""
+import json
+
+from allure_handle.redact import Redactor
+
+
+def _dumps_bytes(obj) -> bytes:
+    return json.dumps(obj, ensure_ascii=False).encode('utf-8')
+
+
+def test_keys_ignore_case_and_separators():
+    redactor = Redactor()
+    data = {"Access-Token": "t1", "user": {"profile": {"PASS_WORD": "p1", "name": "alice"}}, "tokenizer": "keep"}
+    result = redactor.redact(data)
+    assert result == {"Access-Token": "***", "user": {"profile": {"PASS_WORD": "***", "name": "alice"}},
+                      "tokenizer": "keep"}
+    # 不修改原对象
+    assert data["user"]["profile"]["PASS_WORD"] == "p1"
+
+
+def test_no_hit_returns_original_object():
+    redactor = Redactor()
+    data = {"items": [{"id": 1, "name": "a"}], "count": 1}
+    assert redactor.redact(data) is data
+
+
+def test_paths_match_wildcard_segments():
+    redactor = Redactor(keys=(), paths=['$.data[*].phone'], patterns=())
+    data = {"data": [{"phone": "13800000000", "id": 1}, {"phone": "13900000000"}], "phone": "top-level"}
+    assert redactor.redact(data) == {"data": [{"phone": "***", "id": 1}, {"phone": "***"}], "phone": "top-level"}
+
+
+def test_value_patterns():
+    redactor = Redactor()
+    assert redactor.redact_text("Authorization: Bearer abc.def") == "Authorization: Bearer ***"
+    assert redactor.redact_text("mail bob@example.com now") == "mail *** now"
+    assert redactor.redact_text("https://user:pw@host/x") == "https://***@host/x"
+    assert redactor.redact_text("https://h/x?a=1&api_key=zz#f") == "https://h/x?a=1&api_key=***#f"
+    assert redactor.redact_text(b"token=abc") == b"token=***"
+
+
+def test_url_secret_params_match_form_body():
+    redactor = Redactor()
+    assert redactor.redact_text("password=p1&user=alice&token=t1") == "password=***&user=alice&token=***"
+    assert redactor.redact_text("xpassword=p1") == "xpassword=p1"
+
+
+def test_prefilter_miss_encodes_once():
+    redactor = Redactor()
+    data = {"items": list(range(10)), "name": "alice"}
+    assert redactor.encode(data, json.dumps) == json.dumps(data)
+    assert redactor.summary()["prefiltered"] == 1
+
+
+def test_prefilter_hit_walks_nested_keys():
+    redactor = Redactor()
+    data = {"a": {"b": {"c": {"client_secret": "s1"}}}}
+    encoded = json.loads(redactor.encode(data, json.dumps))
+    assert encoded == {"a": {"b": {"c": {"client_secret": "***"}}}}
+    assert redactor.summary()["prefiltered"] == 0
+
+
+def test_shallow_keys_do_not_trigger_walk():
+    redactor = Redactor()
+    data = {"headers": {"Authorization": "Basic dXNlcjpwYXNz", "Accept": "*/*"}}
+    encoded = json.loads(redactor.encode(data, _dumps_bytes))
+    assert encoded == {"headers": {"Authorization": "***", "Accept": "*/*"}}
+    stats = redactor.summary()
+    assert stats["shallow"] == 1 and stats["prefiltered"] == 1
+
+
+def test_shallow_key_with_another_deep_hit():
+    redactor = Redactor()
+    data = {"headers": {"Authorization": "x"}, "body": {"items": [{"refresh_token": "r1"}]}}
+    encoded = json.loads(redactor.encode(data, json.dumps))
+    assert encoded == {"headers": {"Authorization": "***"}, "body": {"items": [{"refresh_token": "***"}]}}
+
+
+def test_escaped_strings_skip_prefilter():
+    redactor = Redactor()
+    data = {"log": "line 1\nAuthorization: Bearer abc"}
+    encoded = json.loads(redactor.encode(data, json.dumps))
+    assert encoded == {"log": "line 1\nAuthorization: Bearer ***"}
+
+
+def test_redact_chunks_across_boundaries():
+    redactor = Redactor()
+    chunks = ["ok\nAuthorization: Bea", "rer abc", "def\n", b"tail bob@exam", b"ple.com"]
+    assert b"".join(redactor.redact_chunks(chunks)) == b"ok\nAuthorization: Bearer ***\ntail ***"